@@ -0,0 +1,55 @@
+"""
+Settings for API-only workers.
+
+Every /api/ route authenticates with tokens, so these workers drop the
+session, CSRF, message and clickjacking middleware along with the admin.
+Run them with DJANGO_SETTINGS_MODULE=app.api_settings and keep admin
+workers on app.settings, which still runs the full stack.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+API_ONLY_REMOVED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+]
+
+INSTALLED_APPS = [
+    app for app in INSTALLED_APPS  # noqa: F405
+    if app not in API_ONLY_REMOVED_APPS
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.common.CommonMiddleware',
+]
+
+ROOT_URLCONF = 'app.api_urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+            ],
+        },
+    },
+]
+
+# Without sessions the browsable API and session/basic auth have no use
+REST_FRAMEWORK = dict(
+    REST_FRAMEWORK,  # noqa: F405
+    DEFAULT_AUTHENTICATION_CLASSES=(
+        'users.authentication.CachedTokenAuthentication',
+    ),
+    DEFAULT_RENDERER_CLASSES=(
+        'core.renderers.FastJSONRenderer',
+        'core.renderers.MessagePackRenderer',
+    ),
+)
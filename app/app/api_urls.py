@@ -0,0 +1,10 @@
+"""API-only URL Configuration
+
+Used by app.api_settings. Same routes as app.urls minus the admin.
+"""
+from django.urls import path, include
+
+urlpatterns = [
+    path('api/users/', include('users.urls')),
+    path('api/recipe/', include('recipe.urls')),
+]
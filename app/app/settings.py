@@ -82,16 +82,135 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.1/ref/settings/#databases
 
+# DB_POOL=1 switches to the process wide connection pool configured by
+# POOL, which the stock backend ignores
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.backends.postgresql_pool'
+        if os.environ.get('DB_POOL') == '1'
+        else 'django.db.backends.postgresql',
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        'POOL': {
+            'MIN_SIZE': int(os.environ.get('DB_POOL_MIN_SIZE', 0)),
+            'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+            'MAX_LIFETIME': float(
+                os.environ.get('DB_POOL_MAX_LIFETIME', 3600)
+            ),
+            'PING_AFTER': float(os.environ.get('DB_POOL_PING_AFTER', 5)),
+        },
     }
 }
 
+# Read replicas of the default database, as comma separated hosts sharing
+# its name and credentials, e.g. DB_REPLICA_HOSTS=replica1,replica2
+DATABASE_REPLICAS = []
+for index, host in enumerate(
+        filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(','))):
+    alias = f'replica{index + 1}'
+    DATABASES[alias] = dict(DATABASES['default'], HOST=host,
+                            TEST={'MIRROR': 'default'})
+    DATABASE_REPLICAS.append(alias)
+
+# Databases holding the users' tags, ingredients and recipes, as comma
+# separated hosts sharing the default name and credentials, e.g.
+# DB_SHARD_HOSTS=shard1,shard2. Users are placed by id when created and
+# keep their shard until moved with move_user_shard, so shards may only
+# be appended.
+SHARDS = ['default']
+for index, host in enumerate(
+        filter(None, os.environ.get('DB_SHARD_HOSTS', '').split(','))):
+    alias = f'shard{index + 1}'
+    DATABASES[alias] = dict(DATABASES['default'], HOST=host)
+    SHARDS.append(alias)
+
+# Ids given to new rows on each shard, in consecutive ranges so moved rows
+# keep unique ids. The ranges of all shards must fit in a 32 bit id.
+SHARD_ID_RANGE = 10 ** 8
+
+DATABASE_ROUTERS = [
+    'core.routers.ShardRouter',
+    'core.routers.ReplicaRouter',
+]
+
+# Seconds a user keeps reading from the primary after a write, longer
+# than the replication lag. Tracked by a signed cookie.
+REPLICA_STICKY_SECONDS = 5
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Token key -> user id and user id -> user, kept short as deleted
+    # tokens and changed users are only dropped from the cache of the
+    # process changing them
+    'auth_tokens': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'auth_tokens',
+        'TIMEOUT': 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    'list_responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'list_responses',
+        'TIMEOUT': 600,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    },
+}
+
+# Cache alias used by users.authentication.CachedTokenAuthentication
+AUTH_TOKEN_CACHE = 'auth_tokens'
+
+# Cache alias used by recipe.cache.CachedListMixin. Keys embed the list
+# versions stored in the database, so writes of any process invalidate
+# them, but with LocMemCache every process caches and evicts on its own.
+LIST_RESPONSE_CACHE = 'list_responses'
+
+# Recipe tag/ingredient filtering, 'bitmap' (in-memory index) or 'sql'
+RECIPE_FILTER_BACKEND = 'bitmap'
+
+# Number of users whose recipe filter index is kept per process
+RECIPE_INDEX_MAX_USERS = 1000
+
+# Filters matching more recipes than this on one page, such as ranked
+# search results that can't be paged by id, use SQL joins instead of an
+# id list
+RECIPE_INDEX_MAX_IDS = 1000
+
+# Serve recipe lists from values() rows instead of model instances
+RECIPE_VALUES_LIST = os.environ.get('RECIPE_VALUES_LIST') == '1'
+
+# Seconds a /readyz result is reused by each worker
+HEALTH_CHECK_READY_TTL = 5
+
+# Bearer token required by /metrics, which is disabled when unset
+HEALTH_CHECK_METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.FastJSONRenderer',
+        'core.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.parsers.FastJSONParser',
+        'core.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.1/ref/settings/#auth-password-validators
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
 application = get_wsgi_application()
+
+# Imported once Django is set up, as it reads settings and the database
+from core.health import HealthCheckMiddleware  # noqa: E402
+
+application = HealthCheckMiddleware(application)
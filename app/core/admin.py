@@ -25,5 +25,11 @@ class UserAdmin(BaseUserAdmin):
     )
 
 
-admin.site.register(models.Tag)
-admin.site.register(models.Ingredient)
+@admin.register(models.Tag, models.Ingredient)
+class RecipeAttrAdmin(admin.ModelAdmin):
+    def save_model(self, request, obj, form, change):
+        # A full save would overwrite `usage` with the loaded value
+        if change:
+            obj.save(update_fields=list(form.cleaned_data))
+        else:
+            obj.save()
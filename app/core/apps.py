@@ -1,5 +1,10 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from .sharding import align_sequences_after_migrate
+        post_migrate.connect(align_sequences_after_migrate, sender=self)
@@ -0,0 +1,200 @@
+import threading
+import time
+from collections import Counter, deque
+from django.db import OperationalError
+
+
+class PoolTimeout(OperationalError):
+    """No connection became available before the checkout timeout"""
+
+
+class ConnectionPool:
+    """Thread safe pool of DB-API connections
+
+    Connections are opened by `connect` up to `max_size`, checked with
+    `check(connection, idle_seconds)` when checked out and cleaned with
+    `reset(connection)` when returned. Connections failing either, or
+    older than `max_lifetime` seconds, are closed and replaced. Neither
+    the checks nor closing run while holding the pool lock.
+    """
+
+    def __init__(self, connect, check=None, reset=None, min_size=0,
+                 max_size=10, timeout=30, max_lifetime=None, name=None):
+        self.connect = connect
+        self.check = check
+        self.reset = reset
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.name = name
+
+        self.metrics = Counter(hits=0, misses=0, waits=0, timeouts=0,
+                               discarded=0)
+        self._condition = threading.Condition()
+        self._idle = deque()
+        self._opened_at = {}
+        self._size = 0
+        self._closed = False
+
+    def fill(self):
+        """Open connections until the pool holds `min_size` of them"""
+
+        while True:
+            with self._condition:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            connection = self._open()
+            with self._condition:
+                self._idle.append((connection, time.monotonic()))
+                self._condition.notify()
+
+    def get(self):
+        """Check out a connection, waiting up to `timeout` seconds"""
+
+        deadline = time.monotonic() + self.timeout
+        while True:
+            idle = self._checkout(deadline)
+            if idle is None:
+                return self._open()
+
+            connection, returned_at = idle
+            if self._usable(connection, returned_at):
+                with self._condition:
+                    self.metrics['hits'] += 1
+                return connection
+            self._discard(connection)
+
+    def put(self, connection):
+        """Return a checked out connection to the pool"""
+
+        if not self._closed and not self._expired(connection):
+            try:
+                if self.reset is not None:
+                    self.reset(connection)
+            except Exception:
+                pass
+            else:
+                with self._condition:
+                    self._idle.append((connection, time.monotonic()))
+                    self._condition.notify()
+                return
+
+        self._discard(connection)
+
+    def close(self):
+        """Close the idle connections and every connection returned later"""
+
+        with self._condition:
+            self._closed = True
+            idle = [connection for connection, _ in self._idle]
+            self._idle.clear()
+        for connection in idle:
+            self._discard(connection)
+
+    def stats(self):
+        """Return the pool counters and sizes"""
+
+        with self._condition:
+            return dict(self.metrics, size=self._size,
+                        idle=len(self._idle),
+                        in_use=self._size - len(self._idle))
+
+    def _checkout(self, deadline):
+        """Take an idle (connection, returned_at), or reserve a slot for a
+        new connection and return None
+        """
+
+        with self._condition:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+
+                if self._size < self.max_size:
+                    self._size += 1
+                    self.metrics['misses'] += 1
+                    return None
+
+                self.metrics['waits'] += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._condition.wait(remaining):
+                    if not self._idle and self._size >= self.max_size:
+                        self.metrics['timeouts'] += 1
+                        raise PoolTimeout(
+                            f'no connection available in {self.timeout}s'
+                        )
+
+    def _open(self):
+        try:
+            connection = self.connect()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._opened_at[id(connection)] = time.monotonic()
+        return connection
+
+    def _expired(self, connection):
+        opened_at = self._opened_at.get(id(connection), 0)
+        return self.max_lifetime is not None and \
+            time.monotonic() - opened_at >= self.max_lifetime
+
+    def _usable(self, connection, returned_at):
+        if self._expired(connection):
+            return False
+        if self.check is None:
+            return True
+        try:
+            return self.check(connection, time.monotonic() - returned_at)
+        except Exception:
+            return False
+
+    def _discard(self, connection):
+        """Close a connection and free its slot"""
+
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+        with self._condition:
+            self._opened_at.pop(id(connection), None)
+            self._size -= 1
+            self.metrics['discarded'] += 1
+            self._condition.notify()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key, **kwargs):
+    """Return the pool registered under `key`, creating it from kwargs"""
+
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(**kwargs)
+    return pool
+
+
+def close_pools():
+    """Close and forget every pool of this process"""
+
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+def pool_stats():
+    """Return {pool name: stats} for every pool of this process"""
+
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.name: pool.stats() for pool in pools}
@@ -0,0 +1,109 @@
+"""PostgreSQL backend reusing connections from a process wide pool
+
+Configured by the POOL entry of the database settings:
+
+    'POOL': {
+        'MIN_SIZE': 0,         # connections opened by the first checkout
+        'MAX_SIZE': 10,        # checkouts wait when all are in use
+        'TIMEOUT': 30,         # seconds to wait before raising PoolTimeout
+        'MAX_LIFETIME': 3600,  # seconds before a connection is replaced
+        'PING_AFTER': 5,       # idle seconds before a checkout runs SELECT 1
+    }
+
+Django still closes its connection at the end of each request (unless
+CONN_MAX_AGE keeps it), which returns it to the pool instead.
+"""
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from core.backends.pool import close_pools, get_pool
+
+POOL_DEFAULTS = {
+    'MIN_SIZE': 0,
+    'MAX_SIZE': 10,
+    'TIMEOUT': 30,
+    'MAX_LIFETIME': 3600,
+    'PING_AFTER': 5,
+}
+
+
+def reset_connection(connection):
+    """Drop the session state a request left behind"""
+
+    if connection.closed:
+        raise base.Database.InterfaceError('connection already closed')
+    if connection.get_transaction_status() != \
+            extensions.TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+    connection.autocommit = True
+    with connection.cursor() as cursor:
+        cursor.execute('DISCARD ALL')
+    connection.autocommit = False
+
+
+def checker(ping_after):
+    """Return a checkout check pinging connections idle for `ping_after`"""
+
+    def check(connection, idle):
+        if connection.closed or connection.get_transaction_status() != \
+                extensions.TRANSACTION_STATUS_IDLE:
+            return False
+        if ping_after is not None and idle >= ping_after:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            connection.rollback()
+        return True
+
+    return check
+
+
+class DatabaseCreation(base.DatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Pooled connections would keep the test database in use
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def get_pool(self, conn_params):
+        """Return the pool of this alias and connection parameters"""
+
+        options = dict(POOL_DEFAULTS, **self.settings_dict.get('POOL', {}))
+        key = (self.alias, repr(sorted(conn_params.items())))
+        pool = get_pool(
+            key,
+            connect=lambda: base.Database.connect(**conn_params),
+            check=checker(options['PING_AFTER']),
+            reset=reset_connection,
+            min_size=options['MIN_SIZE'],
+            max_size=options['MAX_SIZE'],
+            timeout=options['TIMEOUT'],
+            max_lifetime=options['MAX_LIFETIME'],
+            name=f"{self.alias}:{conn_params.get('database', '')}",
+        )
+        pool.fill()
+        return pool
+
+    def get_new_connection(self, conn_params):
+        self.pool = self.get_pool(conn_params)
+        connection = self.pool.get()
+
+        # Same as the postgresql backend, on fresh and reused connections
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.put(self.connection)
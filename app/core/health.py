@@ -0,0 +1,118 @@
+import hmac
+import json
+import threading
+import time
+from django.conf import settings
+from django.db import (
+    DEFAULT_DB_ALIAS, DatabaseError, close_old_connections, connections
+)
+from django.db.migrations.executor import MigrationExecutor
+
+from core.backends.pool import pool_stats
+
+_lock = threading.Lock()
+_ready = {'checked_at': None, 'result': None, 'migrated': False}
+
+
+def check_database(alias=DEFAULT_DB_ALIAS):
+    """Return the readiness checks of a database as {name: problem}
+
+    The migrations of this process' code only need to be found applied
+    once, after that a check is a single SELECT 1.
+    """
+
+    connection = connections[alias]
+    problems = {}
+    plan = []
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        if not _ready['migrated']:
+            executor = MigrationExecutor(connection)
+            plan = executor.migration_plan(
+                executor.loader.graph.leaf_nodes()
+            )
+            _ready['migrated'] = not plan
+    except DatabaseError as exc:
+        problems['database'] = str(exc) or exc.__class__.__name__
+    else:
+        if plan:
+            problems['migrations'] = f'{len(plan)} unapplied'
+
+    return problems
+
+
+def readiness():
+    """Return (ready, checks), refreshed at most once per TTL"""
+
+    with _lock:
+        checked_at = _ready['checked_at']
+        now = time.monotonic()
+        if checked_at is None or \
+                now - checked_at >= settings.HEALTH_CHECK_READY_TTL:
+            # Health checks bypass the request signals closing connections
+            close_old_connections()
+            problems = check_database()
+            close_old_connections()
+
+            checks = {name: problems.get(name, 'ok')
+                      for name in ('database', 'migrations')}
+            _ready['result'] = (not problems, checks)
+            _ready['checked_at'] = now
+
+        return _ready['result']
+
+
+def metrics_allowed(environ):
+    """Return whether a request carries the /metrics bearer token"""
+
+    token = settings.HEALTH_CHECK_METRICS_TOKEN
+    if not token:
+        return False
+    header = environ.get('HTTP_AUTHORIZATION', '')
+    return hmac.compare_digest(header.encode(), f'Bearer {token}'.encode())
+
+
+def json_response(start_response, status, body):
+    content = json.dumps(body).encode()
+    start_response(status, [('Content-Type', 'application/json'),
+                            ('Content-Length', str(len(content))),
+                            ('Cache-Control', 'no-store')])
+    return [content]
+
+
+class HealthCheckMiddleware:
+    """WSGI middleware answering load balancer probes before Django
+
+    /healthz only tells the process is serving, /readyz also checks the
+    database and migrations, /metrics reports the connection pools of
+    this process to holders of HEALTH_CHECK_METRICS_TOKEN. None goes
+    through the Django middleware, URL resolving or authentication.
+    """
+
+    def __init__(self, application):
+        self.application = application
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO')
+        if path == '/healthz':
+            return json_response(start_response, '200 OK',
+                                 {'status': 'ok'})
+        if path == '/readyz':
+            ready, checks = readiness()
+            return json_response(
+                start_response,
+                '200 OK' if ready else '503 Service Unavailable',
+                {'status': 'ok' if ready else 'unavailable', **checks},
+            )
+        if path == '/metrics':
+            if not settings.HEALTH_CHECK_METRICS_TOKEN:
+                return self.application(environ, start_response)
+            if not metrics_allowed(environ):
+                return json_response(start_response, '401 Unauthorized',
+                                     {'status': 'unauthorized'})
+            return json_response(start_response, '200 OK',
+                                 {'db_pools': pool_stats()})
+
+        return self.application(environ, start_response)
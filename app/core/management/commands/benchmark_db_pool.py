@@ -0,0 +1,79 @@
+import copy
+import threading
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.postgresql.base import DatabaseWrapper
+
+from core.backends.pool import close_pools, pool_stats
+from core.backends.postgresql_pool.base import \
+    DatabaseWrapper as PooledDatabaseWrapper
+
+BACKENDS = (
+    ('unpooled', DatabaseWrapper),
+    ('pooled', PooledDatabaseWrapper),
+)
+
+
+class Command(BaseCommand):
+    """Django command to compare pooled and unpooled PostgreSQL requests"""
+
+    help = ('Run request-like units of work (connect, query, close) on '
+            'worker threads with and without the connection pool and '
+            'report requests per second.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--threads', type=int, default=4)
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'postgresql':
+            raise CommandError('benchmark_db_pool needs PostgreSQL')
+
+        settings_dict = copy.deepcopy(connection.settings_dict)
+        settings_dict['CONN_MAX_AGE'] = 0
+        settings_dict.setdefault('POOL', {})
+        settings_dict['POOL'].setdefault('MAX_SIZE', options['threads'])
+
+        rates = {}
+        for name, wrapper_class in BACKENDS:
+            rates[name] = self.run(name, wrapper_class, settings_dict,
+                                   options['requests'], options['threads'])
+        close_pools()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"[INFO] pooling: {rates['pooled'] / rates['unpooled']:.1f}x "
+            f'requests/s'
+        ))
+
+    def run(self, name, wrapper_class, settings_dict, requests, threads):
+        """Return the requests per second of a backend"""
+
+        def work(count):
+            wrapper = wrapper_class(settings_dict, f'benchmark_{name}')
+            for i in range(count):
+                with wrapper.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                    cursor.fetchone()
+                # Django closes the connection when a request finishes
+                wrapper.close()
+
+        workers = [
+            threading.Thread(target=work, args=(requests // threads,))
+            for i in range(threads)
+        ]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        rate = (requests // threads * threads) / \
+            (time.perf_counter() - start)
+
+        self.stdout.write(f'[INFO] {name}: {rate:.0f} requests/s')
+        if name == 'pooled':
+            for pool_name, stats in pool_stats().items():
+                self.stdout.write(f'[INFO] pool {pool_name}: {stats}')
+        return rate
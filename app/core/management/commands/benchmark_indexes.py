@@ -0,0 +1,90 @@
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Tag, Ingredient, Recipe
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """Django command to explain and time the per-user list queries"""
+
+    help = ('Seed a throwaway dataset and print the query plan and timing '
+            'of the recipe app list queries. All data is rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--rows', type=int, default=2000,
+                            help='tags, ingredients and recipes per user')
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self.seed(options['users'], options['rows'])
+            self.run(user, options['page_size'], options['repeat'])
+            transaction.set_rollback(True)
+
+    def seed(self, users, rows):
+        """Create `users` users owning `rows` objects of each kind"""
+
+        self.stdout.write(f'[INFO] seeding {users} users x {rows} rows...')
+        owners = [
+            User.objects.create_user(f'bench{i}@bench.local')
+            for i in range(users)
+        ]
+        for owner in owners:
+            Tag.objects.bulk_create(
+                Tag(user=owner, name=f'tag {i}')
+                for i in range(rows)
+            )
+            Ingredient.objects.bulk_create(
+                Ingredient(user=owner, name=f'ingredient {i}')
+                for i in range(rows)
+            )
+            Recipe.objects.bulk_create(
+                Recipe(user=owner, title=f'recipe {i}', time_minutes=i,
+                       price='1.00')
+                for i in range(rows)
+            )
+
+        user = owners[0]
+        tag = Tag.objects.filter(user=user).first()
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe_id=recipe_id, tag_id=tag.id)
+            for recipe_id in Recipe.objects.filter(user=user)
+                                           .values_list('id', flat=True)
+        )
+
+        return user
+
+    def run(self, user, page_size, repeat):
+        """Explain and time each list query for `user`"""
+
+        tag = Tag.objects.filter(user=user).first()
+        tags = Tag.objects.filter(user=user).order_by('-name', '-id')
+        ingredients = Ingredient.objects.filter(user=user)\
+                                        .order_by('-name', '-id')
+        recipes = Recipe.objects.filter(user=user).order_by('-id')
+        recipes_by_tag = Recipe.tags.through.objects\
+            .filter(tag_id=tag.id)\
+            .values_list('recipe_id', flat=True)
+        queries = {
+            'tags': tags[:page_size],
+            'ingredients': ingredients[:page_size],
+            'recipes': recipes[:page_size],
+            'recipes by tag': recipes_by_tag,
+        }
+
+        for name, qs in queries.items():
+            start = time.perf_counter()
+            for _ in range(repeat):
+                list(qs.all())
+            elapsed = (time.perf_counter() - start) / repeat * 1000
+
+            self.stdout.write(self.style.SUCCESS(
+                f'[INFO] {name}: {elapsed:.3f} ms/query'
+            ))
+            self.stdout.write(qs.explain())
@@ -0,0 +1,82 @@
+import importlib
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+
+User = get_user_model()
+
+PROFILES = (
+    ('full', 'app.settings'),
+    ('api', 'app.api_settings'),
+)
+
+PATHS = (
+    '/api/users/detail',
+    '/api/recipe/tags/',
+)
+
+
+def profile_overrides(module):
+    """Return the request handling settings of a settings module"""
+
+    profile = importlib.import_module(module)
+    return {
+        'MIDDLEWARE': profile.MIDDLEWARE,
+        'ROOT_URLCONF': profile.ROOT_URLCONF,
+        'REST_FRAMEWORK': getattr(profile, 'REST_FRAMEWORK', {}),
+    }
+
+
+class Command(BaseCommand):
+    """Django command to compare the full and API-only request stacks"""
+
+    help = ('Time token authenticated API requests through the middleware '
+            'and URLconf of app.settings and app.api_settings. All data is '
+            'rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = User.objects.create_user('bench@bench.local')
+            token = Token.objects.create(user=user)
+            timings = {
+                name: self.run(module, token, options['requests'])
+                for name, module in PROFILES
+            }
+            transaction.set_rollback(True)
+
+        saved = timings['full'] - timings['api']
+        self.stdout.write(self.style.SUCCESS(
+            f'[INFO] api profile saves {saved:.1f} us/request'
+        ))
+
+    def run(self, module, token, requests):
+        """Return the mean time per request in microseconds"""
+
+        overrides = profile_overrides(module)
+        with override_settings(ALLOWED_HOSTS=['testserver'], **overrides):
+            client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+            # Warm up the token and list caches
+            for path in PATHS:
+                response = client.get(path)
+                if response.status_code != 200:
+                    self.stdout.write(self.style.ERROR(
+                        f'[ERROR] {module} {path}: {response.status_code}'
+                    ))
+
+            start = time.perf_counter()
+            for i in range(requests):
+                client.get(PATHS[i % len(PATHS)])
+            elapsed = (time.perf_counter() - start) / requests * 1000000
+
+        self.stdout.write(
+            f"[INFO] {module}: {len(overrides['MIDDLEWARE'])} middleware, "
+            f'{elapsed:.1f} us/request'
+        )
+        return elapsed
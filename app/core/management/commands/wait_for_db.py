@@ -1,23 +1,62 @@
+import random
 import time
-from django.db import connections
+from django.db import DEFAULT_DB_ALIAS, connections
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
 
 class Command(BaseCommand):
     """Django command to pause execution until database is available"""
 
-    def handle(self, *args, **kwargs):
+    help = ('Wait until the database accepts connections and answers a '
+            'query, retrying with exponential backoff until the deadline.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--timeout', type=float, default=60,
+                            help='seconds to wait before giving up')
+        parser.add_argument('--initial-delay', type=float, default=0.1)
+        parser.add_argument('--max-delay', type=float, default=5)
+
+    def probe(self, alias):
+        """Open a connection and run a trivial query on it"""
+
+        connection = connections[alias]
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+        except OperationalError:
+            # Drop the broken connection so the next probe reconnects
+            connection.close()
+            raise
+
+    def handle(self, *args, **options):
         self.stdout.write('[INFO] waiting for database to start...')
-        db_conn = None
-        while not db_conn:
+        deadline = time.monotonic() + options['timeout']
+        delay = options['initial_delay']
+        while True:
             try:
-                db_conn = connections['default']
-            except OperationalError:
-                self.stdout.write(self.style.ERROR('[ERROR] database '
-                                                   'unavailable waiting for 1'
-                                                   ' second...'))
-                time.sleep(1)
+                self.probe(options['database'])
+                break
+            except OperationalError as exc:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(
+                        f"database unavailable after {options['timeout']} "
+                        f'seconds: {exc}'
+                    )
+
+                # Half fixed, half random so restarted containers spread
+                # their retries
+                pause = min(delay / 2 + random.uniform(0, delay / 2),
+                            remaining)
+                self.stdout.write(self.style.ERROR(
+                    f'[ERROR] database unavailable, retrying in '
+                    f'{pause:.2f} seconds...'
+                ))
+                time.sleep(pause)
+                delay = min(delay * 2, options['max_delay'])
 
         self.stdout.write(self.style.SUCCESS('[INFO] connected to database '
                                              'successfully!'))
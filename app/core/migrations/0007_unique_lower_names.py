@@ -0,0 +1,56 @@
+from django.db import migrations
+from django.db.models.functions import Lower
+
+
+def merge_duplicate_names(apps, schema_editor):
+    """Merge tags/ingredients whose names only differ by case"""
+
+    Recipe = apps.get_model('core', 'Recipe')
+    db_alias = schema_editor.connection.alias
+
+    for model_name, relation in (('Tag', 'tags'), ('Ingredient', 'ingredients')):
+        model = apps.get_model('core', model_name)
+        through = getattr(Recipe, relation).through
+        column = f'{model_name.lower()}_id'
+
+        keep = {}
+        rows = model.objects.using(db_alias)\
+                            .annotate(name_lower=Lower('name'))\
+                            .order_by('id')\
+                            .values_list('id', 'user_id', 'name_lower')
+        for pk, user_id, name_lower in rows:
+            kept = keep.setdefault((user_id, name_lower), pk)
+            if kept == pk:
+                continue
+
+            links = through.objects.using(db_alias)
+            linked = links.filter(**{column: kept})\
+                          .values_list('recipe_id', flat=True)
+            links.filter(**{column: pk})\
+                 .exclude(recipe_id__in=list(linked))\
+                 .update(**{column: kept})
+            model.objects.using(db_alias).filter(pk=pk).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_user_access_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_names,
+                             migrations.RunPython.noop),
+        # Expression indexes can't be declared on the models in this
+        # Django version, so the case-insensitive uniqueness lives here
+        migrations.RunSQL(
+            ['CREATE UNIQUE INDEX core_tag_user_lower_name_uniq '
+             'ON core_tag (user_id, LOWER(name))'],
+            ['DROP INDEX core_tag_user_lower_name_uniq'],
+        ),
+        migrations.RunSQL(
+            ['CREATE UNIQUE INDEX core_ingredient_user_lower_name_uniq '
+             'ON core_ingredient (user_id, LOWER(name))'],
+            ['DROP INDEX core_ingredient_user_lower_name_uniq'],
+        ),
+    ]
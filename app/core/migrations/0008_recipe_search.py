@@ -0,0 +1,76 @@
+from django.db import migrations
+
+POSTGRES_FORWARD = [
+    'ALTER TABLE core_recipe ADD COLUMN search_vector tsvector',
+    'CREATE INDEX core_recipe_search_vector_idx '
+    'ON core_recipe USING gin (search_vector)',
+    """
+    UPDATE core_recipe r SET search_vector =
+        setweight(to_tsvector('english', r.title), 'A') ||
+        setweight(to_tsvector('english', concat_ws(' ',
+            (SELECT string_agg(t.name, ' ') FROM core_recipe_tags rt
+             JOIN core_tag t ON t.id = rt.tag_id WHERE rt.recipe_id = r.id),
+            (SELECT string_agg(i.name, ' ') FROM core_recipe_ingredients ri
+             JOIN core_ingredient i ON i.id = ri.ingredient_id
+             WHERE ri.recipe_id = r.id)
+        )), 'B')
+    """,
+]
+
+POSTGRES_REVERSE = [
+    'ALTER TABLE core_recipe DROP COLUMN search_vector',
+]
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE core_recipe_search "
+    "USING fts5(title, names, tokenize='porter unicode61')",
+    """
+    INSERT INTO core_recipe_search (rowid, title, names)
+    SELECT r.id, r.title, trim(
+        coalesce((SELECT group_concat(t.name, ' ') FROM core_recipe_tags rt
+                  JOIN core_tag t ON t.id = rt.tag_id
+                  WHERE rt.recipe_id = r.id), '') || ' ' ||
+        coalesce((SELECT group_concat(i.name, ' ')
+                  FROM core_recipe_ingredients ri
+                  JOIN core_ingredient i ON i.id = ri.ingredient_id
+                  WHERE ri.recipe_id = r.id), ''))
+    FROM core_recipe r
+    """,
+]
+
+SQLITE_REVERSE = [
+    'DROP TABLE core_recipe_search',
+]
+
+
+def run_for_vendor(statements):
+    """Return a RunPython function executing the vendor's statements"""
+
+    def run(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for sql in statements.get(vendor, ()):
+            schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+    """Full-text search on recipe titles and tag/ingredient names
+
+    PostgreSQL gets a GIN indexed tsvector column and SQLite an FTS5 table,
+    both kept up to date by recipe.search. Other backends get nothing and
+    fall back to substring search.
+    """
+
+    dependencies = [
+        ('core', '0007_unique_lower_names'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor({'postgresql': POSTGRES_FORWARD,
+                            'sqlite': SQLITE_FORWARD}),
+            run_for_vendor({'postgresql': POSTGRES_REVERSE,
+                            'sqlite': SQLITE_REVERSE}),
+        ),
+    ]
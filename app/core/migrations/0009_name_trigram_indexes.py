@@ -0,0 +1,41 @@
+from django.db import migrations
+
+POSTGRES_FORWARD = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX core_tag_name_trgm_idx '
+    'ON core_tag USING gin (LOWER(name) gin_trgm_ops)',
+    'CREATE INDEX core_ingredient_name_trgm_idx '
+    'ON core_ingredient USING gin (LOWER(name) gin_trgm_ops)',
+]
+
+POSTGRES_REVERSE = [
+    'DROP INDEX core_tag_name_trgm_idx',
+    'DROP INDEX core_ingredient_name_trgm_idx',
+]
+
+
+def run_on_postgres(statements):
+    """Return a RunPython function executing statements on PostgreSQL"""
+
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            for sql in statements:
+                schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+    """Trigram indexes for typo tolerant tag/ingredient autocomplete
+
+    Prefix matches use the text_pattern_ops indexes added in 0015.
+    """
+
+    dependencies = [
+        ('core', '0008_recipe_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_postgres(POSTGRES_FORWARD),
+                             run_on_postgres(POSTGRES_REVERSE)),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 2.1.15 on 2026-10-18 02:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from collections import Counter
+from decimal import Decimal
+
+
+def populate_counters(apps, schema_editor):
+    """Count the existing recipes of every user"""
+
+    Recipe = apps.get_model('core', 'Recipe')
+    RecipeStatsCounter = apps.get_model('core', 'RecipeStatsCounter')
+    db_alias = schema_editor.connection.alias
+
+    counts = Counter()
+    recipes = Recipe.objects.using(db_alias)\
+                            .prefetch_related('tags', 'ingredients')
+    for recipe in recipes:
+        counts[recipe.user_id, 'time', recipe.time_minutes] += 1
+        counts[recipe.user_id, 'price',
+               int(recipe.price // Decimal('5.00'))] += 1
+        for tag in recipe.tags.all():
+            counts[recipe.user_id, 'tag', tag.id] += 1
+        for ingredient in recipe.ingredients.all():
+            counts[recipe.user_id, 'ingredient', ingredient.id] += 1
+
+    RecipeStatsCounter.objects.using(db_alias).bulk_create((
+        RecipeStatsCounter(user_id=user_id, kind=kind, key=key, count=count)
+        for (user_id, kind, key), count in counts.items()
+    ), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_name_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeStatsCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('time', 'Time in minutes'), ('price', 'Price bucket'), ('tag', 'Tag id'), ('ingredient', 'Ingredient id')], max_length=10)),
+                ('key', models.IntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='recipestatscounter',
+            unique_together={('user', 'kind', 'key')},
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
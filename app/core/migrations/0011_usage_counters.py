@@ -0,0 +1,56 @@
+# Generated by Django 2.1.15 on 2026-10-18 02:52
+
+from django.db import migrations, models
+
+SQLITE_LOWER_NAME_INDEXES = [
+    'CREATE UNIQUE INDEX IF NOT EXISTS core_tag_user_lower_name_uniq '
+    'ON core_tag (user_id, LOWER(name))',
+    'CREATE UNIQUE INDEX IF NOT EXISTS core_ingredient_user_lower_name_uniq '
+    'ON core_ingredient (user_id, LOWER(name))',
+]
+
+
+def restore_sqlite_indexes(apps, schema_editor):
+    """Recreate the 0007 indexes lost when SQLite rebuilds the tables"""
+
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in SQLITE_LOWER_NAME_INDEXES:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_recipe_stats_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='usage',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='usage',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(restore_sqlite_indexes,
+                             migrations.RunPython.noop),
+        migrations.RunSQL(
+            ['UPDATE core_tag SET usage = (SELECT COUNT(*) '
+             'FROM core_recipe_tags WHERE tag_id = core_tag.id)',
+             'UPDATE core_ingredient SET usage = (SELECT COUNT(*) '
+             'FROM core_recipe_ingredients '
+             'WHERE ingredient_id = core_ingredient.id)'],
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['user', 'usage', 'id'], name='core_ingredient_user_usage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', 'usage', 'id'], name='core_tag_user_usage_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.1.15 on 2026-10-18 03:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_usage_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='shard',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+    ]
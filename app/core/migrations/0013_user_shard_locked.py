@@ -0,0 +1,18 @@
+# Generated by Django 2.1.15 on 2026-10-18 03:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_user_shard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='shard_locked',
+            field=models.BooleanField(default=False),
+        ),
+    ]
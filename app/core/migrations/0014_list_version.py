@@ -0,0 +1,28 @@
+# Generated by Django 2.1.15 on 2026-10-18 03:18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_user_shard_locked'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListVersion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(max_length=50)),
+                ('version', models.BigIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='listversion',
+            unique_together={('user', 'model_name')},
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+POSTGRES_FORWARD = [
+    'CREATE INDEX core_tag_user_lower_name_prefix_idx '
+    'ON core_tag (user_id, LOWER(name) text_pattern_ops)',
+    'CREATE INDEX core_ingredient_user_lower_name_prefix_idx '
+    'ON core_ingredient (user_id, LOWER(name) text_pattern_ops)',
+]
+
+POSTGRES_REVERSE = [
+    'DROP INDEX core_tag_user_lower_name_prefix_idx',
+    'DROP INDEX core_ingredient_user_lower_name_prefix_idx',
+]
+
+
+def run_on_postgres(statements):
+    """Return a RunPython function executing statements on PostgreSQL"""
+
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            for sql in statements:
+                schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+    """Pattern indexes for tag/ingredient autocomplete prefix matches
+
+    The 0007 indexes follow the database collation, which LIKE can only
+    use under the C collation.
+    """
+
+    dependencies = [
+        ('core', '0014_list_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_postgres(POSTGRES_FORWARD),
+                             run_on_postgres(POSTGRES_REVERSE)),
+    ]
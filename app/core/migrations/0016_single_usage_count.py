@@ -0,0 +1,51 @@
+# Generated by Django 2.1.15 on 2026-10-18 03:52
+
+from django.db import migrations, models
+
+SQLITE_LOWER_NAME_INDEXES = [
+    'CREATE UNIQUE INDEX IF NOT EXISTS core_tag_user_lower_name_uniq '
+    'ON core_tag (user_id, LOWER(name))',
+    'CREATE UNIQUE INDEX IF NOT EXISTS core_ingredient_user_lower_name_uniq '
+    'ON core_ingredient (user_id, LOWER(name))',
+]
+
+
+def restore_sqlite_indexes(apps, schema_editor):
+    """Recreate the 0007 indexes lost when SQLite rebuilds the tables"""
+
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in SQLITE_LOWER_NAME_INDEXES:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+    """Count the recipes of tags and ingredients only by their `usage`"""
+
+    dependencies = [
+        ('core', '0015_name_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            ["DELETE FROM core_recipestatscounter "
+             "WHERE kind IN ('tag', 'ingredient')"],
+            migrations.RunSQL.noop,
+        ),
+        migrations.AlterField(
+            model_name='ingredient',
+            name='usage',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='recipestatscounter',
+            name='kind',
+            field=models.CharField(choices=[('time', 'Time in minutes'), ('price', 'Price bucket')], max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='tag',
+            name='usage',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(restore_sqlite_indexes,
+                             migrations.RunPython.noop),
+    ]
@@ -1,6 +1,9 @@
 from django.contrib.auth.base_user import AbstractBaseUser, BaseUserManager
 from django.contrib.auth.models import PermissionsMixin
-from django.db import models
+from collections import defaultdict
+from django.db import models, transaction, IntegrityError
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Lower
 
 from app import settings
 
@@ -36,12 +39,109 @@ class User(AbstractBaseUser, PermissionsMixin):
     name = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    # Database alias holding the user's recipe data, see core.sharding
+    shard = models.CharField(max_length=100, blank=True, default='')
+    # Set while move_user_shard moves the data, writes are refused
+    shard_locked = models.BooleanField(default=False)
 
     objects = UserManager()
 
     USERNAME_FIELD = 'email'
 
 
+class RecipeAttrManager(models.Manager):
+    """Manager for user owned recipe attributes
+
+    Names are unique per user regardless of case, enforced by the
+    LOWER(name) unique indexes created in migration 0007.
+    """
+
+    # Keeps the IN (...) lists below SQLite's bound parameter limit
+    batch_size = 500
+
+    def bulk_get_or_create(self, user, names, retries=2):
+        """Return objects for `names` in input order, creating missing ones
+
+        Names are matched case-insensitively and the first spelling of a
+        new name is the one stored.
+        """
+
+        for attempt in range(retries):
+            try:
+                with transaction.atomic(using=self.db):
+                    return self._bulk_get_or_create(user, names)
+            except IntegrityError:
+                # A concurrent request inserted one of the names first
+                if attempt == retries - 1:
+                    raise
+
+    def _bulk_get_or_create(self, user, names):
+        spellings = {}
+        for name in names:
+            spellings.setdefault(name.lower(), name)
+
+        found = self._get_by_lower_names(user, spellings)
+        missing = [
+            self.model(user=user, name=name)
+            for key, name in spellings.items() if key not in found
+        ]
+        if missing:
+            self.bulk_create(missing, batch_size=self.batch_size)
+            found = self._get_by_lower_names(user, spellings)
+
+        return [found[name.lower()] for name in names]
+
+    def _get_by_lower_names(self, user, keys):
+        keys = list(keys)
+        found = {}
+        for start in range(0, len(keys), self.batch_size):
+            batch = self.annotate(name_lower=Lower('name')).filter(
+                user=user,
+                name_lower__in=keys[start:start + self.batch_size],
+            )
+            found.update((obj.name_lower, obj) for obj in batch)
+
+        return found
+
+    def add_usage(self, deltas):
+        """Add {id: delta} to the recipe usage counters
+
+        Runs one atomic F() update per distinct delta, so concurrent
+        changes to the same rows are never lost.
+        """
+
+        ids = defaultdict(list)
+        for pk, delta in deltas.items():
+            if delta:
+                ids[delta].append(pk)
+
+        for delta, pks in sorted(ids.items()):
+            for start in range(0, len(pks), self.batch_size):
+                self.filter(pk__in=pks[start:start + self.batch_size])\
+                    .update(usage=F('usage') + delta)
+
+    def repair_usage(self, **filters):
+        """Recount the usage of the matching objects, return how many
+        were wrong
+        """
+
+        through = self.model.recipe_set.through
+        field = self.model._meta.model_name
+        actual = Coalesce(Subquery(
+            through.objects.filter(**{f'{field}_id': OuterRef('pk')})
+                           .order_by()
+                           .values(f'{field}_id')
+                           .annotate(count=Count('id'))
+                           .values('count'),
+            output_field=models.IntegerField(),
+        ), 0)
+
+        return self.filter(**filters)\
+                   .annotate(actual=actual)\
+                   .filter(~Q(usage=F('actual')))\
+                   .update(usage=actual)
+
+
 class Tag(models.Model):
     """Tag to be used for a recipe"""
 
@@ -49,6 +149,19 @@ class Tag(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL,
                              on_delete=models.CASCADE,
                              related_name="tags")
+    # Number of recipes using the tag, only changed by F() updates of
+    # RecipeAttrManager.add_usage
+    usage = models.IntegerField(default=0, editable=False)
+
+    objects = RecipeAttrManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'name', 'id'],
+                         name='core_tag_user_name_idx'),
+            models.Index(fields=['user', 'usage', 'id'],
+                         name='core_tag_user_usage_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -62,6 +175,19 @@ class Ingredient(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    # Number of recipes using the ingredient, only changed by F() updates
+    # of RecipeAttrManager.add_usage
+    usage = models.IntegerField(default=0, editable=False)
+
+    objects = RecipeAttrManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'name', 'id'],
+                         name='core_ingredient_user_name_idx'),
+            models.Index(fields=['user', 'usage', 'id'],
+                         name='core_ingredient_user_usage_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -81,5 +207,68 @@ class Recipe(models.Model):
     ingredients = models.ManyToManyField('Ingredient')
     tags = models.ManyToManyField('Tag')
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id'],
+                         name='core_recipe_user_id_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The stored values, so a save can tell what it changed
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
     def __str__(self):
         return self.title
+
+
+class RecipeStatsCounter(models.Model):
+    """Number of a user's recipes sharing one value of an attribute
+
+    Summary rows behind the recipe stats endpoint, kept up to date as
+    recipes change. Tags and ingredients are counted by their `usage`.
+    """
+
+    TIME_MINUTES = 'time'
+    PRICE_BUCKET = 'price'
+    KIND_CHOICES = (
+        (TIME_MINUTES, 'Time in minutes'),
+        (PRICE_BUCKET, 'Price bucket'),
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    key = models.IntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'kind', 'key')
+
+    def __str__(self):
+        return f'{self.kind} {self.key}: {self.count}'
+
+
+class ListVersion(models.Model):
+    """Version of a user's list of one model, bumped on every write
+
+    Part of the ETags and cache keys of the list, so a write made by any
+    process shows at once everywhere.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+    model_name = models.CharField(max_length=50)
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'model_name')
+
+    def __str__(self):
+        return f'{self.model_name} {self.version}'
@@ -0,0 +1,56 @@
+import msgpack
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# DRF's encoder handles the types orjson leaves to `default`, so both
+# renderers format them exactly like the stock JSONRenderer
+encoder = JSONEncoder()
+
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Renderer which serializes to JSON with orjson
+
+    The output is byte for byte the compact output of JSONRenderer.
+    Indented output and data orjson can't encode, like integers above
+    64 bits, fall back to the stock renderer. Floats match only when
+    finite and printed without an exponent, so API floats are rounded
+    where they are computed.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return bytes()
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=encoder.default,
+                               option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+
+        # Escaped by JSONRenderer to keep the output a javascript subset
+        return ret.replace('\u2028'.encode(), b'\\u2028')\
+                  .replace('\u2029'.encode(), b'\\u2029')
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Renderer which serializes to MessagePack"""
+
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return bytes()
+
+        return msgpack.packb(data, default=encoder.default, use_bin_type=True)
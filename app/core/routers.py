@@ -0,0 +1,197 @@
+import random
+import threading
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import SAFE_METHODS
+
+from core import sharding
+
+_state = threading.local()
+
+
+STICKY_COOKIE = 'db_primary'
+STICKY_SALT = 'core.routers.sticky'
+
+
+def stick_to_primary(response, user_id):
+    """Make the client read from the primary for a while
+
+    The signed cookie comes back to whichever worker serves the next
+    request, unlike an entry in a per-process cache.
+    """
+
+    response.set_signed_cookie(
+        STICKY_COOKIE, str(user_id), salt=STICKY_SALT,
+        max_age=settings.REPLICA_STICKY_SECONDS, httponly=True,
+    )
+
+
+def is_sticky(request, user_id):
+    """Return whether the user wrote within the last
+    REPLICA_STICKY_SECONDS
+    """
+
+    value = request.get_signed_cookie(
+        STICKY_COOKIE, default=None, salt=STICKY_SALT,
+        max_age=settings.REPLICA_STICKY_SECONDS,
+    )
+    return value == str(user_id)
+
+
+def use_replicas(enabled):
+    """Allow or forbid replica reads for the current thread"""
+
+    _state.replica_reads = enabled
+
+
+class ReplicaRouter:
+    """Send reads to DATABASE_REPLICAS when the current request allows it
+
+    Writes, and reads outside requests routed by ReplicaRoutingMixin, use
+    the default database, so management commands and signal handlers
+    always see their own changes.
+    """
+
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICAS and \
+                getattr(_state, 'replica_reads', False):
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and \
+                instance._state.db in settings.DATABASE_REPLICAS:
+            # Objects read from a replica are saved on the primary
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaRoutingMixin:
+    """Serve the safe requests of a view from the replicas
+
+    A user sending a write reads from the primary for
+    REPLICA_STICKY_SECONDS afterwards, so replication lag never hides
+    their own changes nor gets stale rows into their cached lists.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        user_id = request.user.id
+        if request.method in SAFE_METHODS and \
+                (user_id is None or not is_sticky(request, user_id)):
+            use_replicas(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args,
+                                             **kwargs)
+        user_id = getattr(request.user, 'id', None)
+        if request.method not in SAFE_METHODS and user_id is not None:
+            stick_to_primary(response, user_id)
+        return response
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            use_replicas(False)
+
+
+class ShardRouter:
+    """Send user owned data to the shard of its user
+
+    The shard comes from the user or object the query is about when
+    Django passes one, else from the shard active in the thread, set by
+    ShardRoutingMixin for API requests and by sharding.for_user() blocks.
+    Reads from the default database are left to the next router.
+    """
+
+    def user_shard(self, instance):
+        if isinstance(instance, get_user_model()):
+            return instance.pk and sharding.shard_for_user(instance.pk)
+        if getattr(instance, 'user_id', None) is not None:
+            return sharding.shard_for_user(instance.user_id)
+        return None
+
+    def db_for_read(self, model, **hints):
+        if not sharding.is_sharded(model):
+            return None
+
+        instance = hints.get('instance')
+        shard = None
+        if instance is not None:
+            if not isinstance(instance, get_user_model()):
+                shard = instance._state.db
+            shard = shard or self.user_shard(instance)
+        shard = shard or sharding.current_shard()
+        return None if shard == DEFAULT_DB_ALIAS else shard
+
+    def db_for_write(self, model, **hints):
+        if not sharding.is_sharded(model):
+            return None
+
+        instance = hints.get('instance')
+        shard = None
+        if instance is not None:
+            # Not the instance's database, which may be a replica
+            shard = self.user_shard(instance) or instance._state.db
+        return shard or sharding.current_shard() or DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Users are referenced from every shard through their copies
+        User = get_user_model()
+        if isinstance(obj1, User) and sharding.is_sharded(type(obj2)) or \
+                isinstance(obj2, User) and sharding.is_sharded(type(obj1)):
+            return True
+        return None
+
+
+class ShardMoving(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Your data is being moved, try again shortly.'
+    default_code = 'shard_moving'
+
+
+class ShardRoutingMixin:
+    """Route the user owned data queries of a view to the user's shard
+
+    Unsafe requests keep the user row locked until they are done, which
+    move_user_shard waits for before it starts copying, and are refused
+    while a move is in progress.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        user_id = request.user.id
+        if user_id is None:
+            return
+        if len(settings.SHARDS) == 1:
+            sharding.activate(settings.SHARDS[0], user_id)
+            return
+
+        writing = request.method not in SAFE_METHODS
+        shard, locked = sharding.user_shard_state(user_id, lock=writing)
+        if writing and locked:
+            raise ShardMoving()
+        sharding.activate(shard, user_id)
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            if request.method in SAFE_METHODS or len(settings.SHARDS) == 1:
+                return super().dispatch(request, *args, **kwargs)
+            # Holds the lock taken by initial() until the write is done
+            with transaction.atomic(using=DEFAULT_DB_ALIAS):
+                return super().dispatch(request, *args, **kwargs)
+        finally:
+            sharding.activate(None)
@@ -0,0 +1,167 @@
+"""Placement of each user's recipe data on one of settings.SHARDS
+
+Users live on the default database, with a copy of their row on their
+shard for the foreign keys. Every other core model belongs to a user and
+is stored on that user's shard. API views route their queries with
+core.routers.ShardRoutingMixin, other code working on a user's data runs
+in a for_user() block.
+"""
+import threading
+from contextlib import contextmanager
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_state = threading.local()
+
+
+def is_sharded(model):
+    """Return whether a model holds user owned data"""
+
+    opts = model._meta
+    if opts.auto_created:
+        # Through tables go with the model declaring the relation
+        opts = opts.auto_created._meta
+    return opts.app_label == 'core' and opts.model_name != 'user'
+
+
+def sharded_models():
+    return [model for model in apps.get_models(include_auto_created=True)
+            if is_sharded(model)]
+
+
+def place_user(user_id):
+    """Return the shard a new user is created on"""
+
+    return settings.SHARDS[user_id % len(settings.SHARDS)]
+
+
+def user_shard_state(user_id, lock=False):
+    """Return (shard, locked) of a user, read from the user row
+
+    Read from the database every time so a move is seen by every process
+    at once. With `lock`, the row stays locked until the current
+    transaction on the default database ends.
+    """
+
+    users = get_user_model().objects.using(DEFAULT_DB_ALIAS)\
+                                    .filter(pk=user_id)
+    if lock:
+        users = users.select_for_update()
+    shard, locked = users.values_list('shard', 'shard_locked')\
+                         .first() or ('', False)
+    # Users created before sharding have no shard and stay on default
+    return shard or DEFAULT_DB_ALIAS, locked
+
+
+def shard_for_user(user_id):
+    """Return the database alias holding a user's recipe data"""
+
+    if len(settings.SHARDS) == 1:
+        return settings.SHARDS[0]
+    if user_id == getattr(_state, 'user_id', None):
+        return current_shard()
+    return user_shard_state(user_id)[0]
+
+
+def set_user_shard(user_id, shard, locked=False):
+    """Point a user at the shard holding their data"""
+
+    get_user_model().objects.using(DEFAULT_DB_ALIAS)\
+        .filter(pk=user_id)\
+        .update(shard=shard, shard_locked=locked)
+
+
+def copy_user(user_id, shard):
+    """Store a copy of a user's row on a shard, or bring it up to date"""
+
+    if shard != DEFAULT_DB_ALIAS:
+        get_user_model().objects.using(DEFAULT_DB_ALIAS)\
+                        .get(pk=user_id)\
+                        .save(using=shard)
+
+
+def current_shard():
+    return getattr(_state, 'shard', None)
+
+
+def activate(shard, user_id=None):
+    """Route the user owned data queries of the current thread to a shard,
+    or stop routing them with None
+
+    `user_id` names the user whose shard it is, so their shard isn't
+    looked up again while it is active.
+    """
+
+    _state.shard = shard
+    _state.user_id = user_id
+
+
+@contextmanager
+def using_shard(shard, user_id=None):
+    """Route the user owned data queries of the block to a shard"""
+
+    previous = current_shard(), getattr(_state, 'user_id', None)
+    activate(shard, user_id)
+    try:
+        yield
+    finally:
+        activate(*previous)
+
+
+def for_user(user_id):
+    """Route the user owned data queries of the block to a user's shard"""
+
+    return using_shard(shard_for_user(user_id), user_id)
+
+
+def id_range(shard):
+    """Return the (first, last) ids new rows on a shard are given
+
+    Moved rows keep their ids, so the ranges keep them unique across
+    shards. SQLite always continues after the highest id of a table, so
+    there a move to a lower shard also moves that shard's next ids.
+    """
+
+    first = settings.SHARDS.index(shard) * settings.SHARD_ID_RANGE + 1
+    return first, first + settings.SHARD_ID_RANGE - 1
+
+
+def align_sequences(shard):
+    """Make the next id of every sharded table follow the shard's range"""
+
+    if shard not in settings.SHARDS or len(settings.SHARDS) == 1:
+        return
+
+    connection = connections[shard]
+    first, last = id_range(shard)
+    with connection.cursor() as cursor:
+        for model in sharded_models():
+            table = model._meta.db_table
+            cursor.execute(
+                f'SELECT MAX(id) FROM {table} WHERE id BETWEEN %s AND %s',
+                [first, last],
+            )
+            used = cursor.fetchone()[0]
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    "SELECT setval(pg_get_serial_sequence(%s, 'id'), %s, %s)",
+                    [table, used or first, used is not None],
+                )
+            elif connection.vendor == 'sqlite':
+                seq = used or first - 1
+                cursor.execute(
+                    'UPDATE sqlite_sequence SET seq = %s WHERE name = %s',
+                    [seq, table],
+                )
+                if not cursor.rowcount:
+                    cursor.execute(
+                        'INSERT INTO sqlite_sequence (name, seq) '
+                        'VALUES (%s, %s)',
+                        [table, seq],
+                    )
+
+
+def align_sequences_after_migrate(sender, using, **kwargs):
+    align_sequences(using)
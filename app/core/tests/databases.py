@@ -0,0 +1,49 @@
+import os
+import tempfile
+from django.core.management import call_command
+from django.db import connections
+
+
+def add_sqlite_database(alias):
+    """Register a migrated SQLite database in a temporary file"""
+
+    handle, path = tempfile.mkstemp(suffix='.sqlite3')
+    os.close(handle)
+    connections.databases[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+    }
+    connections.ensure_defaults(alias)
+    connections.prepare_test_settings(alias)
+    call_command('migrate', database=alias, verbosity=0)
+
+
+def remove_database(alias):
+    """Close and delete a database added by add_sqlite_database"""
+
+    connections[alias].close()
+    path = connections.databases.pop(alias)['NAME']
+    del connections[alias]
+    os.remove(path)
+
+
+class SQLiteShardsMixin:
+    """Add temporary SQLite databases for the aliases in `shards`
+
+    Use with override_settings(SHARDS=...) listing them.
+    """
+
+    shards = ('shard1', 'shard2')
+    multi_db = True
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for alias in cls.shards:
+            add_sqlite_database(alias)
+
+    @classmethod
+    def tearDownClass(cls):
+        for alias in cls.shards:
+            remove_database(alias)
+        super().tearDownClass()
@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from core.management.commands.benchmark_middleware import profile_overrides
+from recipe.cache import list_cache
+
+
+@override_settings(**profile_overrides('app.api_settings'))
+class ApiProfileTests(TestCase):
+    """Test requests through the API-only middleware and URLconf"""
+
+    def setUp(self) -> None:
+        list_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'testpass'
+        )
+        self.token = Token.objects.create(user=self.user)
+
+    def test_token_requests_succeed(self):
+        """Test token authenticated routes work without sessions"""
+
+        for url in (reverse('users:detail'), reverse('recipe:tag-list')):
+            response = self.client.get(
+                url, HTTP_AUTHORIZATION=f'Token {self.token.key}'
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('Set-Cookie', response)
+            self.assertEqual(response['Content-Type'], 'application/json')
+
+    def test_token_login_and_signup_succeed(self):
+        """Test the unauthenticated user routes need no CSRF token"""
+
+        response = self.client.post(reverse('users:create'), {
+            'email': 'new@test.com',
+            'password': 'newpass',
+            'name': 'New',
+        })
+        self.assertEqual(response.status_code, 201)
+
+        response = self.client.post(reverse('users:token'), {
+            'email': 'new@test.com',
+            'password': 'newpass',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('token', response.data)
+
+    def test_session_auth_disabled(self):
+        """Test a logged in session does not authenticate API requests"""
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('users:detail'))
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_admin_not_routed(self):
+        """Test the admin is not served by API workers"""
+
+        response = self.client.get('/admin/')
+
+        self.assertEqual(response.status_code, 404)
@@ -1,29 +1,97 @@
+from io import StringIO
 from unittest.mock import patch
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
 from django.db.utils import OperationalError
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Tag, Recipe
+
+WAIT_FOR_DB = 'core.management.commands.wait_for_db.Command'
 
 
 class CommandTests(TestCase):
     def test_wait_for_db_ready(self):
         """Test waiting for db when db is available"""
 
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.return_value = True
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 1)
+        with patch(f'{WAIT_FOR_DB}.probe') as probe:
+            call_command('wait_for_db', stdout=StringIO())
+            self.assertEqual(probe.call_count, 1)
+
+    def test_wait_for_db_queries_database(self):
+        """Test the probe runs a query on a real connection"""
+
+        with CaptureQueriesContext(connection) as queries:
+            call_command('wait_for_db', stdout=StringIO())
+
+        self.assertEqual(queries[0]['sql'], 'SELECT 1')
 
     @patch('time.sleep', return_value=True)
     def test_wait_for_db_not_ready(self, time_sleep):
         """Test waiting for db when db is not available"""
 
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            # Adding True to exit the loop
-            gi.side_effect = [OperationalError,
-                              OperationalError,
-                              OperationalError,
-                              OperationalError,
-                              OperationalError,
-                              True]
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 6)
+        with patch(f'{WAIT_FOR_DB}.probe') as probe:
+            # Adding None to exit the loop
+            probe.side_effect = [OperationalError,
+                                 OperationalError,
+                                 OperationalError,
+                                 OperationalError,
+                                 OperationalError,
+                                 None]
+            call_command('wait_for_db', initial_delay=1, max_delay=4,
+                         stdout=StringIO())
+            self.assertEqual(probe.call_count, 6)
+
+        pauses = [call[0][0] for call in time_sleep.call_args_list]
+        for pause, delay in zip(pauses, (1, 2, 4, 4, 4)):
+            self.assertGreaterEqual(pause, delay / 2)
+            self.assertLessEqual(pause, delay)
+
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_db_timeout(self, time_sleep):
+        """Test waiting fails once the deadline has passed"""
+
+        with patch(f'{WAIT_FOR_DB}.probe') as probe, \
+                patch('time.monotonic') as monotonic:
+            probe.side_effect = OperationalError
+            monotonic.side_effect = [0, 1, 3, 6]
+            with self.assertRaises(CommandError):
+                call_command('wait_for_db', timeout=5, stdout=StringIO())
+
+        self.assertEqual(probe.call_count, 3)
+        self.assertLessEqual(sum(call[0][0] for call in
+                                 time_sleep.call_args_list), 5)
+
+    def test_benchmark_indexes(self):
+        """Test the index benchmark reports each query and rolls back"""
+
+        out = StringIO()
+        call_command('benchmark_indexes', users=2, rows=10, repeat=1,
+                     stdout=out)
+
+        output = out.getvalue()
+        for name in ('tags', 'ingredients', 'recipes', 'recipes by tag'):
+            self.assertIn(f'[INFO] {name}:', output)
+        self.assertFalse(Tag.objects.exists())
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_benchmark_db_pool_postgres_only(self):
+        """Test the pool benchmark refuses other databases"""
+
+        with self.assertRaisesMessage(CommandError, 'needs PostgreSQL'):
+            call_command('benchmark_db_pool', requests=4, stdout=StringIO())
+
+    def test_benchmark_middleware(self):
+        """Test the middleware benchmark times both profiles"""
+
+        out = StringIO()
+        call_command('benchmark_middleware', requests=4, stdout=out)
+
+        output = out.getvalue()
+        for module in ('app.settings', 'app.api_settings'):
+            self.assertIn(f'[INFO] {module}:', output)
+        self.assertNotIn('[ERROR]', output)
+        self.assertFalse(get_user_model().objects.exists())
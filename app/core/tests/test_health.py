@@ -0,0 +1,122 @@
+import json
+from unittest.mock import patch
+from django.db import connection
+from django.db.utils import OperationalError
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from core import health
+
+
+def inner_app(environ, start_response):
+    start_response('200 OK', [])
+    return [b'django']
+
+
+class HealthCheckTests(TransactionTestCase):
+    """Test the WSGI level health check endpoints"""
+
+    def setUp(self) -> None:
+        health._ready.update(checked_at=None, migrated=False)
+        self.application = health.HealthCheckMiddleware(inner_app)
+
+    def get(self, path, **headers):
+        """Return (status, body) of a GET through the middleware"""
+
+        statuses = []
+        body = b''.join(self.application(
+            {'PATH_INFO': path, 'REQUEST_METHOD': 'GET', **headers},
+            lambda status, headers: statuses.append(status),
+        ))
+        return statuses[0], body
+
+    def test_healthz_no_database(self):
+        """Test liveness is answered without any query"""
+
+        with self.assertNumQueries(0):
+            status, body = self.get('/healthz')
+
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(json.loads(body), {'status': 'ok'})
+
+    def test_readyz_cached(self):
+        """Test readiness queries the database once per TTL"""
+
+        with CaptureQueriesContext(connection) as queries:
+            status, body = self.get('/readyz')
+            checked = len(queries)
+            self.get('/readyz')
+
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(json.loads(body), {
+            'status': 'ok', 'database': 'ok', 'migrations': 'ok',
+        })
+        self.assertEqual(queries[0]['sql'], 'SELECT 1')
+        self.assertEqual(len(queries), checked)
+        self.assertGreater(checked, 1)
+
+        # Migrations found applied aren't checked again
+        with override_settings(HEALTH_CHECK_READY_TTL=0):
+            with self.assertNumQueries(1):
+                status, body = self.get('/readyz')
+        self.assertEqual(status, '200 OK')
+
+    def test_readyz_database_down(self):
+        """Test readiness fails when the database can't be queried"""
+
+        with patch('django.db.backends.utils.CursorWrapper.execute') as ex:
+            ex.side_effect = OperationalError('connection refused')
+            status, body = self.get('/readyz')
+
+        self.assertEqual(status, '503 Service Unavailable')
+        self.assertEqual(json.loads(body)['database'], 'connection refused')
+
+    def test_readyz_pending_migrations(self):
+        """Test readiness fails while migrations are pending"""
+
+        with patch('django.db.migrations.executor.MigrationExecutor.'
+                   'migration_plan') as plan:
+            plan.return_value = [('core', False)]
+            status, body = self.get('/readyz')
+
+        self.assertEqual(status, '503 Service Unavailable')
+        self.assertEqual(json.loads(body)['migrations'], '1 unapplied')
+
+        # Pending migrations are checked again until they are applied
+        with override_settings(HEALTH_CHECK_READY_TTL=0):
+            status, body = self.get('/readyz')
+        self.assertEqual(status, '200 OK')
+
+    @override_settings(HEALTH_CHECK_METRICS_TOKEN='secret')
+    def test_metrics(self):
+        """Test the connection pool metrics are reported"""
+
+        with patch('core.health.pool_stats') as pool_stats:
+            pool_stats.return_value = {'default:app': {'hits': 3}}
+            status, body = self.get('/metrics',
+                                    HTTP_AUTHORIZATION='Bearer secret')
+
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(json.loads(body),
+                         {'db_pools': {'default:app': {'hits': 3}}})
+
+    @override_settings(HEALTH_CHECK_METRICS_TOKEN='secret')
+    def test_metrics_require_token(self):
+        """Test the metrics are refused without the right token"""
+
+        self.assertEqual(self.get('/metrics')[0], '401 Unauthorized')
+        self.assertEqual(
+            self.get('/metrics', HTTP_AUTHORIZATION='Bearer guess')[0],
+            '401 Unauthorized',
+        )
+
+    @override_settings(HEALTH_CHECK_METRICS_TOKEN=None)
+    def test_metrics_disabled(self):
+        """Test /metrics is left to Django without a token configured"""
+
+        self.assertEqual(self.get('/metrics'), ('200 OK', b'django'))
+
+    def test_other_paths_reach_django(self):
+        """Test every other path is passed to the wrapped application"""
+
+        self.assertEqual(self.get('/api/recipe/tags/'), ('200 OK', b'django'))
@@ -1,3 +1,4 @@
+from django.db import IntegrityError
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from core import models
@@ -55,6 +56,31 @@ class ModelTests(TestCase):
 
         self.assertEqual(str(tag), tag.name)
 
+    def test_tag_name_unique_per_user(self):
+        """Test tag names are unique per user regardless of case"""
+
+        user = sample_user()
+        models.Tag.objects.create(user=user, name='Vegan')
+        models.Tag.objects.create(user=sample_user('other@test.com'),
+                                  name='vegan')
+
+        with self.assertRaises(IntegrityError):
+            models.Tag.objects.create(user=user, name='VEGAN')
+
+    def test_bulk_get_or_create(self):
+        """Test getting or creating attributes by name in input order"""
+
+        user = sample_user()
+        salt = models.Ingredient.objects.create(user=user, name='Salt')
+
+        ingredients = models.Ingredient.objects.bulk_get_or_create(
+            user, ['Pepper', 'salt', 'pepper']
+        )
+
+        self.assertEqual(ingredients[1], salt)
+        self.assertEqual(ingredients[0], ingredients[2])
+        self.assertEqual(ingredients[0].name, 'Pepper')
+
     def test_ingredient_str(self):
         """Test the ingredient string representation"""
 
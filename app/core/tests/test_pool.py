@@ -0,0 +1,195 @@
+import threading
+from django.db import DatabaseError
+from django.test import SimpleTestCase
+
+from core.backends import pool
+
+
+class FakeConnection:
+    """DB-API connection stand-in recording its lifecycle"""
+
+    def __init__(self):
+        self.closed = False
+        self.resets = 0
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test the connection pool"""
+
+    def make_pool(self, **kwargs):
+        opened = []
+
+        def connect():
+            opened.append(FakeConnection())
+            return opened[-1]
+
+        def reset(connection):
+            connection.resets += 1
+
+        kwargs.setdefault('timeout', 0.05)
+        return pool.ConnectionPool(connect, reset=reset, **kwargs), opened
+
+    def test_reuse_counts_hits_and_misses(self):
+        """Test returned connections are reset and checked out again"""
+
+        connections, opened = self.make_pool()
+
+        first = connections.get()
+        connections.put(first)
+        second = connections.get()
+
+        self.assertIs(first, second)
+        self.assertEqual(first.resets, 1)
+        self.assertEqual(len(opened), 1)
+        stats = connections.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual((stats['size'], stats['in_use']), (1, 1))
+
+    def test_fill_min_size(self):
+        """Test fill opens min_size idle connections"""
+
+        connections, opened = self.make_pool(min_size=3)
+        connections.fill()
+        connections.fill()
+
+        self.assertEqual(len(opened), 3)
+        self.assertEqual(connections.stats()['idle'], 3)
+
+    def test_max_size_timeout(self):
+        """Test checkouts beyond max_size wait then raise PoolTimeout"""
+
+        connections, opened = self.make_pool(max_size=1)
+        connections.get()
+
+        with self.assertRaises(pool.PoolTimeout):
+            connections.get()
+
+        stats = connections.stats()
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertGreaterEqual(stats['waits'], 1)
+        self.assertEqual(len(opened), 1)
+
+    def test_waiter_gets_returned_connection(self):
+        """Test a waiting checkout is handed the next returned connection"""
+
+        connections, opened = self.make_pool(max_size=1, timeout=5)
+        first = connections.get()
+        received = []
+        waiter = threading.Thread(
+            target=lambda: received.append(connections.get())
+        )
+        waiter.start()
+        connections.put(first)
+        waiter.join()
+
+        self.assertEqual(received, [first])
+        self.assertEqual(len(opened), 1)
+
+    def test_failed_check_replaces_connection(self):
+        """Test connections failing the checkout check are discarded"""
+
+        def check(connection, idle):
+            return not connection.closed
+
+        connections, opened = self.make_pool(check=check)
+        first = connections.get()
+        connections.put(first)
+        first.closed = True
+
+        second = connections.get()
+
+        self.assertIsNot(first, second)
+        self.assertEqual(connections.stats()['discarded'], 1)
+        self.assertEqual(connections.stats()['size'], 1)
+
+    def test_check_runs_unlocked(self):
+        """Test other threads can use the pool while a checkout is checked"""
+
+        stats = []
+
+        def check(connection, idle):
+            thread = threading.Thread(
+                target=lambda: stats.append(connections.stats())
+            )
+            thread.start()
+            thread.join(1)
+            return True
+
+        connections, opened = self.make_pool(check=check)
+        connections.put(connections.get())
+        connections.get()
+
+        self.assertEqual(len(stats), 1)
+
+    def test_timeout_is_database_error(self):
+        """Test a checkout timeout is handled like other database errors"""
+
+        connections, opened = self.make_pool(max_size=1)
+        connections.get()
+
+        with self.assertRaises(DatabaseError):
+            connections.get()
+
+    def test_failed_reset_discards_connection(self):
+        """Test connections that can't be reset are closed, not pooled"""
+
+        def reset(connection):
+            raise RuntimeError('server closed the connection')
+
+        connections = pool.ConnectionPool(FakeConnection, reset=reset)
+        first = connections.get()
+        connections.put(first)
+
+        self.assertTrue(first.closed)
+        self.assertEqual(connections.stats()['size'], 0)
+
+    def test_max_lifetime(self):
+        """Test connections older than max_lifetime are not reused"""
+
+        connections, opened = self.make_pool(max_lifetime=0)
+        first = connections.get()
+        connections.put(first)
+
+        self.assertTrue(first.closed)
+        self.assertIsNot(connections.get(), first)
+
+    def test_failed_connect_frees_slot(self):
+        """Test a failing connect doesn't leak pool capacity"""
+
+        def connect():
+            raise OSError('connection refused')
+
+        connections = pool.ConnectionPool(connect, max_size=1)
+        for i in range(2):
+            with self.assertRaises(OSError):
+                connections.get()
+
+        self.assertEqual(connections.stats()['size'], 0)
+
+    def test_close(self):
+        """Test closing a pool closes idle and later returned connections"""
+
+        connections, opened = self.make_pool()
+        idle, in_use = connections.get(), connections.get()
+        connections.put(idle)
+
+        connections.close()
+        connections.put(in_use)
+
+        self.assertTrue(idle.closed and in_use.closed)
+        self.assertEqual(connections.stats()['size'], 0)
+
+    def test_registry(self):
+        """Test pools are shared per key and reported by name"""
+
+        first = pool.get_pool('test', connect=FakeConnection, name='a')
+        second = pool.get_pool('test', connect=FakeConnection, name='b')
+        self.addCleanup(pool.close_pools)
+
+        self.assertIs(first, second)
+        self.assertIn('a', pool.pool_stats())
+        pool.close_pools()
+        self.assertEqual(pool.pool_stats(), {})
@@ -0,0 +1,129 @@
+import datetime
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+from io import BytesIO
+
+import msgpack
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import Tag
+from core.parsers import FastJSONParser, MessagePackParser
+from core.renderers import FastJSONRenderer, MessagePackRenderer
+from recipe.cache import list_cache
+
+TAGS_URL = reverse('recipe:tag-list')
+
+SAMPLE = OrderedDict([
+    ('id', 1),
+    ('title', 'Crème brûlée \u2028 \u2029 "quoted" </script>'),
+    ('price', Decimal('5.10')),
+    ('tags', [1, 2, 3]),
+    ('ratio', 0.1),
+    ('created', datetime.datetime(2020, 1, 2, 3, 4, 5, 678901,
+                                  tzinfo=timezone.utc)),
+    ('day', datetime.date(2020, 1, 2)),
+    ('at', datetime.time(3, 4, 5)),
+    ('uuid', uuid.UUID(int=1)),
+    ('label', gettext_lazy('label')),
+    ('nested', {1: None, 'empty': [], 'flag': True}),
+])
+
+
+class RendererTests(TestCase):
+    """Test the orjson and MessagePack renderers and parsers"""
+
+    def test_fast_json_matches_stock_renderer(self):
+        """Test the fast renderer output is byte compatible"""
+
+        self.assertEqual(FastJSONRenderer().render(SAMPLE),
+                         JSONRenderer().render(SAMPLE))
+
+    def test_fast_json_floats(self):
+        """Test floats as returned by the API render like the stock
+        renderer
+        """
+
+        data = {'floats': [0.1, 1 / 3, 2.5, 30.0, 0.01, 123456.79, -7.25]}
+
+        self.assertEqual(FastJSONRenderer().render(data),
+                         JSONRenderer().render(data))
+
+    def test_fast_json_fallbacks(self):
+        """Test indented and unsupported data use the stock renderer"""
+
+        indented = 'application/json; indent=4'
+        self.assertEqual(
+            FastJSONRenderer().render(SAMPLE, indented),
+            JSONRenderer().render(SAMPLE, indented),
+        )
+        self.assertEqual(FastJSONRenderer().render({'big': 2 ** 70}),
+                         b'{"big":1180591620717411303424}')
+
+    def test_fast_json_parser(self):
+        """Test the fast parser reads what the stock parser reads"""
+
+        body = JSONRenderer().render(SAMPLE)
+
+        self.assertEqual(FastJSONParser().parse(BytesIO(body)),
+                         JSONParser().parse(BytesIO(body)))
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(BytesIO(b'{"a": NaN}'))
+
+    def test_msgpack_round_trip(self):
+        """Test MessagePack output parses back to the JSON data"""
+
+        # MessagePack keeps integer keys, JSON turns them into strings
+        data = OrderedDict(SAMPLE, nested={'empty': [], 'flag': True})
+        body = MessagePackRenderer().render(data)
+        json_data = JSONParser().parse(BytesIO(JSONRenderer().render(data)))
+
+        self.assertEqual(MessagePackParser().parse(BytesIO(body)), json_data)
+        with self.assertRaises(ParseError):
+            MessagePackParser().parse(BytesIO(b'\xc1'))
+
+
+class ContentNegotiationTests(TestCase):
+    """Test the API serves and accepts MessagePack"""
+
+    def setUp(self) -> None:
+        list_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'testpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_as_msgpack(self):
+        """Test a list response is rendered as MessagePack on request"""
+
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        json_response = self.client.get(TAGS_URL)
+        response = self.client.get(TAGS_URL,
+                                   HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content, raw=False),
+                         json_response.json())
+        self.assertNotEqual(response['ETag'], json_response['ETag'])
+
+    def test_create_from_msgpack(self):
+        """Test a MessagePack request body is parsed"""
+
+        response = self.client.post(
+            TAGS_URL, msgpack.packb({'name': 'Vegan'}),
+            content_type='application/msgpack'
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Tag.objects.filter(name='Vegan').exists())
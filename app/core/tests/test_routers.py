@@ -0,0 +1,107 @@
+from django.contrib.auth import get_user_model
+from django.db import router
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import routers
+from core.models import Tag
+from core.tests.databases import add_sqlite_database, remove_database
+from recipe.cache import list_cache
+
+TAGS_URL = reverse('recipe:tag-list')
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(TestCase):
+    """Test reads are served by the replica and writes by the primary
+
+    The replica is a separate SQLite database that isn't replicated to,
+    so rows only written to the primary show which database was read.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        add_sqlite_database('replica')
+
+    @classmethod
+    def tearDownClass(cls):
+        remove_database('replica')
+        super().tearDownClass()
+
+    def setUp(self):
+        list_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            'test@londonappdev.com', 'testpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_reads_replica(self):
+        """Test safe requests read from the replica"""
+
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['results'], [])
+        self.assertEqual(Tag.objects.count(), 1)
+
+    def test_write_sticks_to_primary(self):
+        """Test a user reads their own writes from the primary"""
+
+        res = self.client.post(TAGS_URL, {'name': 'Vegan'})
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(Tag.objects.using('replica').count(), 0)
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual([tag['name'] for tag in res.data['results']],
+                         ['Vegan'])
+
+    def test_sticky_window_expires(self):
+        """Test reads go back to the replica after the sticky window"""
+
+        with override_settings(REPLICA_STICKY_SECONDS=0):
+            self.client.post(TAGS_URL, {'name': 'Vegan'})
+            res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.data['results'], [])
+
+    def test_sticky_cookie_checked(self):
+        """Test a write cookie of another user or forged doesn't stick"""
+
+        res = self.client.post(TAGS_URL, {'name': 'Vegan'})
+        self.assertIn(routers.STICKY_COOKIE, res.cookies)
+
+        other = get_user_model().objects.create_user('other@test.com',
+                                                     'testpass')
+        self.client.force_authenticate(other)
+        Tag.objects.create(user=other, name='Quick')
+        self.assertEqual(self.client.get(TAGS_URL).data['results'], [])
+
+        self.client.cookies[routers.STICKY_COOKIE] = str(other.id)
+        self.assertEqual(self.client.get(TAGS_URL).data['results'], [])
+
+    def test_reads_outside_requests_use_primary(self):
+        """Test reads outside routed requests, and writes, use the primary"""
+
+        self.client.get(TAGS_URL)
+        tag = Tag(user=self.user, name='Vegan')
+        tag._state.db = 'replica'
+
+        self.assertEqual(router.db_for_read(Tag), 'default')
+        self.assertEqual(router.db_for_write(Tag, instance=tag), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        """Test everything uses the primary without replicas"""
+
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(len(res.data['results']), 1)
@@ -0,0 +1,151 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TransactionTestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import sharding
+from core.models import Tag, Recipe
+from core.tests.databases import SQLiteShardsMixin
+from recipe.cache import list_cache
+
+User = get_user_model()
+
+TAGS_URL = reverse('recipe:tag-list')
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def create_user(email, shard):
+    """Create a user and move them to `shard` before they have data"""
+
+    user = User.objects.create_user(email, 'testpass')
+    sharding.set_user_shard(user.id, shard)
+    sharding.copy_user(user.id, shard)
+    user.shard = shard
+    return user
+
+
+@override_settings(SHARDS=['default', 'shard1', 'shard2'])
+class ShardingTests(SQLiteShardsMixin, TransactionTestCase):
+    """Test user owned data is stored on the user's shard"""
+
+    def setUp(self):
+        caches['default'].clear()
+        list_cache().clear()
+        self.user = create_user('test@londonappdev.com', 'shard1')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_new_users_placed_by_id(self):
+        """Test new users are spread over the shards and copied there"""
+
+        users = [User.objects.create_user(f'user{i}@londonappdev.com')
+                 for i in range(3)]
+
+        shards = {sharding.shard_for_user(user.id) for user in users}
+        self.assertEqual(shards, {'default', 'shard1', 'shard2'})
+        for user in users:
+            shard = sharding.place_user(user.id)
+            self.assertEqual(User.objects.get(pk=user.id).shard,
+                             '' if shard == 'default' else shard)
+            self.assertTrue(
+                User.objects.using(shard).filter(pk=user.id).exists()
+            )
+
+    def test_user_copy_updated(self):
+        """Test changes of a user reach their copy on the shard"""
+
+        self.user.name = 'New name'
+        self.user.save()
+
+        self.assertEqual(User.objects.using('shard1').get().name, 'New name')
+
+    def test_api_uses_user_shard(self):
+        """Test API writes and reads go to the user's shard"""
+
+        tag = self.client.post(TAGS_URL, {'name': 'Vegan'}).data
+        res = self.client.post(RECIPES_URL, {
+            'title': 'Curry', 'time_minutes': 30, 'price': '8.00',
+            'tags': [tag['id']],
+        })
+        self.assertEqual(res.status_code, 201)
+
+        self.assertEqual(Tag.objects.using('shard1').count(), 1)
+        self.assertFalse(Tag.objects.using('default').exists())
+        self.assertEqual(self.client.get(TAGS_URL).data['results'], [tag])
+        recipes = self.client.get(RECIPES_URL).data['results']
+        self.assertEqual(recipes[0]['tags'], [tag['id']])
+        res = self.client.get(RECIPES_URL, {'search': 'curry'})
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_writes_refused_while_moving(self):
+        """Test writes are refused and reads served during a move"""
+
+        sharding.set_user_shard(self.user.id, 'shard1', locked=True)
+
+        res = self.client.post(TAGS_URL, {'name': 'Vegan'})
+
+        self.assertEqual(res.status_code, 503)
+        self.assertFalse(Tag.objects.using('shard1').exists())
+        self.assertEqual(self.client.get(TAGS_URL).status_code, 200)
+
+    def test_shard_read_from_user_row(self):
+        """Test a shard change is seen without any cache to expire"""
+
+        self.client.get(TAGS_URL)
+        sharding.copy_user(self.user.id, 'shard2')
+        User.objects.filter(pk=self.user.id).update(shard='shard2')
+
+        self.client.post(TAGS_URL, {'name': 'Vegan'})
+
+        self.assertEqual(Tag.objects.using('shard2').count(), 1)
+
+    def test_orm_routes_by_user(self):
+        """Test saved objects and related managers follow the user, and
+        querysets the for_user() block
+        """
+
+        tag = Tag(user=self.user, name='Vegan')
+        tag.save()
+        with sharding.for_user(self.user.id):
+            recipe = Recipe.objects.create(user=self.user, title='Curry',
+                                           time_minutes=30, price='8.00')
+            recipe.tags.add(tag)
+            self.assertEqual(Recipe.objects.filter(tags=tag).count(), 1)
+
+        self.assertEqual(tag._state.db, 'shard1')
+        self.assertEqual(recipe._state.db, 'shard1')
+        self.assertEqual(list(self.user.recipe_set.all()), [recipe])
+        self.assertEqual(list(recipe.tags.all()), [tag])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_ids_from_shard_range(self):
+        """Test new rows take ids from their shard's range"""
+
+        first, last = sharding.id_range('shard1')
+
+        with sharding.for_user(self.user.id):
+            tag = Tag.objects.create(user=self.user, name='Vegan')
+
+        self.assertTrue(first <= tag.id <= last)
+
+    def test_delete_user_deletes_shard_data(self):
+        """Test deleting a user deletes their data on their shard"""
+
+        Tag(user=self.user, name='Vegan').save()
+
+        self.user.delete()
+
+        self.assertFalse(Tag.objects.using('shard1').exists())
+        self.assertFalse(User.objects.using('shard1').exists())
+
+    @override_settings(SHARDS=['default'])
+    def test_single_shard(self):
+        """Test everything stays on default with a single shard"""
+
+        user = User.objects.create_user('other@londonappdev.com')
+
+        self.assertEqual(sharding.shard_for_user(user.id), 'default')
+        self.assertEqual(Tag.objects.create(user=user, name='Vegan')
+                                    ._state.db, 'default')
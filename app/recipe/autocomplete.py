@@ -0,0 +1,62 @@
+import difflib
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connections
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Lower
+
+# Shorter fragments match too many names to be worth a fuzzy lookup
+FUZZY_MIN_LENGTH = 3
+
+
+def prefix_matches(queryset, text, limit):
+    """Return names starting with `text`, case-insensitively
+
+    On PostgreSQL the LIKE prefix is served by the text_pattern_ops
+    indexes from migration 0015, whatever the database collation.
+    """
+
+    return list(
+        queryset.annotate(name_lower=Lower('name'))
+                .filter(name_lower__startswith=text.lower())
+                .order_by('name_lower')[:limit]
+    )
+
+
+def fuzzy_matches(queryset, text, limit):
+    """Return names similar to `text`, most similar first"""
+
+    text = text.lower()
+    if connections[queryset.db].vendor == 'postgresql':
+        table = queryset.model._meta.db_table
+        return list(queryset.annotate(
+            # `%` is pg_trgm's similarity operator, served by the GIN index
+            similar=RawSQL(f'LOWER({table}.name) %% %s', (text,),
+                           output_field=BooleanField()),
+            similarity=TrigramSimilarity(Lower('name'), text),
+        ).filter(similar=True).order_by('-similarity')[:limit])
+
+    names = dict(queryset.annotate(name_lower=Lower('name'))
+                         .values_list('name_lower', 'id'))
+    close = difflib.get_close_matches(text, names, n=limit, cutoff=0.6)
+    objects = queryset.in_bulk([names[name] for name in close])
+    return [objects[names[name]] for name in close]
+
+
+def complete_names(queryset, text, limit=10):
+    """Return up to `limit` objects whose name matches `text`
+
+    Prefix matches come first, then typo tolerant matches.
+    """
+
+    text = text.strip()
+    if not text:
+        return []
+
+    matches = prefix_matches(queryset, text, limit)
+    if len(matches) < limit and len(text) >= FUZZY_MIN_LENGTH:
+        found = [obj.id for obj in matches]
+        matches += fuzzy_matches(queryset.exclude(id__in=found), text,
+                                 limit - len(matches))
+
+    return matches
@@ -0,0 +1,181 @@
+import hashlib
+import threading
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, connections, router, transaction
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from core import sharding
+from core.models import ListVersion
+
+
+def list_cache():
+    """Return the cache holding serialized list responses"""
+
+    return caches[settings.LIST_RESPONSE_CACHE]
+
+
+def list_version(user_id, model_name):
+    """Return the stored version of a user's list"""
+
+    version = ListVersion.objects.filter(user_id=user_id,
+                                         model_name=model_name)\
+                                 .values_list('version', flat=True)\
+                                 .first()
+    return version or 0
+
+
+def list_generation(user_id, model_name):
+    """Return the data version of a user's list, changed on every write
+
+    Read from the database, so writes of other processes and commands
+    are seen at once.
+    """
+
+    return f'{user_id}.{list_version(user_id, model_name)}'
+
+
+def list_cache_key(user_id, model_name, generation, url):
+    """Return the cache key of a list response for the given url
+
+    The key embeds the generation, so bumping the version invalidates
+    every cached page and query of that list at once.
+    """
+
+    digest = hashlib.md5(url.encode()).hexdigest()
+    return f'list:{user_id}:{model_name}:{generation}:{digest}'
+
+
+def list_etag(generation, url, media_type):
+    """Return a strong ETag for one representation of a list"""
+
+    value = f'{generation}:{url}:{media_type}'
+    return quote_etag(hashlib.md5(value.encode()).hexdigest())
+
+
+def invalidate_lists(user_id, *model_names):
+    """Bump the versions of the given lists of a user
+
+    Return the new versions by list name, read from the write itself.
+    """
+
+    using = router.db_for_write(ListVersion)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+
+    def bump(names):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {quote(ListVersion._meta.db_table)} '
+                f'SET {quote("version")} = {quote("version")} + 1 '
+                f'WHERE {quote("user_id")} = %s AND {quote("model_name")} '
+                f'IN ({", ".join(["%s"] * len(names))}) '
+                f'RETURNING {quote("model_name")}, {quote("version")}',
+                (user_id, *names))
+            return dict(cursor.fetchall())
+
+    versions = bump(tuple(dict.fromkeys(model_names)))
+    for model_name in model_names:
+        if model_name in versions:
+            continue
+        try:
+            with transaction.atomic(using=using):
+                ListVersion.objects.create(user_id=user_id,
+                                           model_name=model_name, version=1)
+            versions[model_name] = 1
+        except IntegrityError:
+            # Created concurrently, this write still needs its own bump
+            versions.update(bump((model_name,)))
+    return versions
+
+
+def on_user_commit(user_id, func):
+    """Call func on the user's shard once the running transaction of
+    that shard commits, at once outside of one
+    """
+
+    using = router.db_for_write(ListVersion)
+
+    def run():
+        with sharding.using_shard(using, user_id):
+            func()
+
+    transaction.on_commit(run, using=using)
+    return run
+
+
+_batches = threading.local()
+
+
+def collect_on_commit(user_id, name, items, func):
+    """Call func once the running transaction of the user's shard
+    commits, with the items of every call for the same user and name
+    made in that transaction
+
+    A batch whose callback was dropped by a rollback is started over.
+    """
+
+    using = router.db_for_write(ListVersion)
+    pending = _batches.__dict__.setdefault('pending', {})
+    key = (using, user_id, name)
+
+    batch = pending.get(key)
+    if batch is not None and any(
+            registered is batch[0]
+            for _, registered in connections[using].run_on_commit):
+        batch[1].extend(items)
+        return
+
+    collected = list(items)
+
+    def flush():
+        if pending.get(key, (None, None))[1] is collected:
+            del pending[key]
+        func(collected)
+
+    run = on_user_commit(user_id, flush)
+    if connections[using].in_atomic_block:
+        pending[key] = (run, collected)
+
+
+def invalidate_lists_on_commit(user_id, *model_names):
+    """Bump the versions of the given lists once the write commits
+
+    Until then other requests still see the old rows, so a response
+    cached in between is keyed by the old version. The lists touched
+    by one transaction are bumped together.
+    """
+
+    collect_on_commit(user_id, 'lists', model_names,
+                      lambda names: invalidate_lists(user_id, *names))
+
+
+class CachedListMixin:
+    """Serve list responses from the per-user list cache
+
+    Responses carry an ETag derived from the list generation, and a
+    matching If-None-Match is answered with 304 before any query runs.
+    """
+
+    def list(self, request, *args, **kwargs):
+        model_name = self.queryset.model._meta.model_name
+        url = request.build_absolute_uri()
+        generation = list_generation(request.user.id, model_name)
+
+        etag = list_etag(generation, url, request.accepted_media_type)
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED,
+                            headers={'ETag': etag})
+
+        key = list_cache_key(request.user.id, model_name, generation, url)
+        data = list_cache().get(key)
+        if data is not None:
+            response = Response(data)
+        else:
+            response = super().list(request, *args, **kwargs)
+            list_cache().set(key, response.data)
+
+        response['ETag'] = etag
+        return response
@@ -0,0 +1,95 @@
+import csv
+import json
+from collections import defaultdict
+from itertools import islice
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import router
+
+from core.models import Recipe
+
+CSV_FIELDS = ('id', 'title', 'time_minutes', 'price', 'link',
+              'tag_ids', 'tags', 'ingredient_ids', 'ingredients')
+
+
+class Echo:
+    """File-like object that returns what is written to it"""
+
+    def write(self, value):
+        return value
+
+
+class RecipeExporter:
+    """Stream a user's recipes with their tags and ingredients
+
+    Recipes are read through a server-side cursor and their relations are
+    loaded once per chunk, so memory use only depends on `chunk_size`.
+    The database is chosen up front as the rows are streamed after the
+    view has returned.
+    """
+
+    def __init__(self, user, chunk_size=2000):
+        self.user = user
+        self.chunk_size = chunk_size
+        self.using = router.db_for_read(Recipe, instance=user)
+
+    def rows(self):
+        """Yield one dict per recipe, ordered by id"""
+
+        recipes = Recipe.objects.using(self.using)\
+                                .filter(user=self.user)\
+                                .order_by('id')\
+                                .values('id', 'title', 'time_minutes',
+                                        'price', 'link')\
+                                .iterator(chunk_size=self.chunk_size)
+        while True:
+            chunk = list(islice(recipes, self.chunk_size))
+            if not chunk:
+                break
+
+            ids = [recipe['id'] for recipe in chunk]
+            tags = self.related(Recipe.tags.through, 'tag', ids)
+            ingredients = self.related(Recipe.ingredients.through,
+                                       'ingredient', ids)
+            for recipe in chunk:
+                recipe['tags'] = tags[recipe['id']]
+                recipe['ingredients'] = ingredients[recipe['id']]
+                yield recipe
+
+    def related(self, through, field, recipe_ids):
+        """Return {recipe id: [{id, name}]} for a chunk of recipes"""
+
+        related = defaultdict(list)
+        links = through.objects.using(self.using)\
+                               .filter(recipe_id__in=recipe_ids)\
+                               .order_by(f'{field}_id')\
+                               .values_list('recipe_id', f'{field}_id',
+                                            f'{field}__name')
+        for recipe_id, pk, name in links:
+            related[recipe_id].append({'id': pk, 'name': name})
+
+        return related
+
+    def ndjson(self):
+        """Yield the recipes as newline delimited JSON"""
+
+        for row in self.rows():
+            yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+    def csv(self):
+        """Yield the recipes as CSV
+
+        Relation ids are ';' separated, names are JSON lists as they may
+        contain any character.
+        """
+
+        writer = csv.writer(Echo())
+        yield writer.writerow(CSV_FIELDS)
+        for row in self.rows():
+            yield writer.writerow([
+                row['id'], row['title'], row['time_minutes'], row['price'],
+                row['link'],
+                ';'.join(str(tag['id']) for tag in row['tags']),
+                json.dumps([tag['name'] for tag in row['tags']]),
+                ';'.join(str(item['id']) for item in row['ingredients']),
+                json.dumps([item['name'] for item in row['ingredients']]),
+            ])
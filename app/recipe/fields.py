@@ -0,0 +1,63 @@
+from django.core.exceptions import ValidationError
+from django.utils.translation import ugettext_lazy as _
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+
+class UserPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key field limited to objects of the requesting user"""
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BatchedManyRelatedField(**list_kwargs)
+
+    def get_queryset(self):
+        """Return only objects owned by the authenticated user"""
+
+        queryset = super().get_queryset()
+        request = self.context.get('request')
+        if request is None:
+            return queryset.none()
+
+        return queryset.filter(user=request.user)
+
+    def to_pk(self, data):
+        """Convert the submitted value to a primary key"""
+
+        if self.pk_field is not None:
+            data = self.pk_field.to_internal_value(data)
+        try:
+            return self.get_queryset().model._meta.pk.to_python(data)
+        except (TypeError, ValueError, ValidationError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
+class BatchedManyRelatedField(serializers.ManyRelatedField):
+    """Resolve all submitted primary keys with a single query"""
+
+    default_error_messages = {
+        'does_not_exist': _('Invalid pk(s) {pk_values} - '
+                            'objects do not exist.'),
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        pks = list(dict.fromkeys(
+            self.child_relation.to_pk(item) for item in data
+        ))
+        objects = self.child_relation.get_queryset().in_bulk(pks)
+
+        missing = [pk for pk in pks if pk not in objects]
+        if missing:
+            self.fail('does_not_exist',
+                      pk_values=', '.join(str(pk) for pk in missing))
+
+        return [objects[pk] for pk in pks]
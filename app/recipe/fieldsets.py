@@ -0,0 +1,86 @@
+from django.utils.functional import cached_property
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+def requested_names(request, param, known):
+    """Return the `known` names listed in a query param, or None
+
+    Only read requests are shaped, writes always get the full response.
+    """
+
+    value = request.query_params.get(param)
+    if request.method not in SAFE_METHODS or not value:
+        return None
+
+    names = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = names.difference(known)
+    if unknown:
+        raise ValidationError(
+            {param: f"Unknown fields: {', '.join(sorted(unknown))}."}
+        )
+
+    return tuple(name for name in known if name in names)
+
+
+class SparseFieldsViewMixin:
+    """Limit read responses to the fields listed in `?fields=`
+
+    The selection is passed to the serializer through its context and
+    narrows the queryset to the requested columns with .only().
+    """
+
+    @cached_property
+    def requested_fields(self):
+        """Return the requested field names in serializer order, or None"""
+
+        return requested_names(self.request, 'fields',
+                               self.get_serializer_class().Meta.fields)
+
+    def wants_field(self, name):
+        """Return whether `name` is part of the response"""
+
+        return self.requested_fields is None or name in self.requested_fields
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.requested_fields
+        return context
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.requested_fields is None:
+            return qs
+
+        # Cursor pagination reads its position from the ordering columns
+        names = set(self.requested_fields)
+        names.update(field.lstrip('-') for field in
+                     self.paginator.get_ordering(self.request, qs, self))
+        columns = [
+            field.name for field in qs.model._meta.concrete_fields
+            if field.name in names
+        ]
+        return qs.only(*columns)
+
+
+class ExpandFieldsMixin:
+    """Inline the related objects listed in `?expand=`
+
+    Only relations in the serializer's `expandable_fields` can be
+    expanded. They are rendered from the same prefetches as their ids.
+    """
+
+    @cached_property
+    def requested_expansions(self):
+        """Return the relations to expand in serializer order, or None"""
+
+        serializer_class = self.get_serializer_class()
+        return requested_names(
+            self.request, 'expand',
+            tuple(getattr(serializer_class, 'expandable_fields', ())),
+        )
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand'] = self.requested_expansions
+        return context
@@ -0,0 +1,220 @@
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from pyroaring import BitMap, FrozenBitMap
+
+from core.models import Recipe
+from .cache import collect_on_commit, invalidate_lists, list_version
+
+RELATIONS = {
+    'tags': 'tag_id',
+    'ingredients': 'ingredient_id',
+}
+
+# ListVersion counting the relation changes of a user's recipes
+INDEX_VERSION = 'recipe-index'
+
+_indexes = OrderedDict()
+_lock = threading.Lock()
+
+
+def current_index_version(user_id):
+    """Return the shared version of a user's recipe index"""
+
+    return list_version(user_id, INDEX_VERSION)
+
+
+def bump_index_version(user_id):
+    """Mark every process' index for the user as out of date once the
+    running transaction commits
+    """
+
+    collect_on_commit(user_id, INDEX_VERSION, (None,),
+                      lambda changes: apply_changes(user_id, changes))
+
+
+class RecipeBitmapIndex:
+    """Inverted index from tag/ingredient ids to compressed bitmaps of
+    recipe ids
+
+    Bitmaps are frozen and replaced on change, so a request can filter
+    while another thread applies a change.
+    """
+
+    def __init__(self, user_id, version):
+        self.user_id = user_id
+        self.version = version
+        self.bitmaps = {relation: {} for relation in RELATIONS}
+
+    @classmethod
+    def build(cls, user_id, version):
+        """Load the index of a user from the through tables"""
+
+        index = cls(user_id, version)
+        for relation, field in RELATIONS.items():
+            through = getattr(Recipe, relation).through
+            links = through.objects.filter(recipe__user_id=user_id)\
+                                   .values_list(field, 'recipe_id')\
+                                   .iterator()
+            building = {}
+            for pk, recipe_id in links:
+                building.setdefault(pk, BitMap()).add(recipe_id)
+            index.bitmaps[relation] = {
+                pk: FrozenBitMap(bitmap) for pk, bitmap in building.items()
+            }
+
+        return index
+
+    def add(self, relation, recipe_ids, pks):
+        bitmaps = self.bitmaps[relation]
+        added = FrozenBitMap(recipe_ids)
+        for pk in pks:
+            bitmaps[pk] = bitmaps.get(pk, FrozenBitMap()) | added
+
+    def remove(self, relation, recipe_ids, pks):
+        bitmaps = self.bitmaps[relation]
+        removed = FrozenBitMap(recipe_ids)
+        for pk in pks:
+            if pk in bitmaps:
+                bitmaps[pk] = bitmaps[pk] - removed
+
+    def clear_recipe(self, relation, recipe_id):
+        """Remove a recipe from every bitmap of a relation"""
+
+        self.remove(relation, (recipe_id,), list(self.bitmaps[relation]))
+
+    def clear_key(self, relation, pk):
+        """Remove every recipe from the bitmap of one tag or ingredient"""
+
+        self.bitmaps[relation].pop(pk, None)
+
+    def match(self, relation, pks, match_all=False):
+        """Return the bitmap of recipes having any (or all) of the pks"""
+
+        bitmaps = self.bitmaps[relation]
+        combine = BitMap.intersection if match_all else BitMap.union
+        return combine(*(bitmaps.get(pk, FrozenBitMap()) for pk in pks))
+
+    def filter(self, filters, match_all=False):
+        """Return the bitmap of recipes matching every relation in
+        `filters`
+        """
+
+        return BitMap.intersection(*(
+            self.match(relation, pks, match_all)
+            for relation, pks in filters.items()
+        ))
+
+
+def get_index(user_id):
+    """Return an up to date index for the user, building it if needed"""
+
+    version = current_index_version(user_id)
+    with _lock:
+        index = _indexes.get(user_id)
+        if index is not None and index.version == version:
+            _indexes.move_to_end(user_id)
+            return index
+
+    index = RecipeBitmapIndex.build(user_id, version)
+    with _lock:
+        _indexes[user_id] = index
+        _indexes.move_to_end(user_id)
+        while len(_indexes) > settings.RECIPE_INDEX_MAX_USERS:
+            _indexes.popitem(last=False)
+
+    return index
+
+
+def apply_m2m_change(relation, instance, action, reverse, pk_set):
+    """Apply a change of recipe tags/ingredients to the local index once
+    it is committed
+    """
+
+    change = (relation, instance.pk, action, reverse, set(pk_set or ()))
+    collect_on_commit(instance.user_id, INDEX_VERSION, (change,),
+                      lambda changes: apply_changes(instance.user_id,
+                                                    changes))
+
+
+def apply_changes(user_id, changes):
+    """Bump the index version once for the committed changes and apply
+    them to the local index, or drop it when it can't follow
+
+    A None change stands for writes not tracked in place.
+    """
+
+    # None when the user was deleted meanwhile
+    version = invalidate_lists(user_id, INDEX_VERSION).get(INDEX_VERSION)
+
+    with _lock:
+        index = _indexes.get(user_id)
+        if index is None:
+            return
+        if version != index.version + 1 or None in changes:
+            # Another process wrote in between; rebuild on next use
+            del _indexes[user_id]
+            return
+
+        for relation, pk, action, reverse, pk_set in changes:
+            if action == 'post_clear':
+                if reverse:
+                    index.clear_key(relation, pk)
+                else:
+                    index.clear_recipe(relation, pk)
+            else:
+                update = index.add if action == 'post_add' \
+                    else index.remove
+                if reverse:
+                    update(relation, pk_set, (pk,))
+                else:
+                    update(relation, (pk,), pk_set)
+
+        index.version = version
+
+
+def page_ids(ids, position, reverse, size):
+    """Return the ids of one page of an id ordered list
+
+    The page holds the `size` ids following the cursor `position`,
+    descending by id, or preceding it for a `reverse` cursor.
+    """
+
+    if reverse:
+        start = ids.rank(position)
+        return ids[start:start + size]
+
+    end = len(ids) if position is None else ids.rank(position - 1)
+    return ids[max(0, end - size):end]
+
+
+def filter_recipes(queryset, user, filters, match_all=False, page=None):
+    """Limit recipes to those matching the given tag/ingredient ids
+
+    Ids within a relation are OR'ed (AND'ed with `match_all`) and the
+    relations are AND'ed together. With a `page`, the (cursor position,
+    reverse, size) of a list ordered by descending id, only the ids of
+    that page are kept.
+    """
+
+    if settings.RECIPE_FILTER_BACKEND == 'bitmap':
+        ids = get_index(user.id).filter(filters, match_all)
+        if page is not None:
+            ids = page_ids(ids, *page)
+        if len(ids) <= settings.RECIPE_INDEX_MAX_IDS:
+            return queryset.filter(id__in=list(ids))
+
+    return filter_recipes_sql(queryset, filters, match_all)
+
+
+def filter_recipes_sql(queryset, filters, match_all=False):
+    """Filter recipes by joining the through tables"""
+
+    for relation, pks in filters.items():
+        if match_all:
+            for pk in pks:
+                queryset = queryset.filter(**{f'{relation}__id': pk})
+        else:
+            queryset = queryset.filter(**{f'{relation}__id__in': pks})
+
+    return queryset.distinct()
@@ -0,0 +1,151 @@
+import json
+from collections import Counter
+from itertools import islice
+from django.db import connections, router, transaction
+
+from core.models import Tag, Ingredient, Recipe
+from . import stats
+from .cache import invalidate_lists_on_commit
+from .filters import bump_index_version
+from .search import update_search_index
+from .serializers import RecipeImportSerializer
+
+
+class RecipeImporter:
+    """Import NDJSON recipes for a user a chunk at a time
+
+    Each line holds one recipe with its tags and ingredients given by name.
+    Only `chunk_size` rows are held in memory at once, and every chunk is
+    written in its own transaction with a fixed number of bulk queries.
+    The first `max_errors` invalid lines are reported, the rest counted.
+    """
+
+    def __init__(self, user, chunk_size=500, max_errors=100):
+        self.user = user
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.created = 0
+        self.errors = []
+        self.error_count = 0
+
+    def run(self, lines):
+        """Import all lines and return a summary of the run"""
+
+        numbered = enumerate(lines, start=1)
+        while True:
+            chunk = list(islice(numbered, self.chunk_size))
+            if not chunk:
+                break
+            self.import_chunk(chunk)
+
+        return {'created': self.created, 'errors': self.errors,
+                'error_count': self.error_count}
+
+    def add_error(self, line_no, errors):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line_no, 'errors': errors})
+
+    def import_chunk(self, chunk):
+        """Validate and store a list of (line number, raw line) pairs"""
+
+        rows = []
+        for line_no, line in chunk:
+            if not line.strip():
+                continue
+
+            try:
+                data = json.loads(line)
+            except ValueError as exc:
+                self.add_error(line_no, str(exc))
+                continue
+
+            serializer = RecipeImportSerializer(data=data)
+            if serializer.is_valid():
+                rows.append(serializer.validated_data)
+            else:
+                self.add_error(line_no, serializer.errors)
+
+        if rows:
+            with transaction.atomic(using=router.db_for_write(Recipe)):
+                self.store(rows)
+                invalidate_lists_on_commit(self.user.id, 'tag', 'ingredient',
+                                           'recipe')
+                bump_index_version(self.user.id)
+            self.created += len(rows)
+
+    def store(self, rows):
+        """Write validated rows and their relations in bulk"""
+
+        tags = self.resolve(Tag, rows, 'tags')
+        ingredients = self.resolve(Ingredient, rows, 'ingredients')
+
+        recipes = [
+            Recipe(user=self.user, **{
+                field: value for field, value in row.items()
+                if field not in ('tags', 'ingredients')
+            })
+            for row in rows
+        ]
+        self.create_recipes(recipes)
+
+        tag_links = [
+            Recipe.tags.through(recipe_id=recipe.id, tag_id=tag_id)
+            for recipe, row in zip(recipes, rows)
+            for tag_id in self.related_ids(tags, row['tags'])
+        ]
+        ingredient_links = [
+            Recipe.ingredients.through(recipe_id=recipe.id,
+                                       ingredient_id=ingredient_id)
+            for recipe, row in zip(recipes, rows)
+            for ingredient_id in self.related_ids(ingredients,
+                                                  row['ingredients'])
+        ]
+        Recipe.tags.through.objects.bulk_create(tag_links,
+                                                batch_size=self.chunk_size)
+        Recipe.ingredients.through.objects.bulk_create(
+            ingredient_links, batch_size=self.chunk_size
+        )
+
+        update_search_index(recipe.id for recipe in recipes)
+        self.count_stats(recipes, tag_links, ingredient_links)
+
+    def resolve(self, model, rows, field):
+        """Return a lower-case name to id map, creating missing objects"""
+
+        names = [name for row in rows for name in row[field]]
+        objects = model.objects.bulk_get_or_create(self.user, names)
+
+        return {name.lower(): obj.id for name, obj in zip(names, objects)}
+
+    def related_ids(self, ids_by_name, names):
+        """Return the distinct ids for the given names"""
+
+        return dict.fromkeys(ids_by_name[name.lower()] for name in names)
+
+    def create_recipes(self, recipes):
+        """Insert recipes so that each one gets its primary key set"""
+
+        connection = connections[router.db_for_write(Recipe)]
+        if connection.features.can_return_ids_from_bulk_insert:
+            Recipe.objects.bulk_create(recipes, batch_size=self.chunk_size)
+        else:
+            # e.g. SQLite, where bulk_create can't report the new ids.
+            # Counted with the rest of the chunk by count_stats
+            with stats.suspend():
+                for recipe in recipes:
+                    recipe.save(force_insert=True)
+
+    def count_stats(self, recipes, tag_links, ingredient_links):
+        """Add the chunk to the stats and usage counters in bulk"""
+
+        deltas = Counter()
+        for recipe in recipes:
+            deltas.update(stats.recipe_deltas(recipe.time_minutes,
+                                              recipe.price))
+        stats.adjust(self.user.id, deltas)
+
+        Tag.objects.add_usage(Counter(link.tag_id for link in tag_links))
+        Ingredient.objects.add_usage(
+            Counter(link.ingredient_id for link in ingredient_links)
+        )
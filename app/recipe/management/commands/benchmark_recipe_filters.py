@@ -0,0 +1,105 @@
+import random
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Tag, Ingredient, Recipe
+from recipe.filters import RecipeBitmapIndex, filter_recipes_sql
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """Django command to compare the SQL and bitmap recipe filters"""
+
+    help = ('Seed a throwaway dataset and time recipe tag/ingredient '
+            'filtering through SQL joins and the bitmap index. All data '
+            'is rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=5000)
+        parser.add_argument('--tags', type=int, default=50)
+        parser.add_argument('--ingredients', type=int, default=200)
+        parser.add_argument('--per-recipe', type=int, default=5,
+                            help='tags and ingredients on each recipe')
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rand = random.Random(options['seed'])
+        with transaction.atomic():
+            user = self.seed(rand, options)
+            self.run(rand, user, options)
+            transaction.set_rollback(True)
+
+    def seed(self, rand, options):
+        """Create a user with randomly tagged recipes"""
+
+        self.stdout.write(f"[INFO] seeding {options['recipes']} recipes...")
+        user = User.objects.create_user('bench@bench.local')
+        tags = Tag.objects.bulk_get_or_create(
+            user, [f"tag {i}" for i in range(options['tags'])]
+        )
+        ingredients = Ingredient.objects.bulk_get_or_create(
+            user, [f"ingredient {i}" for i in range(options['ingredients'])]
+        )
+        for i in range(options['recipes']):
+            Recipe(user=user, title=f'recipe {i}', time_minutes=i,
+                   price='1.00').save(force_insert=True)
+        recipe_ids = Recipe.objects.filter(user=user)\
+                                   .values_list('id', flat=True)
+
+        for relation, objects in (('tags', tags),
+                                  ('ingredients', ingredients)):
+            through = getattr(Recipe, relation).through
+            field = f'{objects[0]._meta.model_name}_id'
+            per_recipe = min(options['per_recipe'], len(objects))
+            through.objects.bulk_create([
+                through(recipe_id=recipe_id, **{field: obj.id})
+                for recipe_id in recipe_ids
+                for obj in rand.sample(objects, per_recipe)
+            ], batch_size=500)
+
+        return user
+
+    def run(self, rand, user, options):
+        """Time the same random queries through both backends"""
+
+        tag_ids = list(Tag.objects.filter(user=user)
+                                  .values_list('id', flat=True))
+        ingredient_ids = list(Ingredient.objects.filter(user=user)
+                                                .values_list('id', flat=True))
+        queries = [
+            ({'tags': rand.sample(tag_ids, 2),
+              'ingredients': rand.sample(ingredient_ids, 1)},
+             rand.random() < 0.5)
+            for _ in range(options['queries'])
+        ]
+
+        start = time.perf_counter()
+        index = RecipeBitmapIndex.build(user.id, version=None)
+        build = (time.perf_counter() - start) * 1000
+        self.stdout.write(f'[INFO] bitmap index built in {build:.1f} ms')
+
+        start = time.perf_counter()
+        bitmap_results = [sorted(index.filter(filters, match_all))
+                          for filters, match_all in queries]
+        bitmap = (time.perf_counter() - start) / len(queries) * 1000
+
+        start = time.perf_counter()
+        recipes = Recipe.objects.filter(user=user)
+        sql_results = [
+            sorted(filter_recipes_sql(recipes, filters, match_all)
+                   .values_list('id', flat=True))
+            for filters, match_all in queries
+        ]
+        sql = (time.perf_counter() - start) / len(queries) * 1000
+
+        if bitmap_results != sql_results:
+            self.stdout.write(self.style.ERROR(
+                '[ERROR] bitmap and sql results differ'
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f'[INFO] sql: {sql:.3f} ms/query, bitmap: {bitmap:.3f} ms/query'
+        ))
@@ -0,0 +1,89 @@
+import random
+import time
+from io import BytesIO
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Tag, Ingredient, Recipe
+from core.parsers import FastJSONParser, MessagePackParser
+from core.renderers import FastJSONRenderer, MessagePackRenderer
+from recipe.serializers import RecipeSerializer
+
+User = get_user_model()
+
+FORMATS = (
+    ('json', JSONRenderer(), JSONParser()),
+    ('orjson', FastJSONRenderer(), FastJSONParser()),
+    ('msgpack', MessagePackRenderer(), MessagePackParser()),
+)
+
+
+class Command(BaseCommand):
+    """Django command to compare the stock and fast renderers"""
+
+    help = ('Seed a throwaway page of recipes and time rendering and '
+            'parsing its RecipeSerializer data with each format. All data '
+            'is rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            data = self.seed(random.Random(options['seed']),
+                             options['recipes'])
+            transaction.set_rollback(True)
+
+        self.run(data, options['repeat'])
+
+    def seed(self, rand, recipes):
+        """Return the serialized data of `recipes` tagged recipes"""
+
+        user = User.objects.create_user('bench@bench.local')
+        tags = Tag.objects.bulk_get_or_create(
+            user, [f'tag {i}' for i in range(20)]
+        )
+        ingredients = Ingredient.objects.bulk_get_or_create(
+            user, [f'ingrédient {i}' for i in range(50)]
+        )
+        for i in range(recipes):
+            recipe = Recipe.objects.create(
+                user=user, title=f'Recipe № {i}', time_minutes=i,
+                price=f'{rand.randint(100, 9999) / 100:.2f}',
+                link=f'https://example.com/recipes/{i}',
+            )
+            recipe.tags.set(rand.sample(tags, 3))
+            recipe.ingredients.set(rand.sample(ingredients, 5))
+
+        recipes = Recipe.objects.filter(user=user)\
+                                .prefetch_related('tags', 'ingredients')
+        return RecipeSerializer(recipes, many=True).data
+
+    def run(self, data, repeat):
+        """Time rendering and parsing `data` with every format"""
+
+        expected = JSONRenderer().render(data)
+        for name, renderer, parser in FORMATS:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                body = renderer.render(data)
+            encode = (time.perf_counter() - start) / repeat * 1000
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                parser.parse(BytesIO(body))
+            decode = (time.perf_counter() - start) / repeat * 1000
+
+            if name == 'orjson' and body != expected:
+                self.stdout.write(self.style.ERROR(
+                    '[ERROR] orjson output differs from json'
+                ))
+            self.stdout.write(
+                f'[INFO] {name}: encode {encode:.2f} ms, '
+                f'decode {decode:.2f} ms, {len(body)} bytes'
+            )
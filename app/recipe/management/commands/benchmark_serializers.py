@@ -0,0 +1,81 @@
+import random
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
+
+from core.models import Tag, Ingredient, Recipe
+from recipe.readers import ValuesReader
+from recipe.serializers import RecipeSerializer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """Django command to compare RecipeSerializer and the values reader"""
+
+    help = ('Seed a throwaway set of recipes and time serializing them '
+            'with RecipeSerializer and with the values reader, queries '
+            'included. All data is rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rand = random.Random(options['seed'])
+        with transaction.atomic():
+            user = self.seed(rand, options['recipes'])
+            self.run(user, options['recipes'], options['repeat'])
+            transaction.set_rollback(True)
+
+    def seed(self, rand, recipes):
+        """Create a user with `recipes` tagged recipes"""
+
+        user = User.objects.create_user('bench@bench.local')
+        tags = Tag.objects.bulk_get_or_create(
+            user, [f'tag {i}' for i in range(20)]
+        )
+        ingredients = Ingredient.objects.bulk_get_or_create(
+            user, [f'ingredient {i}' for i in range(50)]
+        )
+        for i in range(recipes):
+            recipe = Recipe.objects.create(
+                user=user, title=f'recipe {i}', time_minutes=i,
+                price=f'{rand.randint(100, 9999) / 100:.2f}',
+            )
+            recipe.tags.set(rand.sample(tags, 3))
+            recipe.ingredients.set(rand.sample(ingredients, 5))
+
+        return user
+
+    def run(self, user, recipes, repeat):
+        """Time both read paths over the same recipes"""
+
+        queryset = Recipe.objects.filter(user=user).order_by('-id')
+        reader = ValuesReader.for_serializer(RecipeSerializer)
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            expected = RecipeSerializer(queryset.prefetch_related(
+                Prefetch('ingredients',
+                         queryset=Ingredient.objects.order_by('id')),
+                Prefetch('tags', queryset=Tag.objects.order_by('id')),
+            ), many=True).data
+        serializer = (time.perf_counter() - start) / repeat / recipes
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            data = reader.to_representation(list(reader.values(queryset)))
+        values = (time.perf_counter() - start) / repeat / recipes
+
+        if data != expected:
+            self.stdout.write(self.style.ERROR(
+                '[ERROR] values reader output differs from RecipeSerializer'
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f'[INFO] serializer: {serializer * 1000000:.1f} us/row, '
+            f'values reader: {values * 1000000:.1f} us/row'
+        ))
@@ -0,0 +1,41 @@
+import sys
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core import sharding
+from recipe.importer import RecipeImporter
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """Django command to import NDJSON recipes for a user"""
+
+    help = 'Import newline delimited JSON recipes for the given user.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('email')
+        parser.add_argument('path', help="NDJSON file, or '-' for stdin")
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['email'])
+        except User.DoesNotExist:
+            raise CommandError(f"user {options['email']} does not exist")
+
+        importer = RecipeImporter(user, chunk_size=options['chunk_size'])
+        with sharding.for_user(user.id):
+            if options['path'] == '-':
+                result = importer.run(sys.stdin)
+            else:
+                with open(options['path'], encoding='utf-8') as lines:
+                    result = importer.run(lines)
+
+        for error in result['errors']:
+            self.stdout.write(self.style.ERROR(
+                f"[ERROR] line {error['line']}: {error['errors']}"
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f"[INFO] imported {result['created']} recipes"
+        ))
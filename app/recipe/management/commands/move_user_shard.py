@@ -0,0 +1,141 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+
+from core import sharding
+from core.models import (
+    Tag, Ingredient, Recipe, RecipeStatsCounter, ListVersion
+)
+from recipe import stats
+from recipe.cache import invalidate_lists
+from recipe.filters import bump_index_version
+from recipe.search import delete_from_search_index, update_search_index
+
+User = get_user_model()
+
+# In foreign key order, rows keep their ids
+MOVED_MODELS = (
+    (Tag, 'user_id'),
+    (Ingredient, 'user_id'),
+    (Recipe, 'user_id'),
+    (Recipe.tags.through, 'recipe__user_id'),
+    (Recipe.ingredients.through, 'recipe__user_id'),
+    (ListVersion, 'user_id'),
+)
+
+# Rebuilt on the target instead of copied
+STATS_MODELS = (
+    (RecipeStatsCounter, 'user_id'),
+)
+
+
+class Command(BaseCommand):
+    """Django command to move a user's recipe data to another shard"""
+
+    help = ('Copy the tags, ingredients and recipes of a user to another '
+            'shard, point the user at it and delete them from the old '
+            'shard. The API refuses the writes of the user until it is '
+            'done; reads keep being served from the old shard.')
+
+    batch_size = 500
+
+    def add_arguments(self, parser):
+        parser.add_argument('email')
+        parser.add_argument('shard', help='Database alias from SHARDS')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.using(DEFAULT_DB_ALIAS)\
+                               .get(email=options['email'])
+        except User.DoesNotExist:
+            raise CommandError(f"user {options['email']} does not exist")
+
+        target = options['shard']
+        if target not in settings.SHARDS:
+            raise CommandError(f'{target} is not one of {settings.SHARDS}')
+        # Waits for the user's writes in progress, which hold the row lock
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            source, locked = sharding.user_shard_state(user.id, lock=True)
+            if locked:
+                raise CommandError(f'{user.email} is already being moved')
+            if source == target:
+                self.stdout.write(self.style.SUCCESS(
+                    f'[INFO] {user.email} is already on {target}'
+                ))
+                return
+            sharding.set_user_shard(user.id, source, locked=True)
+
+        try:
+            copied = self.copy(user.id, source, target)
+        except BaseException:
+            sharding.set_user_shard(user.id, source)
+            raise
+        sharding.set_user_shard(user.id, target)
+        self.delete(user.id, source)
+        with sharding.for_user(user.id):
+            invalidate_lists(user.id, 'recipe', 'tag', 'ingredient')
+            bump_index_version(user.id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'[INFO] moved {user.email} from {source} to {target}: '
+            + ', '.join(f'{count} {name}' for name, count in copied.items())
+        ))
+
+    def copy(self, user_id, source, target):
+        """Copy a user's rows to the target, return {table: rows}"""
+
+        for model in (Tag, Ingredient, Recipe):
+            if model.objects.using(target).filter(user_id=user_id).exists():
+                raise CommandError(
+                    f'{target} already holds {model._meta.db_table} rows '
+                    f'of the user'
+                )
+
+        copied = {}
+        with transaction.atomic(using=target):
+            sharding.copy_user(user_id, target)
+            for model, owner in MOVED_MODELS:
+                rows = model.objects.using(source)\
+                                    .filter(**{owner: user_id})\
+                                    .values()
+                try:
+                    with transaction.atomic(using=target):
+                        objects = model.objects.using(target).bulk_create(
+                            (model(**row) for row in rows.iterator()),
+                            batch_size=self.batch_size,
+                        )
+                except IntegrityError:
+                    raise CommandError(
+                        f'{model._meta.db_table} ids of the user are '
+                        f'already used on {target}'
+                    )
+                copied[model._meta.db_table] = len(objects)
+
+            with sharding.using_shard(target):
+                stats.rebuild(user_id)
+                update_search_index(
+                    Recipe.objects.filter(user_id=user_id)
+                                  .values_list('id', flat=True)
+                )
+
+        return copied
+
+    def delete(self, user_id, source):
+        """Delete a user's rows from the source
+
+        Raw deletes send no signals, whose counter, index and list
+        updates would recreate rows of the user on the source.
+        """
+
+        with sharding.using_shard(source), \
+                transaction.atomic(using=source):
+            delete_from_search_index(
+                Recipe.objects.using(source).filter(user_id=user_id)
+                              .values_list('id', flat=True)
+            )
+            for model, owner in reversed(MOVED_MODELS + STATS_MODELS):
+                rows = model.objects.using(source).filter(**{owner: user_id})
+                rows._raw_delete(source)
+            if source != DEFAULT_DB_ALIAS:
+                User.objects.using(source).filter(pk=user_id).delete()
@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core import sharding
+from recipe import stats
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """Django command to rebuild or check the recipe stats counters"""
+
+    help = ('Recompute the recipe stats counters of every user, or of the '
+            'given users, from scratch. With --check, only report counters '
+            'that differ from a full recompute.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('emails', nargs='*')
+        parser.add_argument('--check', action='store_true')
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('id')
+        if options['emails']:
+            users = users.filter(email__in=options['emails'])
+
+        inconsistent = 0
+        for user in users.iterator():
+            with sharding.for_user(user.id):
+                if not options['check']:
+                    stats.rebuild(user.id)
+                    continue
+
+                mismatches = stats.check(user.id)
+            if mismatches:
+                inconsistent += 1
+            for (kind, key), (actual, expected) in sorted(mismatches.items()):
+                self.stdout.write(self.style.ERROR(
+                    f'[ERROR] {user.email} {kind} {key}: '
+                    f'stored {actual}, expected {expected}'
+                ))
+
+        if inconsistent:
+            raise CommandError(f'{inconsistent} users have stale stats')
+        self.stdout.write(self.style.SUCCESS(
+            '[INFO] recipe stats are consistent' if options['check']
+            else '[INFO] recipe stats rebuilt'
+        ))
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from core.models import Tag, Ingredient
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """Django command to recount tag and ingredient usage"""
+
+    help = ('Recount how many recipes use each tag and ingredient, for '
+            'every user or the given users, on every shard, and fix the '
+            'stale counters.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('emails', nargs='*')
+
+    def handle(self, *args, **options):
+        filters = {}
+        if options['emails']:
+            # Evaluated here as users and shards are different databases
+            filters['user_id__in'] = list(
+                User.objects.filter(email__in=options['emails'])
+                            .values_list('id', flat=True)
+            )
+
+        for model in (Tag, Ingredient):
+            fixed = sum(
+                model.objects.db_manager(shard).repair_usage(**filters)
+                for shard in settings.SHARDS
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'[INFO] {model._meta.verbose_name_plural}: '
+                f'fixed {fixed} usage counters'
+            ))
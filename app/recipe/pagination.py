@@ -0,0 +1,55 @@
+from rest_framework.pagination import CursorPagination
+
+
+class BaseCursorPagination(CursorPagination):
+    """Keyset pagination for user owned objects
+
+    The trailing id in each ordering breaks ties between rows sharing the
+    leading value, so pages stay stable while rows are being added.
+    """
+
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class RecipeAttrCursorPagination(BaseCursorPagination):
+    """Paginate tags and ingredients by name, or by usage with
+    `?ordering=usage` or `?ordering=-usage`
+    """
+
+    ordering = ('-name', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        ordering = request.query_params.get('ordering')
+        if ordering in ('usage', '-usage'):
+            return (ordering, ordering.replace('usage', 'id'))
+
+        return super().get_ordering(request, queryset, view)
+
+
+class RecipeCursorPagination(BaseCursorPagination):
+    """Paginate recipes by id, or by search rank when searching"""
+
+    ordering = ('-id',)
+
+    def get_ordering(self, request, queryset, view):
+        if request.query_params.get('search'):
+            return ('-rank', '-id')
+
+        return super().get_ordering(request, queryset, view)
+
+    def id_page(self, request):
+        """Return the (cursor position, reverse, size) of the requested
+        page, or None when it isn't ordered by id
+        """
+
+        if request.query_params.get('search'):
+            return None
+
+        size = self.get_page_size(request) + 1
+        cursor = self.decode_cursor(request)
+        if cursor is None:
+            return None, False, size
+        position = None if cursor.position is None else int(cursor.position)
+        return position, cursor.reverse, cursor.offset + size
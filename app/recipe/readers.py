@@ -0,0 +1,146 @@
+from collections import OrderedDict, defaultdict
+from django.conf import settings
+from django.db.models import CharField, F, IntegerField, Value
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField
+
+# Columns the database already returns in their serialized form
+NATIVE_FIELDS = (serializers.CharField, serializers.IntegerField)
+
+
+class ValuesReader:
+    """Read only list serializer building its output from .values() rows
+
+    Produces the same data as `serializer_class(rows, many=True).data`
+    without instantiating models or running the field tree per row. Plain
+    fields are read as columns, many to many fields as lists of related
+    ids, or of {id, name} objects when expanded, loaded for the whole page
+    in one query. `fields` and `expand` are the serializer context entries
+    shaping the output.
+    """
+
+    _readers = {}
+
+    def __init__(self, serializer_class, fields=None, expand=None):
+        self.model = serializer_class.Meta.model
+        self.fields = []
+        self.columns = []
+        self.relations = []
+        self.expanded = set()
+        self.converters = {}
+
+        serializer = serializer_class(
+            context={'fields': fields, 'expand': expand}
+        )
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            self.fields.append((name, field.source))
+            if isinstance(field, serializers.ListSerializer):
+                self.expanded.add(field.source)
+            if isinstance(field, (ManyRelatedField,
+                                  serializers.ListSerializer)):
+                self.relations.append(field.source)
+                continue
+            self.columns.append(field.source)
+            if not isinstance(field, NATIVE_FIELDS):
+                self.converters[field.source] = field.to_representation
+
+    @classmethod
+    def for_serializer(cls, serializer_class, fields=None, expand=None):
+        """Return the shared reader of a serializer class and context"""
+
+        key = (serializer_class, fields, expand)
+        reader = cls._readers.get(key)
+        if reader is None:
+            reader = cls._readers[key] = cls(serializer_class, fields, expand)
+        return reader
+
+    def values(self, queryset, *extra):
+        """Return `queryset` as rows with the columns to serialize
+
+        The primary key is always read as relations are keyed on it.
+        """
+
+        columns = self.columns + [name for name in ('id',) + extra
+                                  if name not in self.columns]
+        return queryset.prefetch_related(None).values(*columns)
+
+    def related(self, ids):
+        """Return {relation: {object id: [related ids or objects]}}"""
+
+        related = {name: defaultdict(list) for name in self.relations}
+        queries = []
+        for position, name in enumerate(self.relations):
+            field = self.model._meta.get_field(name)
+            target = field.m2m_reverse_field_name()
+            if name in self.expanded:
+                label = F(f'{target}__name')
+            else:
+                label = Value(None, CharField())
+            queries.append(
+                field.remote_field.through.objects
+                     .filter(**{f'{field.m2m_field_name()}_id__in': ids})
+                     .annotate(label=label,
+                               relation=Value(position, IntegerField()))
+                     .values_list(f'{field.m2m_field_name()}_id',
+                                  f'{target}_id', 'label', 'relation')
+            )
+        if not queries or not ids:
+            return related
+
+        links = queries[0].union(*queries[1:], all=True)
+        for pk, related_pk, label, position in sorted(
+                links, key=lambda link: link[1]):
+            name = self.relations[position]
+            if name in self.expanded:
+                related[name][pk].append(
+                    OrderedDict((('id', related_pk), ('name', label)))
+                )
+            else:
+                related[name][pk].append(related_pk)
+        return related
+
+    def to_representation(self, rows):
+        """Return the serialized data of a list of rows"""
+
+        related = self.related([row['id'] for row in rows])
+        data = []
+        for row in rows:
+            item = OrderedDict()
+            for name, source in self.fields:
+                if source in related:
+                    item[name] = related[source].get(row['id'], [])
+                    continue
+                value = row[source]
+                if value is not None and source in self.converters:
+                    value = self.converters[source](value)
+                item[name] = value
+            data.append(item)
+        return data
+
+
+class ValuesListMixin:
+    """Serve list pages through a ValuesReader
+
+    Enabled by the RECIPE_VALUES_LIST setting. The page is read as
+    .values() rows and serialized by the reader of the view's serializer.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not settings.RECIPE_VALUES_LIST:
+            return super().list(request, *args, **kwargs)
+
+        context = self.get_serializer_context()
+        reader = ValuesReader.for_serializer(
+            self.get_serializer_class(),
+            context.get('fields'),
+            context.get('expand'),
+        )
+        queryset = self.filter_queryset(self.get_queryset())
+        # Cursor pagination reads the position from the ordering columns
+        ordering = [field.lstrip('-') for field in
+                    self.paginator.get_ordering(request, queryset, self)]
+        page = self.paginate_queryset(reader.values(queryset, *ordering))
+
+        return self.get_paginated_response(reader.to_representation(page))
@@ -0,0 +1,164 @@
+import re
+from collections import defaultdict
+from django.db import connections, router
+from django.db.models import BooleanField, IntegerField, Value
+from django.db.models.expressions import RawSQL
+
+from core.models import Recipe
+
+from .cache import collect_on_commit
+
+# Ranks are scaled to integers so that cursor pagination can compare them
+# exactly
+RANK_SCALE = 1000000
+
+
+def search_documents(recipe_ids):
+    """Return {recipe id: (title, tag and ingredient names)}"""
+
+    names = defaultdict(list)
+    for relation, field in (('tags', 'tag__name'),
+                            ('ingredients', 'ingredient__name')):
+        through = getattr(Recipe, relation).through
+        links = through.objects.filter(recipe_id__in=recipe_ids)\
+                               .values_list('recipe_id', field)
+        for recipe_id, name in links:
+            names[recipe_id].append(name)
+
+    titles = Recipe.objects.filter(id__in=recipe_ids)\
+                           .values_list('id', 'title')
+    return {pk: (title, ' '.join(names[pk])) for pk, title in titles}
+
+
+class PostgresSearch:
+    """Search a GIN indexed tsvector column on core_recipe"""
+
+    config = 'english'
+
+    def update(self, connection, recipe_ids):
+        documents = search_documents(recipe_ids)
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                'UPDATE core_recipe SET search_vector = '
+                'setweight(to_tsvector(%s::regconfig, %s), \'A\') || '
+                'setweight(to_tsvector(%s::regconfig, %s), \'B\') '
+                'WHERE id = %s',
+                [(self.config, title, self.config, names, pk)
+                 for pk, (title, names) in documents.items()]
+            )
+
+    def delete(self, connection, recipe_ids):
+        """Nothing to do, the vector is deleted with its row"""
+
+    def search(self, queryset, text):
+        query = "plainto_tsquery(%s::regconfig, %s)"
+        return queryset.annotate(search_match=RawSQL(
+            f'core_recipe.search_vector @@ {query}',
+            (self.config, text),
+            output_field=BooleanField(),
+        )).filter(search_match=True).annotate(rank=RawSQL(
+            f'CAST(ts_rank(core_recipe.search_vector, {query}) '
+            f'* {RANK_SCALE} AS BIGINT)',
+            (self.config, text),
+            output_field=IntegerField(),
+        ))
+
+
+class SQLiteSearch:
+    """Search the core_recipe_search FTS5 table"""
+
+    def update(self, connection, recipe_ids):
+        documents = search_documents(recipe_ids)
+        self.delete(connection, recipe_ids)
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                'INSERT INTO core_recipe_search (rowid, title, names) '
+                'VALUES (%s, %s, %s)',
+                [(pk, title, names)
+                 for pk, (title, names) in documents.items()]
+            )
+
+    def delete(self, connection, recipe_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                'DELETE FROM core_recipe_search WHERE rowid = %s',
+                [(pk,) for pk in recipe_ids]
+            )
+
+    def search(self, queryset, text):
+        # Quote every word so user input can't use the FTS5 query syntax
+        terms = ' '.join(f'"{word}"' for word in re.findall(r'\w+', text))
+        if not terms:
+            return queryset.annotate(
+                rank=Value(0, output_field=IntegerField())
+            ).none()
+
+        match = 'core_recipe_search MATCH %s'
+        return queryset.annotate(search_match=RawSQL(
+            f'core_recipe.id IN (SELECT rowid FROM core_recipe_search '
+            f'WHERE {match})',
+            (terms,),
+            output_field=BooleanField(),
+        )).filter(search_match=True).annotate(rank=RawSQL(
+            f'SELECT CAST(-bm25(core_recipe_search, 2.0, 1.0) * '
+            f'{RANK_SCALE} AS INTEGER) FROM core_recipe_search '
+            f'WHERE {match} AND rowid = core_recipe.id',
+            (terms,),
+            output_field=IntegerField(),
+        ))
+
+
+class SubstringSearch:
+    """Unindexed title search for databases without full-text support"""
+
+    def update(self, connection, recipe_ids):
+        pass
+
+    def delete(self, connection, recipe_ids):
+        pass
+
+    def search(self, queryset, text):
+        return queryset.filter(title__icontains=text)\
+                       .annotate(rank=Value(0, output_field=IntegerField()))
+
+
+BACKENDS = {
+    'postgresql': PostgresSearch(),
+    'sqlite': SQLiteSearch(),
+}
+
+
+def get_backend(connection):
+    return BACKENDS.get(connection.vendor, SubstringSearch())
+
+
+def update_search_index(recipe_ids):
+    """Rebuild the search documents of the given recipes"""
+
+    recipe_ids = list(recipe_ids)
+    if recipe_ids:
+        connection = connections[router.db_for_write(Recipe)]
+        get_backend(connection).update(connection, recipe_ids)
+
+
+def update_search_index_on_commit(user_id, recipe_ids):
+    """Rebuild the search documents of a user's recipes once the write
+    commits, each recipe once per transaction
+    """
+
+    collect_on_commit(user_id, 'search', recipe_ids,
+                      lambda ids: update_search_index(set(ids)))
+
+
+def delete_from_search_index(recipe_ids):
+    """Remove the search documents of deleted recipes"""
+
+    connection = connections[router.db_for_write(Recipe)]
+    get_backend(connection).delete(connection, list(recipe_ids))
+
+
+def search_recipes(queryset, text):
+    """Return matching recipes annotated with an integer `rank`"""
+
+    connection = connections[queryset.db]
+    return get_backend(connection).search(queryset, text)
@@ -1,33 +1,146 @@
+from django.db.models.functions import Lower
 from rest_framework import serializers
 from core.models import Tag, Ingredient, Recipe
+from .fields import UserPrimaryKeyRelatedField
 
 
-class TagSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """Drop the fields missing from the `fields` context entry"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        fields = self.context.get('fields')
+        if fields is not None:
+            for name in set(self.fields).difference(fields):
+                self.fields.pop(name)
+
+
+class RecipeAttrListSerializer(serializers.ListSerializer):
+    """Create many recipe attributes with a fixed number of queries"""
+
+    def create(self, validated_data):
+        """Return existing or new objects in input order"""
+
+        if not validated_data:
+            return []
+
+        model = self.child.Meta.model
+        return model.objects.bulk_get_or_create(
+            validated_data[0]['user'],
+            [attrs['name'] for attrs in validated_data],
+        )
+
+
+class BaseRecipeAttrSerializer(SparseFieldsMixin,
+                               serializers.ModelSerializer):
+    """Base serializer for user owned recipe attributes
+
+    A single new or renamed object must have a new name,
+    case-insensitively, while lists return the existing objects of names
+    already taken. The owner comes from the request, else the instance,
+    else a `user` context entry.
+    """
+
+    def get_owner(self):
+        request = self.context.get('request')
+        if request is not None:
+            return request.user
+        if self.instance is not None:
+            return self.instance.user
+        return self.context.get('user')
+
+    def validate_name(self, value):
+        owner = self.get_owner()
+        if self.parent is not None or owner is None:
+            return value
+
+        model = self.Meta.model
+        others = model.objects.annotate(name_lower=Lower('name'))\
+                              .filter(user=owner, name_lower=value.lower())
+        if self.instance is not None:
+            others = others.exclude(pk=self.instance.pk)
+        if others.exists():
+            raise serializers.ValidationError(
+                f'A {model._meta.verbose_name} with this name already '
+                f'exists.'
+            )
+        return value
+
+    def create(self, validated_data):
+        """Return the existing object with the same name or create it
+
+        The name was checked to be free, this covers a concurrent create.
+        """
+
+        model = self.Meta.model
+        return model.objects.bulk_get_or_create(
+            validated_data['user'],
+            [validated_data['name']],
+        )[0]
+
+    def update(self, instance, validated_data):
+        """Save only the given fields, `usage` is changed by F() updates"""
+
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=list(validated_data))
+        return instance
+
+
+class TagSerializer(BaseRecipeAttrSerializer):
     """Serializer for tag objects"""
 
     class Meta:
         model = Tag
         fields = ('id', 'name')
         read_only_fields = ('id',)
+        list_serializer_class = RecipeAttrListSerializer
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(BaseRecipeAttrSerializer):
     """Serializer for Ingredient objects"""
 
     class Meta:
         model = Ingredient
         fields = ('id', 'name')
         read_only_fields = ('id',)
+        list_serializer_class = RecipeAttrListSerializer
+
+
+class ExpandableFieldsMixin:
+    """Inline the related objects listed in the `expand` context entry
+
+    `expandable_fields` maps a relation to the serializer of its objects.
+    """
 
+    expandable_fields = {}
 
-class RecipeSerializer(serializers.ModelSerializer):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        for name in self.context.get('expand') or ():
+            if name in self.fields:
+                self.fields[name] = self.expandable_fields[name](
+                    many=True, read_only=True
+                )
+
+
+class RecipeSerializer(SparseFieldsMixin,
+                       ExpandableFieldsMixin,
+                       serializers.ModelSerializer):
     """Serialize a recipe"""
 
-    ingredients = serializers.PrimaryKeyRelatedField(
+    expandable_fields = {
+        'ingredients': IngredientSerializer,
+        'tags': TagSerializer,
+    }
+
+    ingredients = UserPrimaryKeyRelatedField(
         queryset=Ingredient.objects.all(),
         many=True
     )
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = UserPrimaryKeyRelatedField(
         queryset=Tag.objects.all(),
         many=True
     )
@@ -37,3 +150,21 @@ class RecipeSerializer(serializers.ModelSerializer):
         fields = ('id', 'title', 'ingredients', 'tags', 'time_minutes',
                   'price', 'link')
         read_only_fields = ('id',)
+
+
+class RecipeImportSerializer(serializers.ModelSerializer):
+    """Validate a recipe imported with tag and ingredient names"""
+
+    ingredients = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        default=list
+    )
+    tags = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        default=list
+    )
+
+    class Meta:
+        model = Recipe
+        fields = ('title', 'ingredients', 'tags', 'time_minutes', 'price',
+                  'link')
@@ -0,0 +1,266 @@
+from django.db.models.signals import (
+    pre_save, post_save, pre_delete, post_delete, m2m_changed
+)
+from django.dispatch import receiver
+
+from core.models import Tag, Ingredient, Recipe
+from . import stats
+from .cache import invalidate_lists_on_commit
+from .filters import apply_m2m_change, bump_index_version
+from .search import delete_from_search_index, update_search_index_on_commit
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def invalidate_attr_saved(sender, instance, created, **kwargs):
+    """Invalidate the tag or ingredient list of the owner
+
+    Renames also change which recipes match a search.
+    """
+
+    if created:
+        invalidate_lists_on_commit(instance.user_id,
+                                   sender._meta.model_name)
+    else:
+        invalidate_lists_on_commit(instance.user_id,
+                                   sender._meta.model_name, 'recipe')
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_attr_deleted(sender, instance, **kwargs):
+    """Invalidate the attribute list and the recipes that referenced it"""
+
+    invalidate_lists_on_commit(instance.user_id, sender._meta.model_name,
+                               'recipe')
+
+
+@receiver(post_save, sender=Recipe)
+def invalidate_recipe(sender, instance, **kwargs):
+    """Invalidate the recipe list of the owner"""
+
+    invalidate_lists_on_commit(instance.user_id, 'recipe')
+
+
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe_deleted(sender, instance, **kwargs):
+    """Invalidate the recipe list and the attribute usage orderings"""
+
+    invalidate_lists_on_commit(instance.user_id, 'recipe', 'tag',
+                               'ingredient')
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_recipe_relations(sender, instance, action, **kwargs):
+    """Invalidate the recipe list and the usage ordering of the changed
+    tags or ingredients
+    """
+
+    if action.startswith('post_'):
+        model_name = 'tag' if sender is Recipe.tags.through else 'ingredient'
+        invalidate_lists_on_commit(instance.user_id, 'recipe', model_name)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def update_recipe_index(sender, instance, action, reverse, pk_set,
+                        **kwargs):
+    """Apply tag or ingredient changes to the recipe filter index"""
+
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        relation = 'tags' if sender is Recipe.tags.through else 'ingredients'
+        apply_m2m_change(relation, instance, action, reverse, pk_set)
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+def expire_recipe_index(sender, instance, **kwargs):
+    """Rebuild the recipe filter index after cascading deletes"""
+
+    bump_index_version(instance.user_id)
+
+
+@receiver(post_save, sender=Recipe)
+def index_recipe(sender, instance, **kwargs):
+    """Update the search document of a saved recipe"""
+
+    update_search_index_on_commit(instance.user_id, [instance.pk])
+
+
+@receiver(post_delete, sender=Recipe)
+def unindex_recipe(sender, instance, **kwargs):
+    """Remove the search document of a deleted recipe"""
+
+    delete_from_search_index([instance.pk])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def index_recipe_relations(sender, instance, action, reverse, pk_set,
+                           **kwargs):
+    """Update the search documents of recipes whose relations changed"""
+
+    if not reverse:
+        if action.startswith('post_'):
+            update_search_index_on_commit(instance.user_id, [instance.pk])
+    elif action == 'pre_clear':
+        instance._search_recipe_ids = list(
+            instance.recipe_set.values_list('id', flat=True)
+        )
+    elif action == 'post_clear':
+        update_search_index_on_commit(instance.user_id,
+                                      instance._search_recipe_ids)
+    elif action in ('post_add', 'post_remove'):
+        update_search_index_on_commit(instance.user_id, pk_set)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def index_renamed_attr(sender, instance, created, **kwargs):
+    """Update the search documents of recipes using a renamed attribute"""
+
+    if not created:
+        update_search_index_on_commit(
+            instance.user_id, instance.recipe_set.values_list('id', flat=True)
+        )
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def collect_attr_recipes(sender, instance, **kwargs):
+    """Remember the recipes of an attribute before it is deleted"""
+
+    instance._search_recipe_ids = list(
+        instance.recipe_set.values_list('id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def index_deleted_attr(sender, instance, **kwargs):
+    """Update the search documents of recipes of a deleted attribute"""
+
+    update_search_index_on_commit(instance.user_id,
+                                  instance._search_recipe_ids)
+
+
+@receiver(pre_save, sender=Recipe)
+def collect_recipe_stats(sender, instance, **kwargs):
+    """Remember the stored values of a recipe about to be updated
+
+    They are known without a query for recipes loaded from the database.
+    """
+
+    instance._stats_old = None
+    if instance._state.adding or stats.suspended():
+        return
+
+    loaded = getattr(instance, '_loaded_values', {})
+    if 'time_minutes' in loaded and 'price' in loaded:
+        instance._stats_old = (loaded['time_minutes'], loaded['price'])
+    else:
+        instance._stats_old = Recipe.objects.filter(pk=instance.pk)\
+            .values_list('time_minutes', 'price')\
+            .first()
+
+
+@receiver(post_save, sender=Recipe)
+def count_recipe_saved(sender, instance, **kwargs):
+    """Move a saved recipe to its new time and price counters"""
+
+    if stats.suspended():
+        return
+
+    deltas = stats.recipe_deltas(instance.time_minutes, instance.price)
+    if instance._stats_old is not None:
+        deltas.update(stats.recipe_deltas(*instance._stats_old, delta=-1))
+    stats.adjust(instance.user_id, deltas)
+
+    instance._loaded_values = {**getattr(instance, '_loaded_values', {}),
+                               'time_minutes': instance.time_minutes,
+                               'price': instance.price}
+
+
+@receiver(pre_delete, sender=Recipe)
+def collect_recipe_relations(sender, instance, **kwargs):
+    """Remember the relations of a recipe before it is deleted
+
+    Deleting the recipe removes its links without m2m_changed.
+    """
+
+    instance._deleted_relations = {
+        model: list(getattr(instance, relation).values_list('id', flat=True))
+        for relation, model in stats.RELATION_MODELS
+    }
+
+
+@receiver(post_delete, sender=Recipe)
+def count_recipe_deleted(sender, instance, **kwargs):
+    """Remove a deleted recipe from the counters"""
+
+    stats.adjust(instance.user_id, stats.recipe_deltas(
+        instance.time_minutes, instance.price, -1
+    ))
+
+
+@receiver(post_delete, sender=Recipe)
+def release_attr_usage(sender, instance, **kwargs):
+    """Decrement the usage of the tags and ingredients of a deleted recipe"""
+
+    for model, pks in instance._deleted_relations.items():
+        model.objects.add_usage(dict.fromkeys(pks, -1))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def collect_removed_links(sender, instance, action, reverse, pk_set,
+                          **kwargs):
+    """Remember which links a remove or clear is about to delete
+
+    pk_set of a remove also holds ids that weren't linked. The links are
+    locked, so a concurrent removal of the same links waits for this one
+    and then finds them gone instead of counting them twice.
+    """
+
+    if action not in ('pre_remove', 'pre_clear'):
+        return
+
+    relation, _ = stats.relation_model(sender)
+    m2m = getattr(Recipe, relation).field
+    own, other = m2m.m2m_column_name(), m2m.m2m_reverse_name()
+    if reverse:
+        own, other = other, own
+    links = sender.objects.filter(**{own: instance.pk})
+    if action == 'pre_remove':
+        links = links.filter(**{f'{other}__in': pk_set})
+    instance._removed_links = set(
+        links.select_for_update().values_list(other, flat=True)
+    )
+
+
+def changed_links(action, instance, pk_set):
+    """Return (ids, delta) of a post_* m2m_changed action, or None"""
+
+    if action == 'post_add':
+        return pk_set, 1
+    if action in ('post_remove', 'post_clear'):
+        return instance._removed_links, -1
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def count_attr_usage(sender, instance, action, reverse, pk_set, **kwargs):
+    """Update the usage of tags or ingredients as links change"""
+
+    changed = changed_links(action, instance, pk_set)
+    if changed is None:
+        return
+
+    pks, delta = changed
+    _, model = stats.relation_model(sender)
+    if reverse:
+        model.objects.add_usage({instance.pk: delta * len(pks)})
+    else:
+        model.objects.add_usage(dict.fromkeys(pks, delta))
@@ -0,0 +1,208 @@
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from decimal import Decimal
+from django.db import connections, router, transaction
+from django.db.models import Count
+
+from core.models import Tag, Ingredient, Recipe, RecipeStatsCounter
+
+PRICE_BUCKET_WIDTH = Decimal('5.00')
+
+PERCENTILES = (50, 90, 99)
+
+# Rows per counter upsert, keeps the bound parameters below SQLite's limit
+UPSERT_BATCH_SIZE = 200
+
+_local = threading.local()
+
+RELATION_MODELS = (
+    ('tags', Tag),
+    ('ingredients', Ingredient),
+)
+
+
+def relation_model(through):
+    """Return the (relation, related model) of a Recipe through model"""
+
+    for relation, model in RELATION_MODELS:
+        if getattr(Recipe, relation).through is through:
+            return relation, model
+
+
+def price_bucket(price):
+    """Return the histogram bucket of a price"""
+
+    return int(Decimal(str(price)) // PRICE_BUCKET_WIDTH)
+
+
+def recipe_deltas(time_minutes, price, delta=1):
+    """Return the counter changes of adding or removing one recipe"""
+
+    return Counter({
+        (RecipeStatsCounter.TIME_MINUTES, time_minutes): delta,
+        (RecipeStatsCounter.PRICE_BUCKET, price_bucket(price)): delta,
+    })
+
+
+def adjust(user_id, deltas):
+    """Apply {(kind, key): delta} to a user's counters
+
+    Every counter is changed by one upsert adding its delta, so
+    concurrent requests don't lose counts and a missing counter costs
+    no extra query. Counters dropping to zero are removed.
+    """
+
+    rows = sorted((kind, key, delta)
+                  for (kind, key), delta in deltas.items() if delta)
+    if not rows:
+        return
+
+    using = router.db_for_write(RecipeStatsCounter)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    table = quote(RecipeStatsCounter._meta.db_table)
+    user, kind, key, count = (quote(column) for column in
+                              ('user_id', 'kind', 'key', 'count'))
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            batch = rows[start:start + UPSERT_BATCH_SIZE]
+            cursor.execute(
+                f'INSERT INTO {table} ({user}, {kind}, {key}, {count}) '
+                f'VALUES {", ".join(["(%s, %s, %s, %s)"] * len(batch))} '
+                f'ON CONFLICT ({user}, {kind}, {key}) DO UPDATE '
+                f'SET {count} = {table}.{count} + EXCLUDED.{count}',
+                [value for row in batch for value in (user_id, *row)],
+            )
+        if any(delta < 0 for _, _, delta in rows):
+            RecipeStatsCounter.objects.filter(user_id=user_id,
+                                              count__lte=0).delete()
+
+
+@contextmanager
+def suspend():
+    """Don't count the recipes saved in the block, for callers adding
+    them to the counters in bulk
+    """
+
+    previous = suspended()
+    _local.suspended = True
+    try:
+        yield
+    finally:
+        _local.suspended = previous
+
+
+def suspended():
+    """Return whether saved recipes are currently left uncounted"""
+
+    return getattr(_local, 'suspended', False)
+
+
+def compute(user_id):
+    """Return the {(kind, key): count} of a user from a full recompute"""
+
+    counts = Counter()
+    recipes = Recipe.objects.filter(user_id=user_id)
+    for time_minutes, count in recipes.values_list('time_minutes')\
+                                      .annotate(count=Count('id'))\
+                                      .order_by():
+        counts[RecipeStatsCounter.TIME_MINUTES, time_minutes] = count
+    for price, count in recipes.values_list('price')\
+                               .annotate(count=Count('id'))\
+                               .order_by():
+        counts[RecipeStatsCounter.PRICE_BUCKET, price_bucket(price)] += count
+
+    return counts
+
+
+def stored(user_id):
+    """Return the {(kind, key): count} currently stored for a user"""
+
+    counters = RecipeStatsCounter.objects.filter(user_id=user_id)\
+                                         .values_list('kind', 'key', 'count')
+    return Counter({(kind, key): count for kind, key, count in counters})
+
+
+def rebuild(user_id):
+    """Replace a user's counters with a full recompute"""
+
+    with transaction.atomic(using=router.db_for_write(RecipeStatsCounter)):
+        RecipeStatsCounter.objects.filter(user_id=user_id).delete()
+        RecipeStatsCounter.objects.bulk_create(
+            RecipeStatsCounter(user_id=user_id, kind=kind, key=key,
+                               count=count)
+            for (kind, key), count in compute(user_id).items()
+        )
+
+
+def check(user_id):
+    """Return {(kind, key): (stored, computed)} for mismatched counters"""
+
+    actual, expected = stored(user_id), compute(user_id)
+    return {
+        counter: (actual[counter], expected[counter])
+        for counter in set(actual) | set(expected)
+        if actual[counter] != expected[counter]
+    }
+
+
+def percentile(distribution, total, percent):
+    """Return the nearest-rank percentile of a sorted (value, count) list"""
+
+    rank = max(1, -(-total * percent // 100))
+    seen = 0
+    for value, count in distribution:
+        seen += count
+        if seen >= rank:
+            return value
+
+
+def top_objects(model, user_id, limit):
+    """Return the `limit` most used objects with their recipe counts"""
+
+    top = model.objects.filter(user_id=user_id, usage__gt=0)\
+                       .order_by('-usage', 'id')\
+                       .values_list('id', 'name', 'usage')[:limit]
+    return [{'id': pk, 'name': name, 'count': count}
+            for pk, name, count in top]
+
+
+def summary(user_id, limit=10):
+    """Return the recipe statistics of a user from the stored counters"""
+
+    counters = {kind: {} for kind, _ in RecipeStatsCounter.KIND_CHOICES}
+    for (kind, key), count in stored(user_id).items():
+        counters[kind][key] = count
+
+    times = sorted(counters[RecipeStatsCounter.TIME_MINUTES].items())
+    total = sum(count for _, count in times)
+    time_minutes = {'mean': None, 'min': None, 'max': None}
+    time_minutes.update((f'p{percent}', None) for percent in PERCENTILES)
+    if total:
+        time_minutes.update(
+            # Rounded, so every JSON renderer formats it the same way
+            mean=round(sum(value * count for value, count in times) / total,
+                       2),
+            min=times[0][0],
+            max=times[-1][0],
+        )
+        time_minutes.update(
+            (f'p{percent}', percentile(times, total, percent))
+            for percent in PERCENTILES
+        )
+
+    prices = sorted(counters[RecipeStatsCounter.PRICE_BUCKET].items())
+    return {
+        'recipe_count': total,
+        'time_minutes': time_minutes,
+        'price_histogram': [
+            {'min': str(bucket * PRICE_BUCKET_WIDTH),
+             'max': str((bucket + 1) * PRICE_BUCKET_WIDTH),
+             'count': count}
+            for bucket, count in prices
+        ],
+        'top_tags': top_objects(Tag, user_id, limit),
+        'top_ingredients': top_objects(Ingredient, user_id, limit),
+    }
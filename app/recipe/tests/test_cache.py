@@ -0,0 +1,171 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.test import TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Recipe, ListVersion
+from recipe.cache import list_cache, list_version
+
+User = get_user_model()
+
+TAGS_URL = reverse('recipe:tag-list')
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class ListCacheTests(TransactionTestCase):
+    """Test caching of the list endpoints
+
+    Lists are invalidated on commit, which TestCase never reaches.
+    """
+
+    def setUp(self) -> None:
+        list_cache().clear()
+        self.user = User.objects.create_user('test@test.com', 'pass1234')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(user=self.user, title='Salad',
+                                            time_minutes=5, price='2.00')
+
+    def test_list_served_from_cache(self):
+        """Test a repeated list only reads the list version"""
+
+        Tag.objects.create(user=self.user, name='Vegan')
+        response = self.client.get(TAGS_URL)
+
+        with self.assertNumQueries(1):
+            cached = self.client.get(TAGS_URL)
+
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached.data, response.data)
+
+    def test_query_params_cached_separately(self):
+        """Test each page of a list is cached under its own key"""
+
+        Tag.objects.create(user=self.user, name='Vegan')
+        Tag.objects.create(user=self.user, name='Dessert')
+        self.client.get(TAGS_URL)
+
+        response = self.client.get(TAGS_URL, {'page_size': 1})
+
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_tag_saved_invalidates(self):
+        """Test saving a tag invalidates the tag list"""
+
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.client.get(TAGS_URL)
+        tag.name = 'Vegetarian'
+        tag.save()
+
+        response = self.client.get(TAGS_URL)
+
+        self.assertEqual(response.data['results'][0]['name'], 'Vegetarian')
+
+    def test_invalidated_on_commit(self):
+        """Test a write bumps the list version only once committed"""
+
+        with transaction.atomic():
+            Tag.objects.create(user=self.user, name='Vegan')
+            self.assertEqual(list_version(self.user.id, 'tag'), 0)
+
+        self.assertEqual(list_version(self.user.id, 'tag'), 1)
+
+    def test_tag_bulk_created_invalidates(self):
+        """Test creating tags through the api invalidates the tag list"""
+
+        self.client.get(TAGS_URL)
+        self.client.post(TAGS_URL, [{'name': 'Vegan'}], format='json')
+
+        response = self.client.get(TAGS_URL)
+
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_recipe_relations_invalidate(self):
+        """Test adding, removing and deleting tags invalidates recipes"""
+
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.client.get(RECIPES_URL)
+
+        self.recipe.tags.add(tag)
+        response = self.client.get(RECIPES_URL)
+        self.assertEqual(response.data['results'][0]['tags'], [tag.id])
+
+        tag.delete()
+        response = self.client.get(RECIPES_URL)
+        self.assertEqual(response.data['results'][0]['tags'], [])
+
+    def test_other_users_unaffected(self):
+        """Test that invalidation is scoped to the owner"""
+
+        other_user = User.objects.create_user('other@test.com', 'pass1234')
+        self.client.get(RECIPES_URL)
+        Recipe.objects.create(user=other_user, title='Soup',
+                              time_minutes=5, price='2.00')
+
+        with self.assertNumQueries(1):
+            self.client.get(RECIPES_URL)
+
+
+class ConditionalListTests(TransactionTestCase):
+    """Test ETag based conditional GETs of the list endpoints"""
+
+    def setUp(self) -> None:
+        list_cache().clear()
+        self.user = User.objects.create_user('test@test.com', 'pass1234')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_unchanged_list_not_modified(self):
+        """Test a matching If-None-Match returns 304 after one query"""
+
+        Tag.objects.create(user=self.user, name='Vegan')
+        etag = self.client.get(TAGS_URL)['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def test_changed_list_returns_new_etag(self):
+        """Test a write changes the ETag of the list"""
+
+        etag = self.client.get(RECIPES_URL)['ETag']
+        Recipe.objects.create(user=self.user, title='Salad',
+                              time_minutes=5, price='2.00')
+
+        response = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_version_bumped_elsewhere_returns_new_etag(self):
+        """Test a version bumped by another process changes the ETag"""
+
+        Tag.objects.create(user=self.user, name='Vegan')
+        etag = self.client.get(TAGS_URL)['ETag']
+        ListVersion.objects.filter(user=self.user, model_name='tag')\
+                           .update(version=F('version') + 1)
+
+        response = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_differs_per_query_and_user(self):
+        """Test each page and each user gets its own ETag"""
+
+        etag = self.client.get(TAGS_URL)['ETag']
+        page_etag = self.client.get(TAGS_URL, {'page_size': 1})['ETag']
+
+        other_user = User.objects.create_user('other@test.com', 'pass1234')
+        self.client.force_authenticate(other_user)
+        response = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertNotEqual(etag, page_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -0,0 +1,216 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.cache import caches
+from django.core.management.base import CommandError
+from django.db import connections
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import override_settings
+
+from core import sharding
+from core.models import Tag, Ingredient, Recipe
+from core.tests.databases import SQLiteShardsMixin
+from recipe import stats
+
+User = get_user_model()
+
+
+class ImportRecipesCommandTests(TestCase):
+    """Test the import_recipes command"""
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_user('test@test.com', 'pass1234')
+
+    def test_import_recipes_from_file(self):
+        """Test importing recipes from an NDJSON file"""
+
+        recipe = {'title': 'Salad', 'time_minutes': 5, 'price': '2.50',
+                  'tags': ['Vegan'], 'ingredients': ['Kale']}
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson',
+                                         delete=False) as f:
+            f.write(json.dumps(recipe) + '\n')
+        self.addCleanup(os.remove, f.name)
+
+        out = StringIO()
+        call_command('import_recipes', self.user.email, f.name, stdout=out)
+
+        self.assertIn('imported 1 recipes', out.getvalue())
+        self.assertTrue(Recipe.objects.filter(user=self.user,
+                                              title='Salad').exists())
+
+    def test_import_recipes_unknown_user(self):
+        """Test importing for a missing user fails"""
+
+        with self.assertRaises(CommandError):
+            call_command('import_recipes', 'missing@test.com', '-')
+
+
+class BenchmarkRecipeFiltersCommandTests(TestCase):
+    """Test the benchmark_recipe_filters command"""
+
+    def test_benchmark_recipe_filters(self):
+        """Test both filter backends agree and the data is rolled back"""
+
+        out = StringIO()
+        call_command('benchmark_recipe_filters', recipes=20, tags=5,
+                     ingredients=5, per_recipe=2, queries=5, stdout=out)
+
+        self.assertIn('ms/query', out.getvalue())
+        self.assertNotIn('[ERROR]', out.getvalue())
+        self.assertFalse(Recipe.objects.exists())
+
+
+class BenchmarkRenderersCommandTests(TestCase):
+    """Test the benchmark_renderers command"""
+
+    def test_benchmark_renderers(self):
+        """Test every format is timed and the data is rolled back"""
+
+        out = StringIO()
+        call_command('benchmark_renderers', recipes=5, repeat=1, stdout=out)
+
+        for name in ('json', 'orjson', 'msgpack'):
+            self.assertIn(f'[INFO] {name}: encode', out.getvalue())
+        self.assertNotIn('[ERROR]', out.getvalue())
+        self.assertFalse(Recipe.objects.exists())
+
+
+class BenchmarkSerializersCommandTests(TestCase):
+    """Test the benchmark_serializers command"""
+
+    def test_benchmark_serializers(self):
+        """Test both read paths agree and the data is rolled back"""
+
+        out = StringIO()
+        call_command('benchmark_serializers', recipes=5, repeat=1,
+                     stdout=out)
+
+        self.assertIn('us/row', out.getvalue())
+        self.assertNotIn('[ERROR]', out.getvalue())
+        self.assertFalse(Recipe.objects.exists())
+
+
+@override_settings(SHARDS=['default', 'shard1', 'shard2'])
+class MoveUserShardCommandTests(SQLiteShardsMixin, TransactionTestCase):
+    """Test the move_user_shard command
+
+    Writes update counters and indexes on commit, which TestCase never
+    reaches.
+    """
+
+    def setUp(self) -> None:
+        caches['default'].clear()
+        self.user = User.objects.create_user('test@test.com', 'pass1234')
+        sharding.set_user_shard(self.user.id, 'default')
+        with sharding.for_user(self.user.id):
+            self.tag = Tag.objects.create(user=self.user, name='Vegan')
+            self.ingredient = Ingredient.objects.create(user=self.user,
+                                                        name='Kale')
+            self.recipe = Recipe.objects.create(
+                user=self.user, title='Salad', time_minutes=5, price='2.50'
+            )
+            self.recipe.tags.add(self.tag)
+            self.recipe.ingredients.add(self.ingredient)
+
+    def test_move_user(self):
+        """Test a user's data is moved with its ids and counters"""
+
+        out = StringIO()
+        call_command('move_user_shard', self.user.email, 'shard1',
+                     stdout=out)
+
+        self.assertIn('from default to shard1', out.getvalue())
+        self.assertEqual(sharding.shard_for_user(self.user.id), 'shard1')
+        self.assertFalse(Recipe.objects.using('default').exists())
+        self.assertFalse(Tag.objects.using('default').exists())
+        recipe = Recipe.objects.using('shard1').get(pk=self.recipe.id)
+        self.assertEqual(list(recipe.tags.all()), [self.tag])
+        self.assertEqual(list(recipe.ingredients.all()), [self.ingredient])
+        self.assertEqual(Tag.objects.using('shard1').get().usage, 1)
+        with sharding.for_user(self.user.id):
+            self.assertEqual(stats.check(self.user.id), {})
+            self.assertTrue(stats.stored(self.user.id))
+
+    def test_move_empties_source(self):
+        """Test no row or search document of the user is left behind"""
+
+        call_command('move_user_shard', self.user.email, 'shard1',
+                     stdout=StringIO())
+
+        for model in sharding.sharded_models():
+            self.assertFalse(model.objects.using('default').exists(),
+                             model._meta.db_table)
+        with connections['default'].cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM core_recipe_search '
+                           'WHERE rowid = %s', [self.recipe.id])
+            self.assertEqual(cursor.fetchone(), (0,))
+
+    def test_moved_ids_kept(self):
+        """Test moved rows keep their ids and new rows use the shard's"""
+
+        call_command('move_user_shard', self.user.email, 'shard2',
+                     stdout=StringIO())
+
+        with sharding.for_user(self.user.id):
+            new = Tag.objects.create(user=self.user, name='Spicy')
+            self.assertEqual(Tag.objects.get(name='Vegan').id, self.tag.id)
+        first, last = sharding.id_range('shard2')
+        self.assertTrue(first <= new.id <= last)
+
+    def test_move_back(self):
+        """Test a user can be moved back, leaving no copy behind"""
+
+        call_command('move_user_shard', self.user.email, 'shard2',
+                     stdout=StringIO())
+        call_command('move_user_shard', self.user.email, 'default',
+                     stdout=StringIO())
+
+        self.assertEqual(Recipe.objects.using('default').get().id,
+                         self.recipe.id)
+        self.assertFalse(Recipe.objects.using('shard2').exists())
+        self.assertFalse(User.objects.using('shard2').exists())
+
+    def test_move_id_collision(self):
+        """Test a move is rolled back when ids are taken on the target"""
+
+        other = User.objects.create_user('other@test.com', 'pass1234')
+        sharding.set_user_shard(other.id, 'shard1')
+        sharding.copy_user(other.id, 'shard1')
+        Tag(id=self.tag.id, user=other, name='Taken').save()
+
+        with self.assertRaisesMessage(CommandError, 'already used'):
+            call_command('move_user_shard', self.user.email, 'shard1',
+                         stdout=StringIO())
+
+        self.assertEqual(sharding.user_shard_state(self.user.id),
+                         ('default', False))
+        self.assertFalse(Recipe.objects.using('shard1').exists())
+        self.assertTrue(Recipe.objects.using('default').exists())
+
+    def test_move_to_same_shard(self):
+        """Test moving a user to their current shard does nothing"""
+
+        out = StringIO()
+        call_command('move_user_shard', self.user.email, 'default',
+                     stdout=out)
+
+        self.assertIn('already on default', out.getvalue())
+
+    def test_move_already_moving(self):
+        """Test a user can't be moved twice at once"""
+
+        sharding.set_user_shard(self.user.id, 'default', locked=True)
+
+        with self.assertRaisesMessage(CommandError, 'already being moved'):
+            call_command('move_user_shard', self.user.email, 'shard1',
+                         stdout=StringIO())
+
+    def test_move_to_unknown_shard(self):
+        """Test moving to a database that isn't a shard fails"""
+
+        with self.assertRaisesMessage(CommandError, 'is not one of'):
+            call_command('move_user_shard', self.user.email, 'replica',
+                         stdout=StringIO())
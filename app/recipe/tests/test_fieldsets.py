@@ -0,0 +1,176 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.cache import list_cache
+
+User = get_user_model()
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+class SparseFieldsetTests(TestCase):
+    """Test limiting responses with `?fields=`"""
+
+    def setUp(self) -> None:
+        list_cache().clear()
+        self.user = User.objects.create_user('test@test.com', 'testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.recipe = Recipe.objects.create(user=self.user, title='Soup',
+                                            time_minutes=10, price='4.50')
+        self.recipe.tags.add(Tag.objects.create(user=self.user, name='Hot'))
+        self.recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Leek')
+        )
+
+    def test_list_requested_fields_only(self):
+        """Test only the requested columns are selected and returned"""
+
+        for enabled in (False, True):
+            list_cache().clear()
+            with self.settings(RECIPE_VALUES_LIST=enabled):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(RECIPES_URL,
+                                               {'fields': 'title,id'})
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data['results'],
+                             [{'id': self.recipe.id, 'title': 'Soup'}])
+            # list version + recipes
+            self.assertEqual(len(queries), 2)
+            self.assertNotIn('price', queries[1]['sql'])
+
+    def test_unrequested_relations_not_prefetched(self):
+        """Test only the requested relation is loaded"""
+
+        with self.settings(RECIPE_VALUES_LIST=False):
+            with self.assertNumQueries(3):
+                response = self.client.get(RECIPES_URL,
+                                           {'fields': 'id,tags'})
+
+        tag = self.recipe.tags.get()
+        self.assertEqual(response.data['results'],
+                         [{'id': self.recipe.id, 'tags': [tag.id]}])
+
+    def test_relations_without_id(self):
+        """Test relations are returned when the id isn't requested"""
+
+        response = self.client.get(RECIPES_URL, {'fields': 'ingredients'})
+
+        ingredient = self.recipe.ingredients.get()
+        self.assertEqual(response.data['results'],
+                         [{'ingredients': [ingredient.id]}])
+
+    def test_detail_and_attr_fields(self):
+        """Test fields apply to recipe detail and tag lists"""
+
+        url = reverse('recipe:recipe-detail', args=(self.recipe.id,))
+        response = self.client.get(url, {'fields': 'price'})
+        self.assertEqual(response.data, {'price': '4.50'})
+
+        response = self.client.get(TAGS_URL, {'fields': 'name'})
+        self.assertEqual(response.data['results'], [{'name': 'Hot'}])
+
+    def test_unknown_field_rejected(self):
+        """Test unknown field names are a bad request"""
+
+        response = self.client.get(RECIPES_URL, {'fields': 'id,secret'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('secret', str(response.data['fields']))
+
+    def test_fields_ignored_on_write(self):
+        """Test creating ignores `?fields=` and returns every field"""
+
+        response = self.client.post(f'{RECIPES_URL}?fields=id', {
+            'title': 'Stew',
+            'time_minutes': 60,
+            'price': '7.00',
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['title'], 'Stew')
+
+
+class ExpandTests(TestCase):
+    """Test inlining tags and ingredients with `?expand=`"""
+
+    def setUp(self) -> None:
+        list_cache().clear()
+        self.user = User.objects.create_user('test@test.com', 'testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def sample_recipe(self, i):
+        recipe = Recipe.objects.create(user=self.user, title=f'Recipe {i}',
+                                       time_minutes=i, price='1.00')
+        recipe.tags.add(Tag.objects.create(user=self.user, name=f'T{i}'))
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name=f'I{i}')
+        )
+        return recipe
+
+    def test_expand_list_constant_queries(self):
+        """Test expanded lists use the same queries for any page size"""
+
+        params = {'expand': 'tags,ingredients'}
+        for recipes, expected in ((1, 1), (5, 5)):
+            for i in range(Recipe.objects.count(), recipes):
+                self.sample_recipe(i)
+
+            responses = []
+            for enabled, queries in ((False, 4), (True, 3)):
+                list_cache().clear()
+                with self.settings(RECIPE_VALUES_LIST=enabled):
+                    with self.assertNumQueries(queries):
+                        responses.append(self.client.get(RECIPES_URL,
+                                                         params))
+
+            self.assertEqual(responses[0].data, responses[1].data)
+            self.assertEqual(len(responses[0].data['results']), expected)
+
+    def test_expand_detail(self):
+        """Test a recipe detail inlines its tags and ingredients"""
+
+        recipe = self.sample_recipe(0)
+        tag = recipe.tags.get()
+        url = reverse('recipe:recipe-detail', args=(recipe.id,))
+
+        with self.assertNumQueries(3):
+            response = self.client.get(url, {'expand': 'tags'})
+
+        self.assertEqual(response.data['tags'],
+                         [{'id': tag.id, 'name': tag.name}])
+        self.assertEqual(response.data['ingredients'],
+                         [recipe.ingredients.get().id])
+
+    def test_expand_with_fields(self):
+        """Test expansion combines with sparse fieldsets"""
+
+        recipe = self.sample_recipe(0)
+        ingredient = recipe.ingredients.get()
+
+        response = self.client.get(RECIPES_URL, {
+            'fields': 'title,ingredients',
+            'expand': 'ingredients,tags',
+        })
+
+        self.assertEqual(response.data['results'], [{
+            'title': recipe.title,
+            'ingredients': [{'id': ingredient.id, 'name': ingredient.name}],
+        }])
+
+    def test_unknown_expansion_rejected(self):
+        """Test only tags and ingredients can be expanded"""
+
+        response = self.client.get(RECIPES_URL, {'expand': 'user'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,170 @@
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient, Recipe
+from recipe import filters
+from recipe.cache import list_cache
+
+User = get_user_model()
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def sample_recipe(user, title):
+    """Create and return a sample recipe"""
+
+    return Recipe.objects.create(user=user, title=title, time_minutes=5,
+                                 price='5.00')
+
+
+class RecipeFilterTests(TransactionTestCase):
+    """Test filtering recipes by tags and ingredients
+
+    Index changes are applied on commit, which TestCase never reaches.
+    """
+
+    def setUp(self) -> None:
+        list_cache().clear()
+        filters._indexes.clear()
+        self.user = User.objects.create_user('test@test.com', 'pass1234')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.quick = Tag.objects.create(user=self.user, name='Quick')
+        self.kale = Ingredient.objects.create(user=self.user, name='Kale')
+
+        self.salad = sample_recipe(self.user, 'Salad')
+        self.salad.tags.add(self.vegan, self.quick)
+        self.salad.ingredients.add(self.kale)
+        self.soup = sample_recipe(self.user, 'Soup')
+        self.soup.tags.add(self.vegan)
+        self.steak = sample_recipe(self.user, 'Steak')
+        self.steak.tags.add(self.quick)
+
+    def get_titles(self, **params):
+        response = self.client.get(RECIPES_URL, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(recipe['title'] for recipe in response.data['results'])
+
+    def assert_filters(self):
+        tags = f'{self.vegan.id},{self.quick.id}'
+
+        self.assertEqual(self.get_titles(tags=self.vegan.id),
+                         ['Salad', 'Soup'])
+        self.assertEqual(self.get_titles(tags=tags),
+                         ['Salad', 'Soup', 'Steak'])
+        self.assertEqual(self.get_titles(tags=tags, match='all'),
+                         ['Salad'])
+        self.assertEqual(self.get_titles(tags=self.quick.id,
+                                         ingredients=self.kale.id),
+                         ['Salad'])
+
+    @override_settings(RECIPE_FILTER_BACKEND='bitmap')
+    def test_filter_bitmap(self):
+        """Test filtering recipes through the bitmap index"""
+
+        self.assert_filters()
+
+    @override_settings(RECIPE_FILTER_BACKEND='bitmap',
+                       RECIPE_INDEX_MAX_IDS=1)
+    def test_filter_bitmap_many_matches(self):
+        """Test pages above RECIPE_INDEX_MAX_IDS are filtered with SQL"""
+
+        self.assert_filters()
+
+    @override_settings(RECIPE_FILTER_BACKEND='bitmap',
+                       RECIPE_INDEX_MAX_IDS=2)
+    def test_filter_bitmap_paged(self):
+        """Test only the ids of the requested page are sent as id list"""
+
+        titles = []
+        params = {'tags': f'{self.vegan.id},{self.quick.id}', 'page_size': 1}
+        with patch.object(filters, 'filter_recipes_sql') as sql:
+            response = self.client.get(RECIPES_URL, params)
+            while True:
+                titles += [recipe['title']
+                           for recipe in response.data['results']]
+                if not response.data['next']:
+                    break
+                response = self.client.get(response.data['next'])
+            previous = self.client.get(response.data['previous'])
+
+        sql.assert_not_called()
+        self.assertEqual(titles, ['Steak', 'Soup', 'Salad'])
+        self.assertEqual([recipe['title']
+                          for recipe in previous.data['results']], ['Soup'])
+
+    @override_settings(RECIPE_FILTER_BACKEND='sql')
+    def test_filter_sql(self):
+        """Test filtering recipes through SQL joins"""
+
+        self.assert_filters()
+
+    def test_filter_invalid_ids(self):
+        """Test that non numeric ids are rejected"""
+
+        response = self.client.get(RECIPES_URL, {'tags': 'vegan'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_index_updated_incrementally(self):
+        """Test relation changes are applied to a built index in place"""
+
+        index = filters.get_index(self.user.id)
+
+        self.steak.tags.add(self.vegan)
+        self.vegan.recipe_set.remove(self.salad)
+        self.soup.tags.clear()
+
+        self.assertIs(filters.get_index(self.user.id), index)
+        self.assertEqual(list(index.filter({'tags': [self.vegan.id]})),
+                         [self.steak.id])
+
+    def test_rolled_back_change_not_applied(self):
+        """Test relation changes reach the index only once committed"""
+
+        index = filters.get_index(self.user.id)
+
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                self.steak.tags.add(self.vegan)
+                raise ValueError
+
+        self.assertIs(filters.get_index(self.user.id), index)
+        self.assertEqual(sorted(index.filter({'tags': [self.vegan.id]})),
+                         sorted([self.salad.id, self.soup.id]))
+
+    def test_transaction_bumps_index_once(self):
+        """Test the changes of one transaction share one version bump"""
+
+        index = filters.get_index(self.user.id)
+        version = filters.current_index_version(self.user.id)
+
+        with transaction.atomic():
+            self.steak.tags.add(self.vegan)
+            self.vegan.recipe_set.remove(self.salad)
+            self.soup.tags.clear()
+
+        self.assertEqual(filters.current_index_version(self.user.id),
+                         version + 1)
+        self.assertIs(filters.get_index(self.user.id), index)
+        self.assertEqual(list(index.filter({'tags': [self.vegan.id]})),
+                         [self.steak.id])
+
+    def test_index_rebuilt_after_remote_write(self):
+        """Test a version bump from another process forces a rebuild"""
+
+        index = filters.get_index(self.user.id)
+        filters.bump_index_version(self.user.id)
+
+        rebuilt = filters.get_index(self.user.id)
+
+        self.assertIsNot(rebuilt, index)
+        self.assertEqual(sorted(rebuilt.filter({'tags': [self.vegan.id]})),
+                         sorted([self.salad.id, self.soup.id]))
@@ -6,6 +6,7 @@ from rest_framework.test import APIClient
 from rest_framework import status
 
 from core.models import Ingredient
+from recipe.cache import list_cache
 from recipe.serializers import IngredientSerializer
 
 INGREDIENTS_URL = reverse("recipe:ingredient-list")
@@ -31,6 +32,7 @@ class PrivateIngredientsAPITest(TestCase):
     """Test the private ingredients api"""
 
     def setUp(self) -> None:
+        list_cache().clear()
         self.client = APIClient()
         self.user = User.objects.create_user(
             email='test@test.com',
@@ -49,7 +51,7 @@ class PrivateIngredientsAPITest(TestCase):
         serializer = IngredientSerializer(ingredients, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
 
     def test_ingredients_limited_to_user(self):
         """Test that ingredients for the authenticated user are returned"""
@@ -68,7 +70,7 @@ class PrivateIngredientsAPITest(TestCase):
         serializer = IngredientSerializer(ingredients, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
 
     def test_create_ingredient_successful(self):
         """Test create a new ingredient"""
@@ -95,3 +97,22 @@ class PrivateIngredientsAPITest(TestCase):
         response = self.client.post(INGREDIENTS_URL, payload)
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create_ingredients(self):
+        """Test creating ingredients from a list in a fixed query count"""
+
+        other_user = User.objects.create_user('other@test.com', 'pass1234')
+        Ingredient.objects.create(user=other_user, name='Salt')
+        payload = [{'name': f'Ingredient {i}'} for i in range(50)]
+        payload.append({'name': 'Salt'})
+
+        # savepoint, lookup, insert, lookup, release
+        with self.assertNumQueries(5):
+            response = self.client.post(INGREDIENTS_URL, payload,
+                                        format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item['name'] for item in response.data],
+                         [item['name'] for item in payload])
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(),
+                         51)
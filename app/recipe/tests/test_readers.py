@@ -0,0 +1,82 @@
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient, Recipe
+from recipe.cache import list_cache
+from recipe.readers import ValuesReader
+from recipe.serializers import (
+    TagSerializer, IngredientSerializer, RecipeSerializer
+)
+
+User = get_user_model()
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+class ValuesReaderTests(TestCase):
+    """Test the values reader matches the model serializers"""
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_user('test@test.com', 'testpass')
+        tags = [Tag.objects.create(user=self.user, name=name)
+                for name in ('Vegan', 'Dessert', 'Spicy')]
+        ingredients = [Ingredient.objects.create(user=self.user, name=name)
+                       for name in ('Salt', 'Kale')]
+
+        Recipe.objects.create(user=self.user, title='Plain', time_minutes=1,
+                              price=Decimal('5'))
+        recipe = Recipe.objects.create(user=self.user, title='Cake',
+                                       time_minutes=30, price='10.50',
+                                       link='https://example.com/cake')
+        recipe.tags.set(reversed(tags))
+        recipe.ingredients.set(ingredients)
+        recipe = Recipe.objects.create(user=self.user, title='Soup',
+                                       time_minutes=15, price='0.99')
+        recipe.tags.set(tags[1:])
+
+    def assertParity(self, serializer_class, queryset):
+        reader = ValuesReader.for_serializer(serializer_class)
+        rows = list(reader.values(queryset))
+
+        self.assertEqual(
+            reader.to_representation(rows),
+            serializer_class(queryset, many=True).data,
+        )
+
+    def test_recipe_parity(self):
+        """Test recipes with and without relations serialize the same"""
+
+        recipes = Recipe.objects.order_by('id')
+        self.assertParity(RecipeSerializer, recipes)
+        self.assertParity(RecipeSerializer, recipes.filter(tags=None))
+
+    def test_attr_parity(self):
+        """Test tags and ingredients serialize the same"""
+
+        self.assertParity(TagSerializer, Tag.objects.order_by('id'))
+        self.assertParity(IngredientSerializer,
+                          Ingredient.objects.order_by('id'))
+
+    def test_list_endpoints_parity(self):
+        """Test list pages are identical with the values path on or off"""
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        requests = (
+            (RECIPES_URL, {'page_size': 2}),
+            (RECIPES_URL, {'search': 'cake'}),
+            (RECIPES_URL, {'tags': Tag.objects.first().id}),
+            (TAGS_URL, {'page_size': 2}),
+        )
+        for url, params in requests:
+            responses = []
+            for enabled in (False, True):
+                list_cache().clear()
+                with self.settings(RECIPE_VALUES_LIST=enabled):
+                    responses.append(client.get(url, params).data)
+
+            self.assertEqual(responses[0], responses[1])
@@ -1,16 +1,30 @@
+import csv
+import json
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 
-from core.models import Recipe
+from core.models import Recipe, Tag, Ingredient
+from recipe.cache import list_cache
+from recipe.exporter import RecipeExporter
+from recipe.importer import RecipeImporter
 from recipe.serializers import RecipeSerializer
 
 User = get_user_model()
 
 RECIPES_URL = reverse('recipe:recipe-list')
+IMPORT_URL = reverse('recipe:recipe-import')
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+def detail_url(recipe_id):
+    """Return the recipe detail url"""
+    return reverse('recipe:recipe-detail', args=(recipe_id,))
 
 
 def sample_recipe(user, **kwargs):
@@ -43,6 +57,7 @@ class PrivateRecipeApiTest(TestCase):
     """Test the private recipe api"""
 
     def setUp(self) -> None:
+        list_cache().clear()
         self.client = APIClient()
         self.user = User.objects.create(
             email='test@test.com',
@@ -62,7 +77,7 @@ class PrivateRecipeApiTest(TestCase):
         recipes_data = RecipeSerializer(recipes, many=True).data
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, recipes_data)
+        self.assertEqual(response.data['results'], recipes_data)
 
     def test_recipe_are_limited_to_user(self):
         """Test retrieving recipes for user"""
@@ -81,4 +96,266 @@ class PrivateRecipeApiTest(TestCase):
         recipes_data = RecipeSerializer(recipes, many=True).data
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, recipes_data)
+        self.assertEqual(response.data['results'], recipes_data)
+
+    def test_list_recipes_constant_queries(self):
+        """Test listing recipes doesn't query ingredients/tags per recipe"""
+
+        for i in range(5):
+            recipe, _ = sample_recipe(user=self.user, title=f'recipe {i}')
+            recipe.tags.add(Tag.objects.create(user=self.user, name=f'{i}'))
+            recipe.ingredients.add(
+                Ingredient.objects.create(user=self.user, name=f'{i}')
+            )
+
+        # version + recipes + ingredients prefetch + tags prefetch
+        with self.settings(RECIPE_VALUES_LIST=False):
+            with self.assertNumQueries(4):
+                response = self.client.get(RECIPES_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 5)
+
+        # version + recipe rows + one union of both relations
+        list_cache().clear()
+        with self.settings(RECIPE_VALUES_LIST=True):
+            with self.assertNumQueries(3):
+                values_response = self.client.get(RECIPES_URL)
+
+        self.assertEqual(values_response.data, response.data)
+
+    def test_retrieve_recipe_constant_queries(self):
+        """Test retrieving a recipe loads its relations in fixed queries"""
+
+        recipe, _ = sample_recipe(user=self.user)
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Dessert'))
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Salt')
+        )
+
+        with self.assertNumQueries(3):
+            response = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['tags']), 2)
+
+    def test_recipes_paginated_by_cursor(self):
+        """Test recipes are returned newest first one page at a time"""
+
+        for i in range(3):
+            sample_recipe(user=self.user, title=f'recipe {i}')
+
+        response = self.client.get(RECIPES_URL, {'page_size': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+        self.assertEqual(len(response.data['results']), 2)
+
+        response = self.client.get(response.data['next'])
+
+        recipes = Recipe.objects.filter(user=self.user).order_by('-id')
+        self.assertEqual(response.data['results'],
+                         RecipeSerializer(recipes[2:], many=True).data)
+        self.assertIsNone(response.data['next'])
+
+    def test_create_recipe_constant_queries(self):
+        """Test related ids are resolved in a fixed number of queries"""
+
+        def create_recipe(count):
+            ingredients = [
+                Ingredient.objects.create(user=self.user, name=f'{count} {i}')
+                for i in range(count)
+            ]
+            tag = Tag.objects.create(user=self.user, name=f'{count}')
+            payload = {
+                'title': 'Big salad',
+                'ingredients': [ingredient.id for ingredient in ingredients],
+                'tags': [tag.id],
+                'time_minutes': 10,
+                'price': '5.00',
+            }
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(RECIPES_URL, payload,
+                                            format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(len(response.data['ingredients']), count)
+            return len(queries)
+
+        self.assertEqual(create_recipe(1), create_recipe(50))
+
+    def test_create_recipe_other_users_tag_rejected(self):
+        """Test that tags of another user can't be assigned"""
+
+        other_user = User.objects.create_user('other@test.com', 'pass1234')
+        tag = Tag.objects.create(user=other_user, name='Vegan')
+        payload = {
+            'title': 'Salad',
+            'ingredients': [],
+            'tags': [tag.id],
+            'time_minutes': 10,
+            'price': '5.00',
+        }
+
+        response = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_create_recipe_missing_ids_aggregated(self):
+        """Test that all missing ids are reported in a single error"""
+
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        payload = {
+            'title': 'Salad',
+            'ingredients': [ingredient.id, 998, 999],
+            'tags': [],
+            'time_minutes': 10,
+            'price': '5.00',
+        }
+
+        response = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.data['ingredients']), 1)
+        self.assertIn('998, 999', response.data['ingredients'][0])
+
+
+class RecipeImportTests(TestCase):
+    """Test importing recipes from NDJSON"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = User.objects.create_user('test@test.com', 'pass1234')
+        self.client.force_authenticate(self.user)
+
+    def test_import_recipes(self):
+        """Test importing recipes reports per line errors"""
+
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        lines = [
+            {'title': 'Salad', 'time_minutes': 5, 'price': '2.50',
+             'tags': ['vegan', 'Quick'], 'ingredients': ['Kale', 'Salt']},
+            {'title': 'Soup', 'time_minutes': 30, 'price': '4.00',
+             'tags': ['Quick'], 'ingredients': ['salt', 'salt']},
+            {'title': '', 'time_minutes': 5, 'price': '1.00'},
+        ]
+        body = '\n'.join(json.dumps(line) for line in lines) + '\nnot json\n'
+
+        response = self.client.post(IMPORT_URL, body,
+                                    content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['line'] for error in response.data['errors']],
+                         [3, 4])
+        self.assertIn('title', response.data['errors'][0]['errors'])
+
+        salad = Recipe.objects.get(user=self.user, title='Salad')
+        soup = Recipe.objects.get(user=self.user, title='Soup')
+        self.assertIn(vegan, salad.tags.all())
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(list(soup.ingredients.values_list('name', flat=True)),
+                         ['Salt'])
+
+    def test_import_chunked_rejected(self):
+        """Test a chunked upload without Content-Length is rejected"""
+
+        body = json.dumps({'title': 'Salad', 'time_minutes': 5,
+                           'price': '2.50'})
+
+        response = self.client.post(IMPORT_URL, body,
+                                    content_type='application/x-ndjson',
+                                    CONTENT_LENGTH='',
+                                    HTTP_TRANSFER_ENCODING='chunked')
+
+        self.assertEqual(response.status_code,
+                         status.HTTP_411_LENGTH_REQUIRED)
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+
+    def test_import_errors_capped(self):
+        """Test only the first errors are reported, all are counted"""
+
+        result = RecipeImporter(self.user, max_errors=2).run(['{'] * 5)
+
+        self.assertEqual([error['line'] for error in result['errors']],
+                         [1, 2])
+        self.assertEqual(result['error_count'], 5)
+
+    def test_import_recipes_in_chunks(self):
+        """Test every chunk of the input is stored"""
+
+        lines = (
+            json.dumps({'title': f'Recipe {i}', 'time_minutes': i,
+                        'price': '1.00', 'tags': [f'Tag {i % 3}']})
+            for i in range(7)
+        )
+
+        result = RecipeImporter(self.user, chunk_size=3).run(lines)
+
+        self.assertEqual(result, {'created': 7, 'errors': [],
+                                  'error_count': 0})
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 7)
+        self.assertEqual(Recipe.tags.through.objects.count(), 7)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 3)
+
+
+class RecipeExportTests(TestCase):
+    """Test exporting recipes as a stream"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = User.objects.create_user('test@test.com', 'pass1234')
+        self.client.force_authenticate(self.user)
+
+    def test_export_ndjson(self):
+        """Test exporting recipes as NDJSON with their relations"""
+
+        recipe, _ = sample_recipe(user=self.user, title='Salad')
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        sample_recipe(user=self.user, title='Soup')
+        other_user = User.objects.create_user('other@test.com', 'pass1234')
+        sample_recipe(user=other_user, title='Steak')
+
+        response = self.client.get(EXPORT_URL)
+
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in
+                b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['title'] for row in rows], ['Salad', 'Soup'])
+        self.assertEqual(rows[0]['tags'][0]['name'], 'Vegan')
+        self.assertEqual(rows[0]['price'], '5.00')
+        self.assertEqual(rows[1]['tags'], [])
+
+    def test_export_csv(self):
+        """Test exporting recipes as CSV"""
+
+        recipe, _ = sample_recipe(user=self.user, title='Salad')
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Kale'),
+            Ingredient.objects.create(user=self.user, name='Salt; "sea"'),
+        )
+
+        response = self.client.get(EXPORT_URL, {'output': 'csv'})
+
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(content.splitlines()))
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(rows[0]['title'], 'Salad')
+        self.assertEqual(json.loads(rows[0]['ingredients']),
+                         ['Kale', 'Salt; "sea"'])
+        self.assertEqual(json.loads(rows[0]['tags']), [])
+        self.assertEqual(len(rows[0]['ingredient_ids'].split(';')), 2)
+
+    def test_export_queries_per_chunk(self):
+        """Test relations are loaded once per chunk, not per recipe"""
+
+        for i in range(6):
+            recipe, _ = sample_recipe(user=self.user, title=f'{i}')
+            recipe.tags.add(Tag.objects.create(user=self.user, name=f'{i}'))
+
+        # one recipes cursor, then tags + ingredients for each of two chunks
+        with self.assertNumQueries(5):
+            rows = list(RecipeExporter(self.user, chunk_size=3).rows())
+
+        self.assertEqual(len(rows), 6)
@@ -0,0 +1,132 @@
+import json
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient, Recipe
+from recipe.cache import list_cache
+from recipe.importer import RecipeImporter
+
+User = get_user_model()
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def sample_recipe(user, title):
+    """Create and return a sample recipe"""
+
+    return Recipe.objects.create(user=user, title=title, time_minutes=5,
+                                 price='5.00')
+
+
+class RecipeSearchTests(TransactionTestCase):
+    """Test full-text search of recipes"""
+
+    def setUp(self) -> None:
+        list_cache().clear()
+        self.user = User.objects.create_user('test@test.com', 'pass1234')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def search(self, text, **params):
+        response = self.client.get(RECIPES_URL, {'search': text, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [recipe['title'] for recipe in response.data['results']]
+
+    def test_search_title_and_names(self):
+        """Test searching titles and tag/ingredient names, ranked"""
+
+        sample_recipe(self.user, 'Kale salad')
+        soup = sample_recipe(self.user, 'Green soup')
+        soup.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Kale')
+        )
+        sample_recipe(self.user, 'Steak')
+        other_user = User.objects.create_user('other@test.com', 'pass1234')
+        sample_recipe(other_user, 'Kale chips')
+
+        self.assertEqual(self.search('kale'), ['Kale salad', 'Green soup'])
+        self.assertEqual(self.search('salads'), ['Kale salad'])
+
+    def test_search_paginated_by_rank(self):
+        """Test paging through search results keeps the rank order"""
+
+        for i in range(3):
+            sample_recipe(self.user, f'Soup {i}')
+        sample_recipe(self.user, 'Soup soup soup')
+
+        first = self.client.get(RECIPES_URL, {'search': 'soup',
+                                              'page_size': 2})
+        second = self.client.get(first.data['next'])
+
+        titles = [recipe['title'] for recipe in
+                  first.data['results'] + second.data['results']]
+        self.assertEqual(titles[0], 'Soup soup soup')
+        self.assertEqual(sorted(titles[1:]), ['Soup 0', 'Soup 1', 'Soup 2'])
+
+    def test_search_follows_relation_changes(self):
+        """Test renaming, removing and deleting tags updates the index"""
+
+        recipe = sample_recipe(self.user, 'Salad')
+        tag = Tag.objects.create(user=self.user, name='Lunch')
+        recipe.tags.add(tag)
+        self.assertEqual(self.search('lunch'), ['Salad'])
+
+        tag.name = 'Dinner'
+        tag.save()
+        self.assertEqual(self.search('lunch'), [])
+        self.assertEqual(self.search('dinner'), ['Salad'])
+
+        tag.recipe_set.clear()
+        self.assertEqual(self.search('dinner'), [])
+
+        recipe.tags.add(tag)
+        tag.delete()
+        self.assertEqual(self.search('dinner'), [])
+
+    def test_search_rebuilt_once_per_transaction(self):
+        """Test a write touching many relations rebuilds each document once"""
+
+        tags = [Tag.objects.create(user=self.user, name=f'Tag {i}').id
+                for i in range(3)]
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=f'Ing {i}').id
+            for i in range(3)
+        ]
+
+        with patch('recipe.search.update_search_index') as update:
+            response = self.client.post(RECIPES_URL, {
+                'title': 'Salad', 'time_minutes': 5, 'price': '5.00',
+                'tags': tags, 'ingredients': ingredients,
+            })
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        update.assert_called_once_with({response.data['id']})
+
+    def test_search_deleted_recipe(self):
+        """Test deleted recipes are removed from the index"""
+
+        sample_recipe(self.user, 'Salad').delete()
+
+        self.assertEqual(self.search('salad'), [])
+
+    def test_search_imported_recipes(self):
+        """Test imported recipes are searchable by their names"""
+
+        line = json.dumps({'title': 'Salad', 'time_minutes': 5,
+                           'price': '1.00', 'tags': ['Vegan']})
+        RecipeImporter(self.user).run([line])
+
+        self.assertEqual(self.search('vegan'), ['Salad'])
+
+    def test_search_query_syntax_ignored(self):
+        """Test search operators in the input are treated as text"""
+
+        sample_recipe(self.user, 'Salad')
+
+        self.assertEqual(self.search('salad OR "*'), [])
+        self.assertEqual(self.search('"salad"'), ['Salad'])
+        self.assertEqual(self.search('***'), [])
@@ -0,0 +1,178 @@
+from io import StringIO
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import QuerySet
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient, Recipe, RecipeStatsCounter
+from core.renderers import FastJSONRenderer
+from recipe import stats
+from recipe.importer import RecipeImporter
+
+User = get_user_model()
+
+STATS_URL = reverse('recipe:recipe-stats')
+
+
+class RecipeStatsTests(TestCase):
+    """Test the incrementally maintained recipe stats"""
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_user('test@test.com', 'testpass')
+        self.vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.quick = Tag.objects.create(user=self.user, name='Quick')
+        self.salt = Ingredient.objects.create(user=self.user, name='Salt')
+
+    def sample_recipe(self, time_minutes, price, **kwargs):
+        return Recipe.objects.create(user=self.user, title='Recipe',
+                                     time_minutes=time_minutes, price=price,
+                                     **kwargs)
+
+    def assertConsistent(self):
+        self.assertEqual(stats.check(self.user.id), {})
+
+    def test_counters_follow_changes(self):
+        """Test saves, deletes and relation changes keep counters exact"""
+
+        recipe = self.sample_recipe(10, '4.99')
+        other = self.sample_recipe(20, '12.00')
+        recipe.tags.add(self.vegan, self.quick)
+        other.tags.add(self.vegan)
+        other.ingredients.add(self.salt)
+        self.assertConsistent()
+
+        recipe.time_minutes = 15
+        recipe.price = '5.00'
+        recipe.save()
+        self.assertConsistent()
+
+        recipe.tags.remove(self.quick, self.quick.id + 100)
+        other.tags.clear()
+        self.assertConsistent()
+
+        self.salt.recipe_set.add(recipe)
+        self.vegan.recipe_set.remove(recipe)
+        self.assertConsistent()
+
+        self.quick.delete()
+        other.delete()
+        self.assertConsistent()
+
+        recipe.delete()
+        self.assertFalse(RecipeStatsCounter.objects.exists())
+
+    def test_adjust_upserts_counters(self):
+        """Test existing and missing counters change in one query"""
+
+        RecipeStatsCounter.objects.create(
+            user=self.user, kind=RecipeStatsCounter.TIME_MINUTES, key=10,
+            count=2,
+        )
+
+        with self.assertNumQueries(1):
+            stats.adjust(self.user.id, {
+                (RecipeStatsCounter.TIME_MINUTES, 10): 1,
+                (RecipeStatsCounter.TIME_MINUTES, 20): 1,
+            })
+
+        self.assertEqual(stats.stored(self.user.id), {
+            (RecipeStatsCounter.TIME_MINUTES, 10): 3,
+            (RecipeStatsCounter.TIME_MINUTES, 20): 1,
+        })
+
+    def test_update_reads_no_old_row(self):
+        """Test saving a loaded recipe moves its counters without a
+        query for its old values
+        """
+
+        Recipe.objects.create(user=self.user, title='Recipe',
+                              time_minutes=10, price='4.99')
+        recipe = Recipe.objects.get()
+        recipe.time_minutes = 15
+
+        with patch.object(QuerySet, 'first') as first:
+            recipe.save()
+            recipe.price = '5.00'
+            recipe.save()
+
+        first.assert_not_called()
+        self.assertConsistent()
+
+    def test_import_counted(self):
+        """Test bulk imported recipes and relations are counted once"""
+
+        RecipeImporter(self.user).run([
+            '{"title": "a", "time_minutes": 5, "price": "1.00", '
+            '"tags": ["Vegan", "New"], "ingredients": ["Salt"]}',
+            '{"title": "b", "time_minutes": 5, "price": "2.00", '
+            '"tags": ["vegan"]}',
+        ])
+
+        self.assertConsistent()
+        self.assertEqual(RecipeStatsCounter.objects.get(
+            kind=RecipeStatsCounter.TIME_MINUTES, key=5
+        ).count, 2)
+
+    def test_stats_endpoint(self):
+        """Test the endpoint summarizes the user's recipes"""
+
+        for minutes, price in ((10, '1.00'), (20, '6.50'), (30, '7.00'),
+                               (40, '3.00')):
+            self.sample_recipe(minutes, price).tags.add(self.vegan)
+        self.sample_recipe(50, '9.99').tags.add(self.quick)
+        Recipe.objects.create(user=User.objects.create_user('other@x.com'),
+                              title='Other', time_minutes=1, price='1.00')
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.get(STATS_URL)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['recipe_count'], 5)
+        self.assertEqual(response.data['time_minutes'], {
+            'mean': 30, 'min': 10, 'max': 50, 'p50': 30, 'p90': 50,
+            'p99': 50,
+        })
+        self.assertEqual(response.data['price_histogram'], [
+            {'min': '0.00', 'max': '5.00', 'count': 2},
+            {'min': '5.00', 'max': '10.00', 'count': 3},
+        ])
+        self.assertEqual(response.data['top_tags'], [
+            {'id': self.vegan.id, 'name': 'Vegan', 'count': 4},
+            {'id': self.quick.id, 'name': 'Quick', 'count': 1},
+        ])
+        self.assertEqual(response.data['top_ingredients'], [])
+
+    def test_stats_mean_rounded(self):
+        """Test the mean is rounded and renders the same with orjson"""
+
+        for minutes in (10, 10, 11):
+            self.sample_recipe(minutes, '1.00')
+
+        data = stats.summary(self.user.id)
+
+        self.assertEqual(data['time_minutes']['mean'], 10.33)
+        self.assertEqual(FastJSONRenderer().render(data),
+                         JSONRenderer().render(data))
+
+    def test_rebuild_command(self):
+        """Test check reports drifted counters and rebuild repairs them"""
+
+        self.sample_recipe(10, '1.00')
+        RecipeStatsCounter.objects.filter(
+            kind=RecipeStatsCounter.TIME_MINUTES
+        ).update(count=7)
+
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('rebuild_recipe_stats', check=True, stdout=out)
+        self.assertIn('stored 7, expected 1', out.getvalue())
+
+        call_command('rebuild_recipe_stats', self.user.email,
+                     stdout=StringIO())
+        self.assertConsistent()
@@ -7,11 +7,13 @@ from rest_framework.test import APIClient
 
 from core.models import Tag
 
+from recipe.cache import list_cache
 from recipe.serializers import TagSerializer
 
 User = get_user_model()
 
 TAGS_URL = reverse('recipe:tag-list')
+AUTOCOMPLETE_URL = reverse('recipe:tag-autocomplete')
 
 
 class PublicTagsAPITests(TestCase):
@@ -32,6 +34,7 @@ class PrivateTagsAPITests(TestCase):
     """Test the authorized user tags API"""
 
     def setUp(self) -> None:
+        list_cache().clear()
         self.user = User.objects.create_user(
             email="test@test.com",
             password="pass1234"
@@ -51,7 +54,7 @@ class PrivateTagsAPITests(TestCase):
         serializer = TagSerializer(tags, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
 
     def test_tags_limited_to_user(self):
         """Test that tags returned are for the authenticated user"""
@@ -70,8 +73,8 @@ class PrivateTagsAPITests(TestCase):
         serializer = TagSerializer(tags, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'], serializer.data)
 
     def test_create_tag_successful(self):
         """Test creating a new tag"""
@@ -98,3 +101,142 @@ class PrivateTagsAPITests(TestCase):
         response = self.client.post(TAGS_URL, data=payload)
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_tags_paginated_by_cursor(self):
+        """Test tags are paginated with a stable cursor on duplicate values"""
+
+        for name in ('Vegan', 'Lunch', 'Quick'):
+            Tag.objects.create(user=self.user, name=name)
+        Tag.objects.create(user=self.user, name='Dessert', usage=1)
+
+        seen = []
+        url = TAGS_URL + '?ordering=-usage&page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 2)
+            seen.extend(tag['id'] for tag in response.data['results'])
+            url = response.data['next']
+
+        expected = Tag.objects.filter(user=self.user)\
+                              .order_by('-usage', '-id')\
+                              .values_list('id', flat=True)
+        self.assertEqual(seen, list(expected))
+
+    def test_tags_paginated_by_name(self):
+        """Test tags with distinct names are paginated in name order"""
+
+        for name in ('Vegan', 'Vegetarian', 'Dessert', 'Breakfast', 'Lunch'):
+            Tag.objects.create(user=self.user, name=name)
+
+        seen = []
+        url = TAGS_URL + '?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 2)
+            seen.extend(tag['name'] for tag in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(seen, ['Vegetarian', 'Vegan', 'Lunch', 'Dessert',
+                                'Breakfast'])
+
+    def test_bulk_create_tags(self):
+        """Test creating tags from a list returns ids in input order"""
+
+        existing = Tag.objects.create(user=self.user, name='Vegan')
+        payload = [{'name': 'Dessert'}, {'name': 'vegan'}, {'name': 'DESSERT'}]
+
+        response = self.client.post(TAGS_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        ids = [tag['id'] for tag in response.data]
+        dessert = Tag.objects.get(user=self.user, name='Dessert')
+        self.assertEqual(ids, [dessert.id, existing.id, dessert.id])
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+
+    def test_validate_name_without_request(self):
+        """Test names are checked against the instance's or the given
+        user's tags when there is no request
+        """
+
+        Tag.objects.create(user=self.user, name='Vegan')
+        lunch = Tag.objects.create(user=self.user, name='Lunch')
+
+        rename = TagSerializer(lunch, data={'name': 'vegan'})
+        create = TagSerializer(data={'name': 'VEGAN'},
+                               context={'user': self.user})
+        keep = TagSerializer(lunch, data={'name': 'lunch'})
+
+        self.assertFalse(rename.is_valid())
+        self.assertFalse(create.is_valid())
+        self.assertTrue(keep.is_valid())
+
+    def test_create_existing_tag_rejected(self):
+        """Test creating one tag with a taken name, in any case, fails"""
+
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        response = self.client.post(TAGS_URL, {'name': 'VEGAN'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('name', response.data)
+        self.assertEqual(Tag.objects.count(), 1)
+
+    def test_bulk_create_tags_invalid(self):
+        """Test that one invalid item rejects the whole list"""
+
+        payload = [{'name': 'Dessert'}, {'name': ''}]
+
+        response = self.client.post(TAGS_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Tag.objects.exists())
+
+    def test_autocomplete_tags(self):
+        """Test autocompleting tag names by prefix, then by similarity"""
+
+        for name in ('Vegan', 'Vegetarian', 'Dessert', 'Breakfast'):
+            Tag.objects.create(user=self.user, name=name)
+        other_user = User.objects.create_user('other@test.com', 'pass1234')
+        Tag.objects.create(user=other_user, name='Vegetables')
+
+        response = self.client.get(AUTOCOMPLETE_URL, {'q': 'veg'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([tag['name'] for tag in response.data],
+                         ['Vegan', 'Vegetarian'])
+
+        response = self.client.get(AUTOCOMPLETE_URL, {'q': 'desert'})
+        self.assertEqual([tag['name'] for tag in response.data], ['Dessert'])
+
+        response = self.client.get(AUTOCOMPLETE_URL, {'q': 'VEG', 'limit': 1})
+        self.assertEqual([tag['name'] for tag in response.data], ['Vegan'])
+
+    def test_autocomplete_special_characters(self):
+        """Test LIKE wildcards and the last code point match literally"""
+
+        for name in ('50% off', '500 club', '\U0010ffff'):
+            Tag.objects.create(user=self.user, name=name)
+
+        response = self.client.get(AUTOCOMPLETE_URL, {'q': '50%'})
+        self.assertEqual([tag['name'] for tag in response.data], ['50% off'])
+
+        response = self.client.get(AUTOCOMPLETE_URL, {'q': '\U0010ffff'})
+        self.assertEqual([tag['name'] for tag in response.data],
+                         ['\U0010ffff'])
+
+    def test_autocomplete_invalid_limit(self):
+        """Test a limit below one is rejected"""
+
+        response = self.client.get(AUTOCOMPLETE_URL, {'q': 'veg', 'limit': 0})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_autocomplete_empty_query(self):
+        """Test an empty query returns nothing"""
+
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        response = self.client.get(AUTOCOMPLETE_URL, {'q': ' '})
+
+        self.assertEqual(response.data, [])
@@ -0,0 +1,154 @@
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import TransactionTestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient, Recipe
+from recipe.cache import list_cache
+from recipe.importer import RecipeImporter
+from recipe.serializers import TagSerializer
+
+User = get_user_model()
+
+TAGS_URL = reverse('recipe:tag-list')
+
+
+class UsageCounterTests(TransactionTestCase):
+    """Test the recipe usage counters of tags and ingredients"""
+
+    def setUp(self) -> None:
+        list_cache().clear()
+        self.user = User.objects.create_user('test@test.com', 'testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def sample_recipe(self, title='Recipe'):
+        return Recipe.objects.create(user=self.user, title=title,
+                                     time_minutes=5, price='1.00')
+
+    def assertUsageCorrect(self):
+        for model in (Tag, Ingredient):
+            counted = model.objects.annotate(actual=Count('recipe'))
+            for obj in counted:
+                self.assertEqual(obj.usage, obj.actual, obj.name)
+
+    def test_usage_follows_link_changes(self):
+        """Test adds, removes, clears and deletes keep usage exact"""
+
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        quick = Tag.objects.create(user=self.user, name='Quick')
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        first, second = self.sample_recipe(), self.sample_recipe()
+
+        first.tags.add(vegan, quick)
+        first.tags.add(vegan)
+        vegan.recipe_set.add(second)
+        salt.recipe_set.add(first, second)
+        self.assertUsageCorrect()
+
+        first.tags.remove(quick, quick.id + 100)
+        salt.recipe_set.remove(second)
+        second.tags.clear()
+        self.assertUsageCorrect()
+
+        first.delete()
+        self.assertUsageCorrect()
+        self.assertEqual(Tag.objects.get(id=vegan.id).usage, 0)
+
+    def test_rename_keeps_usage(self):
+        """Test renaming a loaded tag doesn't overwrite its usage"""
+
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.sample_recipe().tags.add(tag)
+
+        serializer = TagSerializer(tag, data={'name': 'Vegetarian'})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        tag.refresh_from_db()
+        self.assertEqual((tag.name, tag.usage), ('Vegetarian', 1))
+
+    def test_removed_link_counted_once(self):
+        """Test removing a link through two copies decrements once"""
+
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe = self.sample_recipe()
+        recipe.tags.add(tag)
+        copy = Recipe.objects.get(pk=recipe.pk)
+
+        recipe.tags.remove(tag)
+        copy.tags.remove(tag)
+
+        self.assertEqual(Tag.objects.get(pk=tag.pk).usage, 0)
+
+    def test_import_counts_usage(self):
+        """Test bulk imported links are counted"""
+
+        RecipeImporter(self.user).run([
+            '{"title": "a", "time_minutes": 5, "price": "1.00", '
+            '"tags": ["Vegan"], "ingredients": ["Salt", "Kale"]}',
+            '{"title": "b", "time_minutes": 5, "price": "2.00", '
+            '"tags": ["vegan"], "ingredients": ["Salt"]}',
+        ])
+
+        self.assertUsageCorrect()
+        self.assertEqual(Ingredient.objects.get(name='Salt').usage, 2)
+
+    def test_order_by_usage(self):
+        """Test tags can be listed most used first, one page at a time"""
+
+        tags = [Tag.objects.create(user=self.user, name=name)
+                for name in ('Rare', 'Common', 'Unused')]
+        for _ in range(2):
+            self.sample_recipe().tags.add(tags[1])
+        self.sample_recipe().tags.add(tags[0])
+
+        response = self.client.get(TAGS_URL, {'ordering': '-usage',
+                                              'page_size': 2})
+        names = [tag['name'] for tag in response.data['results']]
+        response = self.client.get(response.data['next'])
+        names += [tag['name'] for tag in response.data['results']]
+
+        self.assertEqual(names, ['Common', 'Rare', 'Unused'])
+
+    def test_assigned_only(self):
+        """Test unused tags can be filtered out"""
+
+        used = Tag.objects.create(user=self.user, name='Used')
+        Tag.objects.create(user=self.user, name='Unused')
+        self.sample_recipe().tags.add(used)
+
+        response = self.client.get(TAGS_URL, {'assigned_only': '1'})
+
+        self.assertEqual([tag['name'] for tag in response.data['results']],
+                         ['Used'])
+
+    def test_usage_change_invalidates_list(self):
+        """Test a cached usage ordering is refreshed by new links"""
+
+        tags = [Tag.objects.create(user=self.user, name=name)
+                for name in ('A', 'B')]
+        self.client.get(TAGS_URL, {'ordering': '-usage'})
+
+        self.sample_recipe().tags.add(tags[0])
+        response = self.client.get(TAGS_URL, {'ordering': '-usage'})
+
+        self.assertEqual(response.data['results'][0]['name'], 'A')
+
+    def test_repair_command(self):
+        """Test the repair command recounts stale counters"""
+
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.sample_recipe().tags.add(tag)
+        Tag.objects.update(usage=5)
+        Ingredient.objects.create(user=self.user, name='Salt', usage=3)
+
+        out = StringIO()
+        call_command('repair_usage_counters', stdout=out)
+
+        self.assertIn('tags: fixed 1', out.getvalue())
+        self.assertIn('ingredients: fixed 1', out.getvalue())
+        self.assertUsageCorrect()
@@ -1,28 +1,88 @@
-from rest_framework import viewsets, mixins
-from rest_framework.authentication import TokenAuthentication
+from django.db import router, transaction
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from rest_framework import viewsets, mixins, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from .autocomplete import complete_names
+from .cache import CachedListMixin, invalidate_lists_on_commit
+from .exporter import RecipeExporter
+from .fieldsets import ExpandFieldsMixin, SparseFieldsViewMixin
+from .filters import filter_recipes
+from .search import search_recipes
+from .stats import summary
+from .importer import RecipeImporter
+from .pagination import RecipeAttrCursorPagination, RecipeCursorPagination
+from .readers import ValuesListMixin
 from .serializers import TagSerializer, IngredientSerializer, RecipeSerializer
 from core.models import Tag, Ingredient, Recipe
+from core.routers import ReplicaRoutingMixin, ShardRoutingMixin
+from users.authentication import CachedTokenAuthentication
 
 
-class BaseRecipeAttrViewSet(viewsets.GenericViewSet,
+class BaseRecipeAttrViewSet(ShardRoutingMixin,
+                            ReplicaRoutingMixin,
+                            CachedListMixin,
+                            ValuesListMixin,
+                            SparseFieldsViewMixin,
+                            viewsets.GenericViewSet,
                             mixins.ListModelMixin,
                             mixins.CreateModelMixin):
     """Base class for a user owned recipe attributes"""
 
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = RecipeAttrCursorPagination
 
     def get_queryset(self):
-        """Return objects for the current authenticated user only"""
+        """Return objects for the current authenticated user only
+
+        `?assigned_only=1` limits them to those used by a recipe.
+        """
 
         qs = super(BaseRecipeAttrViewSet, self).get_queryset()
-        return qs.filter(user=self.request.user).order_by('-name')
+        qs = qs.filter(user=self.request.user)
+        if self.request.query_params.get('assigned_only') == '1':
+            qs = qs.filter(usage__gt=0)
+
+        return qs.order_by('-name', '-id')
+
+    def create(self, request, *args, **kwargs):
+        """Create one object, or many when given a list"""
+
+        many = isinstance(request.data, list)
+        serializer = self.get_serializer(data=request.data, many=many)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def perform_create(self, serializer):
         """Create a new object"""
 
         serializer.save(user=self.request.user)
+        # Bulk inserts don't send post_save
+        invalidate_lists_on_commit(self.request.user.id,
+                                   self.queryset.model._meta.model_name)
+
+    @action(methods=['get'], detail=False, url_path='autocomplete',
+            url_name='autocomplete')
+    def autocomplete(self, request):
+        """Return the best name matches for `?q=`, up to `?limit=`"""
+
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), 50)
+        except ValueError:
+            raise ValidationError({'limit': 'Expected a number.'})
+        if limit < 1:
+            raise ValidationError({'limit': 'Expected a positive number.'})
+
+        matches = complete_names(self.get_queryset(),
+                                 request.query_params.get('q', ''), limit)
+
+        return Response(self.get_serializer(matches, many=True).data)
 
 
 class TagViewSet(BaseRecipeAttrViewSet):
@@ -39,17 +99,120 @@ class IngredientViewSet(BaseRecipeAttrViewSet):
     queryset = Ingredient.objects.all()
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ShardRoutingMixin,
+                    ReplicaRoutingMixin,
+                    CachedListMixin,
+                    ValuesListMixin,
+                    SparseFieldsViewMixin,
+                    ExpandFieldsMixin,
+                    viewsets.ModelViewSet):
     """Manage Recipe in the database"""
 
     serializer_class = RecipeSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = RecipeCursorPagination
+
+    def _params_to_ints(self, name):
+        """Convert a comma separated list of ids to a list of integers"""
+
+        value = self.request.query_params.get(name)
+        if not value:
+            return []
+
+        try:
+            return [int(pk) for pk in value.split(',')]
+        except ValueError:
+            raise ValidationError({name: 'Expected comma separated ids.'})
 
     # Must override because the old one order by name
     def get_queryset(self):
         """Retrieve the recipes for the authenticated user"""
 
         qs = super(RecipeViewSet, self).get_queryset()
-        return qs.filter(user=self.request.user)
+        qs = qs.filter(user=self.request.user)
+
+        filters = {}
+        for relation in ('tags', 'ingredients'):
+            pks = self._params_to_ints(relation)
+            if pks:
+                filters[relation] = pks
+        if filters:
+            match_all = self.request.query_params.get('match') == 'all'
+            page = None
+            if self.action == 'list':
+                page = self.paginator.id_page(self.request)
+            qs = filter_recipes(qs, self.request.user, filters, match_all,
+                                page)
+
+        search = self.request.query_params.get('search')
+        if search:
+            qs = search_recipes(qs, search).order_by('-rank', '-id')
+        else:
+            qs = qs.order_by('-id')
+
+        # Ordered like the related ids of the values list path
+        prefetches = [
+            Prefetch(relation, queryset=model.objects.order_by('id'))
+            for relation, model in (('ingredients', Ingredient),
+                                    ('tags', Tag))
+            if self.wants_field(relation)
+        ]
+        return qs.prefetch_related(*prefetches)
+
+    def perform_create(self, serializer):
+        """Create a new recipe"""
+
+        with transaction.atomic(using=router.db_for_write(Recipe)):
+            serializer.save(user=self.request.user)
+
+    def perform_update(self, serializer):
+        """Update a recipe and its relations in one transaction"""
+
+        with transaction.atomic(using=router.db_for_write(Recipe)):
+            serializer.save()
+
+    @action(methods=['get'], detail=False, url_path='stats',
+            url_name='stats')
+    def recipe_stats(self, request):
+        """Return the recipe statistics of the authenticated user"""
+
+        return Response(summary(request.user.id))
+
+    @action(methods=['post'], detail=False, url_path='import',
+            url_name='import')
+    def import_recipes(self, request):
+        """Import recipes streamed as newline delimited JSON"""
+
+        if request.stream is None:
+            # Django only reads bodies of a known length, so a chunked
+            # upload without Content-Length would import nothing
+            return Response(
+                {'detail': 'A request body with a Content-Length header '
+                           'is required.'},
+                status=status.HTTP_411_LENGTH_REQUIRED,
+            )
+
+        result = RecipeImporter(request.user).run(request.stream)
+
+        return Response(result, status=status.HTTP_200_OK)
+
+    @action(methods=['get'], detail=False, url_path='export',
+            url_name='export')
+    def export_recipes(self, request):
+        """Stream all recipes as NDJSON, or CSV with `?output=csv`"""
+
+        exporter = RecipeExporter(request.user)
+        if request.query_params.get('output') == 'csv':
+            response = StreamingHttpResponse(exporter.csv(),
+                                             content_type='text/csv')
+            response['Content-Disposition'] = \
+                'attachment; filename="recipes.csv"'
+        else:
+            response = StreamingHttpResponse(
+                exporter.ndjson(),
+                content_type='application/x-ndjson'
+            )
+
+        return response
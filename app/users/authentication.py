@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import ugettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+
+def token_cache():
+    """Return the cache holding resolved auth tokens"""
+
+    return caches[settings.AUTH_TOKEN_CACHE]
+
+
+def token_cache_key(key):
+    """Return the cache key for the given token key"""
+
+    return f'auth-token:{key}'
+
+
+def user_cache_key(user_id):
+    """Return the cache key for the given user id"""
+
+    return f'auth-user:{user_id}'
+
+
+def invalidate_token(key):
+    """Drop a resolved token so the next request hits the database"""
+
+    token_cache().delete(token_cache_key(key))
+
+
+def invalidate_user(user_id):
+    """Drop a cached user so the next request loads it again"""
+
+    token_cache().delete(user_cache_key(user_id))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that caches tokens and their users
+
+    A cached token is authenticated without any query. Entries expire
+    after the cache timeout and are invalidated by `users.signals` when
+    the token is deleted or the user saved or deleted.
+    """
+
+    def authenticate_credentials(self, key):
+        cache = token_cache()
+        user_id = cache.get(token_cache_key(key))
+        user = None if user_id is None else cache.get(user_cache_key(user_id))
+
+        if user is None:
+            user, token = super().authenticate_credentials(key)
+            cache.set_many({token_cache_key(key): user.pk,
+                            user_cache_key(user.pk): user})
+            return user, token
+
+        if not user.is_active:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+
+        return user, self.get_model()(key=key, user=user)
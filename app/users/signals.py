@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from core import sharding
+from .authentication import invalidate_token, invalidate_user
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Invalidate a cached token once it is deleted"""
+
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_saved_user(sender, instance, **kwargs):
+    """Invalidate the cached user once it is changed or deleted"""
+
+    invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def place_user(sender, instance, created, using, **kwargs):
+    """Choose the shard of a new user and copy the user there"""
+
+    if not created or using != DEFAULT_DB_ALIAS:
+        return
+
+    shard = sharding.place_user(instance.pk)
+    if shard != DEFAULT_DB_ALIAS:
+        instance.shard = shard
+        sharding.set_user_shard(instance.pk, shard)
+        sharding.copy_user(instance.pk, shard)
+
+
+@receiver(post_save, sender=User)
+def refresh_user_copy(sender, instance, created, using, **kwargs):
+    """Keep the copy of a changed user on their shard up to date"""
+
+    if created or using != DEFAULT_DB_ALIAS:
+        return
+
+    shard, _ = sharding.user_shard_state(instance.pk)
+    sharding.copy_user(instance.pk, shard)
+
+
+@receiver(post_delete, sender=User)
+def delete_user_data(sender, instance, using, **kwargs):
+    """Delete a deleted user's copy, and data, from their shard"""
+
+    shard = instance.shard or DEFAULT_DB_ALIAS
+    if using == DEFAULT_DB_ALIAS and shard != DEFAULT_DB_ALIAS:
+        with sharding.using_shard(shard):
+            User.objects.using(shard).filter(pk=instance.pk).delete()
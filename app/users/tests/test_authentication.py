@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from users.authentication import token_cache
+from users.serializers import UserSerializer
+
+User = get_user_model()
+
+USER_DETAIL_URL = reverse('users:detail')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test the cached token authentication"""
+
+    def setUp(self) -> None:
+        token_cache().clear()
+        self.user = User.objects.create_user(
+            email='test@test.com',
+            password='pass1234',
+            name='Test Name',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_token_resolved_once(self):
+        """Test that a cached token is authenticated without queries"""
+
+        response = self.client.get(USER_DETAIL_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(USER_DETAIL_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['email'], self.user.email)
+
+    def test_invalid_token_rejected(self):
+        """Test that an unknown token is rejected"""
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+        response = self.client.get(USER_DETAIL_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_invalidated(self):
+        """Test that deactivating the user invalidates the cached token"""
+
+        self.client.get(USER_DETAIL_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(USER_DETAIL_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_user_invalidated(self):
+        """Test that deleting the user invalidates the cached user"""
+
+        self.client.get(USER_DETAIL_URL)
+        token_key = self.token.key
+        self.user.delete()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token_key}')
+
+        response = self.client.get(USER_DETAIL_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_invalidated(self):
+        """Test that deleting the token invalidates the cached token"""
+
+        self.client.get(USER_DETAIL_URL)
+        self.token.delete()
+
+        response = self.client.get(USER_DETAIL_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_updated_user_invalidated(self):
+        """Test that updating the user refreshes the cached user"""
+
+        self.client.get(USER_DETAIL_URL)
+        serializer = UserSerializer(self.user, data={'name': 'new name'},
+                                    partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        response = self.client.get(USER_DETAIL_URL)
+
+        self.assertEqual(response.data['name'], 'new name')